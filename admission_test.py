@@ -0,0 +1,176 @@
+from typing import *
+import json
+import asyncio
+import websockets
+import redux
+
+
+@redux.behavior("admission:")
+class CountReducer(redux.Reducer):
+    count = 0
+
+    def action_received(self, action: redux.Action):
+        CountReducer.count += 1
+
+
+@redux.behavior("admission:order:")
+class OrderReducer(redux.Reducer):
+    received = []
+
+    def action_received(self, action: redux.Action):
+        OrderReducer.received.append((self.key, action.arguments["n"]))
+
+
+@redux.behavior("admission:entry:", redux.SubscribeRecycleOption(), r"/entry")
+class EntryReducer(redux.PublicEntryReducer):
+    received = []
+
+    @staticmethod
+    async def find_node_id(key_prefix, path, query):
+        return "1"
+
+    async def action_received(self, action: redux.Action):
+        if action == "HIT":
+            EntryReducer.received.append(asyncio.get_event_loop().time())
+        elif action == "SLOW":
+            EntryReducer.received.append(asyncio.get_event_loop().time())
+            await asyncio.sleep(0.05)
+
+
+def test_token_bucket():
+    bucket = redux.TokenBucket(10, 2)
+    assert bucket.delay(bucket.updated) == 0
+    bucket.take()
+    bucket.take()
+    assert abs(bucket.delay(bucket.updated) - 0.1) < 1e-6
+    assert bucket.delay(bucket.updated + 0.11) == 0
+
+
+async def drop_policy():
+    admission = redux.AdmissionController(per_source=(1, 3), per_prefix={"admission:limited": (1000, 5)})
+    store = redux.Store([CountReducer], admission=admission)
+    action = redux.Action("HIT")
+    action.source_key = "client:1"
+    results = [await store.admit("admission:1", action, "conn") for _ in range(5)]
+    assert results == [True, True, True, False, False]
+    action.source_key = "client:2"
+    assert await store.admit("admission:1", action)
+    action.source_key = None
+    results = [await store.admit("admission:limited", action) for _ in range(7)]
+    assert results.count(True) == 5
+    assert store.stats()["admission"] == dict(admitted=9, dropped=4, delayed=0, disconnected=0)
+
+
+async def delay_policy():
+    admission = redux.AdmissionController(per_connection=(100, 1), policy="delay", max_delay=0.05)
+    store = redux.Store([CountReducer], admission=admission)
+    action = redux.Action("HIT")
+    assert await store.admit("admission:1", action, "conn")
+    assert await store.admit("admission:1", action, "conn")
+    assert store.stats()["admission"]["delayed"] == 1
+    admission = redux.AdmissionController(per_connection=(1, 1), policy="disconnect", max_delay=0.05)
+    assert await admission.admit("conn")
+    assert not await admission.admit("conn")
+    assert admission.stats()["disconnected"] == 1
+    admission.forget("conn")
+    assert await admission.admit("conn")
+
+
+async def local_medium():
+    CountReducer.count = 0
+    admission = redux.AdmissionController(per_source=(1, 2))
+    store = redux.Store([CountReducer], admission=admission)
+    medium = redux.LocalMedium(store)
+    results = [await medium.send("admission:src", "admission:dst", redux.Action("HIT")) for _ in range(3)]
+    assert [result.is_error for result in results] == [False, False, True]
+    assert isinstance(results[2].error, redux.OverloadError)
+    await asyncio.sleep(0.01)
+    assert CountReducer.count == 2
+
+
+def received_by(key: str) -> List[int]:
+    return [n for target, n in OrderReducer.received if target == key]
+
+
+async def deferred_delay():
+    admission = redux.AdmissionController(per_prefix={"admission:order:slow": (50, 1)}, policy="delay", max_delay=0.5)
+    store = redux.Store([OrderReducer], admission=admission)
+    medium = redux.LocalMedium(store)
+    loop = asyncio.get_event_loop()
+    start = loop.time()
+    for n in range(4):
+        assert not (await medium.send("admission:src", "admission:order:slow", redux.Action("HIT", n=n))).is_error
+        assert not (await medium.send("admission:src", "admission:order:fast", redux.Action("HIT", n=n))).is_error
+    assert loop.time() - start < 0.01
+    await asyncio.sleep(0.01)
+    assert received_by("admission:order:fast") == [0, 1, 2, 3]
+    assert received_by("admission:order:slow") == [0]
+    assert list(store._deferred) == ["admission:order:slow"]
+    assert store.stats()["scheduler"]["pending"] == 3
+    await asyncio.sleep(0.1)
+    assert received_by("admission:order:slow") == [0, 1, 2, 3]
+    stats = store.stats()
+    assert stats["admission"]["delayed"] == 3
+    assert not store._deferred and stats["scheduler"]["pending"] == 0
+
+
+async def entry_delay():
+    EntryReducer.received = []
+    admission = redux.AdmissionController(per_connection=(50, 1), policy="delay", max_delay=0.5)
+    store = redux.Store(admission=admission)
+    manager = redux.RemoteManager()
+    server = (await manager.serve_entry("127.0.0.1", 0, store, [EntryReducer])).unwrap()
+    try:
+        port = server.sockets[0].getsockname()[1]
+        socket = await websockets.connect("ws://127.0.0.1:{}/entry".format(port))
+        await asyncio.sleep(0.05)
+        start = asyncio.get_event_loop().time()
+        for _ in range(5):
+            await socket.send(json.dumps(dict(type="HIT")))
+        await asyncio.sleep(0.02)
+        assert len(EntryReducer.received) == 1
+        await asyncio.sleep(0.1)
+        assert len(EntryReducer.received) == 5
+        assert EntryReducer.received[-1] - start >= 0.07
+        assert store.stats()["admission"]["delayed"] == 4
+        await socket.close()
+    finally:
+        await manager.stop_serve(server)
+
+
+async def entry_cap():
+    EntryReducer.received = []
+    store = redux.Store(max_pending=2)
+    manager = redux.RemoteManager()
+    server = (await manager.serve_entry("127.0.0.1", 0, store, [EntryReducer])).unwrap()
+    try:
+        port = server.sockets[0].getsockname()[1]
+        socket = await websockets.connect("ws://127.0.0.1:{}/entry".format(port))
+        await asyncio.sleep(0.05)
+        for _ in range(10):
+            await socket.send(json.dumps(dict(type="SLOW")))
+        await asyncio.sleep(0.3)
+        assert len(EntryReducer.received) <= 3
+        assert store.stats()["dropped"]["overload"] >= 7
+        await socket.close()
+    finally:
+        await manager.stop_serve(server)
+
+
+def test_admission():
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(drop_policy())
+    loop.run_until_complete(delay_policy())
+    loop.run_until_complete(local_medium())
+
+
+def test_entry_delay():
+    asyncio.get_event_loop().run_until_complete(entry_delay())
+
+
+def test_entry_cap():
+    asyncio.get_event_loop().run_until_complete(entry_cap())
+
+
+def test_deferred_delay():
+    asyncio.get_event_loop().run_until_complete(deferred_delay())
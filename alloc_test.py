@@ -0,0 +1,168 @@
+from typing import *
+import os
+import asyncio
+import tracemalloc
+import redux
+from redux.reducer import IDLE_REDUCER_BYTES
+
+
+async def name(action: redux.Action, state=None):
+    if action.type == "NAME":
+        state = action.arguments["name"]
+    return state
+
+
+@redux.behavior("alloc:")
+class AllocReducer(redux.Reducer):
+    def __init__(self):
+        super(AllocReducer, self).__init__({"name": name})
+
+
+@redux.behavior("alloc:idle:", redux.NeverRecycleOption())
+class IdleReducer(redux.Reducer):
+    __slots__ = ()
+
+
+@redux.behavior("alloc:free:", redux.NeverRecycleOption())
+class FreeListReducer(redux.Reducer):
+    __slots__ = ()
+    free_list_size = 2
+
+    def __init__(self):
+        super(FreeListReducer, self).__init__({"name": name})
+
+
+@redux.behavior("alloc:bound:")
+class BoundSliceReducer(redux.Reducer):
+    def __init__(self):
+        super(BoundSliceReducer, self).__init__({"label": self.label})
+
+    def label(self, action: redux.Action, state=None):
+        return state
+
+
+DISPATCH_COUNT = 2000
+DISPATCH_BYTES = 16
+DISPATCH_PEAK_BYTES = 1536
+IN_FLIGHT_COUNT = 200
+IN_FLIGHT_BLOCKS = 12
+
+
+def snapshot():
+    return tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+
+
+def redux_blocks(stats) -> int:
+    package = os.path.dirname(redux.__file__)
+    return sum(stat.count_diff for stat in stats if stat.traceback[0].filename.startswith(package))
+
+
+async def dispatch_allocations():
+    '''
+    单次dispatch的临时内存峰值(取多次的中位数)有上限; 在锁上挂起N个dispatch, 这时它们分配的内存块都还存活,
+    按redux中的调用栈统计平摊到每次dispatch的块数; 最后比较N次dispatch前后的快照, 不能有泄漏
+    '''
+    store = redux.Store([AllocReducer])
+    action = redux.Action("NO_CHANGE")
+    for _ in range(100):
+        await store.dispatch("alloc:1", action)
+    reducer = (await store.get_or_create_cell("alloc:1")).unwrap()
+    package_filter = tracemalloc.Filter(True, os.path.join(os.path.dirname(redux.__file__), "*"), all_frames=True)
+
+    tracemalloc.start(8)
+    try:
+        peaks = []
+        for _ in range(21):
+            tracemalloc.clear_traces()
+            await store.dispatch("alloc:1", action)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+
+        await reducer.locker.acquire()
+        before = tracemalloc.take_snapshot().filter_traces([package_filter])
+        tasks = [asyncio.ensure_future(store.dispatch("alloc:1", action)) for _ in range(IN_FLIGHT_COUNT)]
+        await asyncio.sleep(0)
+        during = tracemalloc.take_snapshot().filter_traces([package_filter])
+        reducer.locker.release()
+        assert all(await asyncio.gather(*tasks))
+
+        await store.dispatch("alloc:1", action)
+        leak_before = snapshot()
+        for _ in range(DISPATCH_COUNT):
+            await store.dispatch("alloc:1", action)
+        leak_after = snapshot()
+    finally:
+        tracemalloc.stop()
+    assert sorted(peaks)[len(peaks) // 2] < DISPATCH_PEAK_BYTES
+    in_flight = sum(stat.count_diff for stat in during.compare_to(before, "filename"))
+    assert 0 < in_flight / IN_FLIGHT_COUNT < IN_FLIGHT_BLOCKS
+    stats = leak_after.compare_to(leak_before, "filename")
+    assert sum(stat.size_diff for stat in stats) / DISPATCH_COUNT < DISPATCH_BYTES
+    assert redux_blocks(stats) < 10
+
+
+def test_dispatch_allocations():
+    asyncio.get_event_loop().run_until_complete(dispatch_allocations())
+
+
+def test_shared_objects():
+    assert redux.Option.none() is redux.Option.none()
+    assert not hasattr(redux.Action("one"), "__dict__")
+    assert not hasattr(redux.Option(1), "__dict__")
+    reducer = AllocReducer()
+    assert not reducer.enable_call_action_received
+    assert "enable_call_action_received" not in vars(reducer)
+
+
+async def idle_footprint():
+    count = 5000
+    store = redux.Store([IdleReducer])
+    keys = ["alloc:idle:{}".format(i) for i in range(count)]
+    action = redux.Action("NO_CHANGE")
+    await store.dispatch("alloc:idle:warm", action)
+    tracemalloc.start()
+    try:
+        for key in keys:
+            await store.dispatch(key, action)
+        retained, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert retained / count < IDLE_REDUCER_BYTES
+    reducer = (await store.get_or_create_cell("alloc:idle:1")).unwrap()
+    assert not hasattr(reducer, "__dict__")
+    assert reducer._subscribe_set is None and reducer._listener_dict is None and reducer._combine_index is None
+    assert reducer.node_id == "1"
+
+
+async def free_list():
+    store = redux.Store([FreeListReducer])
+    await store.dispatch("alloc:free:1", redux.Action("NAME", name="peter"))
+    reducer = (await store.get_or_create_cell("alloc:free:1")).unwrap()
+    store.pop_reducer_by_key("alloc:free:1")
+    assert reducer.key is None and not reducer.enable
+    await store.dispatch("alloc:free:2", redux.Action("NO_CHANGE"))
+    reused = (await store.get_or_create_cell("alloc:free:2")).unwrap()
+    assert reused is reducer
+    assert reused.node_id == "2"
+    assert store["alloc:free:2"] == dict(name=None)
+
+
+def test_mapping_cache():
+    import gc
+    import weakref
+    first, second = AllocReducer(), AllocReducer()
+    assert first._slices is second._slices
+    assert first.mapping_dict is not second.mapping_dict
+    bound = BoundSliceReducer()
+    reference = weakref.ref(bound)
+    assert not BoundSliceReducer._mapping_cache
+    del bound
+    gc.collect()
+    assert reference() is None
+
+
+def test_idle_footprint():
+    asyncio.get_event_loop().run_until_complete(idle_footprint())
+
+
+def test_free_list():
+    asyncio.get_event_loop().run_until_complete(free_list())
@@ -0,0 +1,66 @@
+from typing import *
+import asyncio
+import redux
+
+
+@redux.behavior("ask:service:", redux.NeverRecycleOption())
+class ServiceReducer(redux.Reducer):
+    async def action_received(self, action: redux.Action):
+        if action == "ADD":
+            total = action.arguments["a"] + action.arguments["b"]
+            await self.reply(action, redux.Action("SUM", total=total))
+
+
+@redux.behavior("ask:client:", redux.NeverRecycleOption())
+class ClientReducer(redux.Reducer):
+    results = []
+
+    def __init__(self):
+        super(ClientReducer, self).__init__()
+        self.received = []
+
+    async def action_received(self, action: redux.Action):
+        self.received.append(action.type)
+        if action == "START":
+            medium = action.arguments.get("url")
+            if medium:
+                medium = (await redux.RemoteMedium.connect(self.store, medium)).unwrap()
+            else:
+                medium = redux.LocalMedium(self.store)
+            reply_opt = await self.ask(medium, "ask:service:1", redux.Action("ADD", a=1, b=2))
+            ClientReducer.results.append(reply_opt.unwrap().arguments["total"])
+            timeout_opt = await self.ask(medium, "ask:service:1", redux.Action("IGNORED"), timeout=0.05)
+            ClientReducer.results.append(type(timeout_opt.error))
+
+
+async def ask_local():
+    ClientReducer.results = []
+    store = redux.Store([ServiceReducer, ClientReducer])
+    await store.dispatch("ask:client:1", redux.Action("START"))
+    assert ClientReducer.results == [3, asyncio.TimeoutError]
+    reducer = (await store.get_or_create_cell("ask:client:1")).unwrap()
+    assert reducer.received == ["START"]
+    assert not store._reply_futures
+
+
+async def ask_remote():
+    ClientReducer.results = []
+    store = redux.Store([ServiceReducer, ClientReducer])
+    manager = redux.RemoteManager()
+    server = (await manager.serve("127.0.0.1", 0, store)).unwrap()
+    url = "ws://127.0.0.1:{}".format(server.sockets[0].getsockname()[1])
+    manager.client_url.add(url)
+    try:
+        await store.dispatch("ask:client:1", redux.Action("START", url=url))
+        assert ClientReducer.results == [3, asyncio.TimeoutError]
+    finally:
+        manager.client_url.discard(url)
+        await manager.stop_serve(server)
+
+
+def test_ask_local():
+    asyncio.get_event_loop().run_until_complete(ask_local())
+
+
+def test_ask_remote():
+    asyncio.get_event_loop().run_until_complete(ask_remote())
@@ -0,0 +1,68 @@
+'''
+redux 的性能基准
+
+每个基准是一个注册过的协程函数, 接收 scale 参数(1.0 表示完整规模), 返回一个或多个 Result.
+运行方式:
+
+    python -m benchmark --output bench.json
+    python -m benchmark --only dispatch --scale 0.1
+    python -m benchmark --output new.json --compare old.json
+
+结果以 json 写出, --compare 会和上一次的结果比较, 超过阈值的退化会以非零状态码退出.
+'''
+
+from typing import *
+import time
+
+
+class Result:
+    def __init__(self, name: str, value: float, unit: str, higher_is_better: bool, **extra):
+        self.name = name
+        self.value = value
+        self.unit = unit
+        self.higher_is_better = higher_is_better
+        self.extra = extra
+
+    def to_dict(self):
+        return dict(name=self.name, value=self.value, unit=self.unit, higher_is_better=self.higher_is_better, **self.extra)
+
+    def __repr__(self):
+        return "<Result: {} {:.3f} {}>".format(self.name, self.value, self.unit)
+
+
+BENCHMARKS: Dict[str, Callable] = dict()
+
+
+def benchmark(name: str):
+    def wrap(func):
+        BENCHMARKS[name] = func
+        return func
+    return wrap
+
+
+def rate(name: str, count: int, elapsed: float, **extra) -> Result:
+    return Result(name, count / elapsed if elapsed else 0.0, "ops/s", True, count=count, elapsed=elapsed, **extra)
+
+
+def latency(name: str, samples: List[float], **extra) -> List[Result]:
+    samples = sorted(samples)
+    count = len(samples)
+
+    def percentile(p):
+        return samples[min(count - 1, int(count * p))] * 1e6
+    return [
+        Result(f"{name}.p50", percentile(0.50), "us", False, count=count, **extra),
+        Result(f"{name}.p99", percentile(0.99), "us", False, count=count, **extra),
+    ]
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.elapsed = time.perf_counter() - self.start
+
+
+__all__ = ["Result", "BENCHMARKS", "benchmark", "rate", "latency", "Timer", ]
@@ -0,0 +1,65 @@
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import redux
+from . import BENCHMARKS, Result
+from . import store, medium
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, encoding="utf8") as f:
+        baseline = {item["name"]: item for item in json.load(f)["results"]}
+    regressions = []
+    for result in results:
+        old = baseline.get(result["name"])
+        if not old or not old["value"]:
+            continue
+        change = (result["value"] - old["value"]) / old["value"]
+        if not result["higher_is_better"]:
+            change = -change
+        if change < -threshold:
+            regressions.append((result["name"], old["value"], result["value"], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmark")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS.keys()))
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", default=None)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    loop = asyncio.get_event_loop()
+    results = []
+    for name in args.only or BENCHMARKS.keys():
+        output = loop.run_until_complete(BENCHMARKS[name](args.scale))
+        output = [output] if isinstance(output, Result) else output
+        for result in output:
+            print(f"{result.name:32} {result.value:14.2f} {result.unit}")
+            results.append(result.to_dict())
+
+    report = dict(
+        version=redux.__version__,
+        python=platform.python_version(),
+        timestamp=time.time(),
+        scale=args.scale,
+        results=results,
+    )
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        for name, old, new, change in regressions:
+            print(f"REGRESSION {name}: {old:.2f} -> {new:.2f} ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
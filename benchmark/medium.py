@@ -0,0 +1,218 @@
+from typing import *
+import json
+import time
+import asyncio
+import websockets
+import redux
+from . import benchmark, rate, latency, Timer
+
+
+received: Dict[str, asyncio.Future] = dict()
+
+
+def expect(name: str) -> asyncio.Future:
+    future = asyncio.get_event_loop().create_future()
+    received[name] = future
+    return future
+
+
+@redux.behavior("bench:hop:", redux.NeverRecycleOption())
+class HopReducer(redux.Reducer):
+    async def action_received(self, action: redux.Action):
+        if action == "HOP":
+            future = received.pop(self.key, None)
+            if future and not future.done():
+                future.set_result(time.perf_counter())
+        elif action == "ECHO":
+            await self.send(action.medium, action.source_key, redux.Action("HOP"))
+
+
+@redux.behavior("bench:entry:", redux.SubscribeRecycleOption(), r"/bench")
+class EntryReducer(redux.PublicEntryReducer):
+    expected = 0
+    count = 0
+
+    @staticmethod
+    async def find_node_id(key_prefix, path, query):
+        return "1"
+
+    async def action_received(self, action: redux.Action):
+        if action == "INGEST":
+            EntryReducer.count += 1
+            if EntryReducer.count == EntryReducer.expected:
+                future = received.pop(self.key, None)
+                if future and not future.done():
+                    future.set_result(time.perf_counter())
+
+
+async def serve(store, entry_list=None):
+    manager = redux.RemoteManager()
+    if entry_list:
+        server = (await manager.serve_entry("127.0.0.1", 0, store, entry_list)).unwrap()
+    else:
+        server = (await manager.serve("127.0.0.1", 0, store)).unwrap()
+    port = server.sockets[0].getsockname()[1]
+    return server, port
+
+
+@benchmark("local_hop")
+async def local_hop(scale: float):
+    '''
+    进程内一跳的端到端延迟, 以及send本身的耗时(不含目标reducer的处理), 后者分别用小参数和32个参数加64KB二进制的大参数测量
+    '''
+    count = max(100, int(20000 * scale))
+    store = redux.Store([HopReducer])
+    medium = redux.LocalMedium(store)
+    samples = []
+    for _ in range(count):
+        future = expect("bench:hop:2")
+        start = time.perf_counter()
+        await medium.send("bench:hop:1", "bench:hop:2", redux.Action("HOP", payload=list(range(8))))
+        samples.append(await future - start)
+    results = latency("local.hop", samples)
+    wide = {f"field{index}": index for index in range(31)}
+    wide["blob"] = b"x" * (64 * 1024)
+    for name, arguments in [("small", dict(payload=list(range(8)))), ("wide", wide)]:
+        action = redux.Action("NOOP", **arguments)
+        send_samples = []
+        for _ in range(count):
+            start = time.perf_counter()
+            await medium.send("bench:hop:1", "bench:hop:3", action)
+            send_samples.append(time.perf_counter() - start)
+            if len(send_samples) % 256 == 0:
+                await asyncio.sleep(0)
+        results += latency(f"local.send.{name}", send_samples)
+    await asyncio.sleep(0.01)
+    return results
+
+
+@benchmark("remote")
+async def remote_round_trip(scale: float):
+    count = max(50, int(2000 * scale))
+    store = redux.Store([HopReducer])
+    server, port = await serve(store)
+    url = f"ws://127.0.0.1:{port}"
+    manager = redux.RemoteManager()
+    manager.client_url.add(url)
+    try:
+        medium = (await redux.RemoteMedium.connect(store, url)).unwrap()
+        await store.dispatch("bench:hop:1", redux.Action.no_op_command())
+        round_trip = []
+        for _ in range(count):
+            future = expect("bench:hop:1")
+            start = time.perf_counter()
+            await medium.send("bench:hop:1", "bench:hop:2", redux.Action("ECHO"))
+            round_trip.append(await asyncio.wait_for(future, 1.0) - start)
+        pick = []
+        for _ in range(count):
+            start = time.perf_counter()
+            state_opt = await medium.get_state("bench:hop:1", "bench:hop:2")
+            pick.append(time.perf_counter() - start)
+            assert not state_opt.is_error
+        return latency("remote.round_trip", round_trip) + latency("remote.pick", pick)
+    finally:
+        manager.client_url.discard(url)
+        await manager.stop_serve(server)
+
+
+@benchmark("entry_ingest")
+async def entry_ingest(scale: float):
+    count = max(100, int(20000 * scale))
+    store = redux.Store()
+    server, port = await serve(store, [EntryReducer])
+    try:
+        EntryReducer.expected = count
+        EntryReducer.count = 0
+        future = expect("bench:entry:1")
+        socket = await websockets.connect(f"ws://127.0.0.1:{port}/bench")
+        await asyncio.sleep(0.05)
+        data = json.dumps(dict(type="INGEST", value=1))
+        with Timer() as timer:
+            for _ in range(count):
+                await socket.send(data)
+            await asyncio.wait_for(future, 60)
+        await socket.close()
+        return rate("entry.ingest", count, timer.elapsed)
+    finally:
+        await redux.RemoteManager().stop_serve(server)
+
+
+@redux.behavior("bench:blob:", redux.NeverRecycleOption())
+class BlobReducer(redux.Reducer):
+    def __init__(self):
+        super(BlobReducer, self).__init__({"blob": blob_slice})
+
+
+def blob_slice(state=None, action: redux.Action=None):
+    if action == "BLOB":
+        state = action.arguments["data"]
+    return state
+
+
+@redux.behavior("bench:sink:", redux.NeverRecycleOption())
+class SinkReducer(redux.Reducer):
+    count = 0
+    expected = 0
+
+    def action_received(self, action: redux.Action):
+        SinkReducer.count += 1
+        if SinkReducer.count == SinkReducer.expected:
+            future = received.pop("bench:sink", None)
+            if future and not future.done():
+                future.set_result(time.perf_counter())
+
+
+async def pooled_throughput(pool_size: int, senders: int, count: int):
+    store = redux.Store([BlobReducer, SinkReducer])
+    server, port = await serve(store)
+    url = f"ws://127.0.0.1:{port}/pool{pool_size}"
+    manager = redux.RemoteManager()
+    manager.add_peer(url, pool_size=pool_size)
+    try:
+        await manager.warm_up(store, [url])
+        medium = (await redux.RemoteMedium.connect(store, url)).unwrap()
+        await store.dispatch("bench:blob:1", redux.Action("BLOB", data="x" * (256 * 1024)))
+        SinkReducer.count = 0
+        SinkReducer.expected = senders * count
+        future = expect("bench:sink")
+        running = True
+        picks = []
+        samples = []
+
+        async def pick():
+            while running:
+                state_opt = await medium.get_state("bench:pick:1", "bench:blob:1")
+                picks.append(not state_opt.is_error)
+
+        async def send(index: int):
+            for _ in range(count):
+                start = time.perf_counter()
+                await medium.send(f"bench:sender:{index}", f"bench:sink:{index}", redux.Action("HIT"))
+                samples.append(time.perf_counter() - start)
+
+        picker = asyncio.ensure_future(pick())
+        with Timer() as timer:
+            await asyncio.gather(*[send(index) for index in range(senders)])
+            await asyncio.wait_for(future, 60)
+        running = False
+        await picker
+        name = f"remote.pool{pool_size}"
+        return [
+            rate(f"{name}.throughput", senders * count, timer.elapsed),
+            rate(f"{name}.pick", sum(picks), timer.elapsed, failed=picks.count(False)),
+        ] + latency(f"{name}.send", samples)
+    finally:
+        manager.client_url.discard(url)
+        await manager.stop_serve(server)
+
+
+@benchmark("peer_pool")
+async def peer_pool(scale: float):
+    '''
+    多个reducer向同一个节点发送action, 同时有一个reducer不断拉取256KB的状态,
+    比较单连接和4条连接的连接池(最后一条专用于状态拉取)下action的吞吐和同时完成的状态拉取数.
+    两端在同一个进程里共享事件循环, 拉取完成得越多action吞吐越低
+    '''
+    senders = 16
+    count = max(20, int(1000 * scale))
+    return await pooled_throughput(1, senders, count) + await pooled_throughput(4, senders, count)
@@ -0,0 +1,301 @@
+from typing import *
+import asyncio
+import tracemalloc
+import redux
+from . import Result, benchmark, rate, latency, Timer
+
+
+async def counter(action: redux.Action, state=None):
+    if action == "INCREASE":
+        state = (state or 0) + 1
+    return state
+
+
+@redux.behavior("bench:counter:", redux.NeverRecycleOption())
+class CounterReducer(redux.Reducer):
+    def __init__(self):
+        super(CounterReducer, self).__init__({"counter": counter})
+
+
+@redux.behavior("bench:idle:", redux.IdleTimeoutRecycleOption(0.5))
+class IdleReducer(redux.Reducer):
+    def __init__(self):
+        super(IdleReducer, self).__init__({"counter": counter})
+
+
+class CountListener(redux.Listener):
+    def __init__(self):
+        super(CountListener, self).__init__()
+        self.count = 0
+
+    async def on_changed(self, changed_key: List[str], state: Dict[str, Any]):
+        self.count += 1
+
+
+@benchmark("dispatch")
+async def dispatch_throughput(scale: float):
+    count = max(1000, int(200000 * scale))
+    store = redux.Store([CounterReducer])
+    await store.dispatch("bench:counter:1", redux.Action("INCREASE"))
+    action = redux.Action("INCREASE")
+    with Timer() as timer:
+        for _ in range(count):
+            await store.dispatch("bench:counter:1", action)
+    assert store["bench:counter:1"]["counter"] == count + 1
+    return rate("dispatch.single_key", count, timer.elapsed)
+
+
+def sync_counter(action: redux.Action, state=None):
+    if action == "INCREASE":
+        state = (state or 0) + 1
+    return state
+
+
+@redux.behavior("bench:sync:", redux.NeverRecycleOption())
+class SyncCounterReducer(redux.Reducer):
+    def __init__(self):
+        super(SyncCounterReducer, self).__init__({"counter": sync_counter})
+
+
+@benchmark("sync_slice")
+async def sync_slice_throughput(scale: float):
+    count = max(1000, int(200000 * scale))
+    results = []
+    for name, reducer_type in (("async", CounterReducer), ("sync", SyncCounterReducer)):
+        store = redux.Store([reducer_type])
+        key = f"{reducer_type.key_prefix}1"
+        await store.dispatch(key, redux.Action("INCREASE"))
+        action = redux.Action("INCREASE")
+        with Timer() as timer:
+            for _ in range(count):
+                await store.dispatch(key, action)
+        results.append(rate(f"dispatch.{name}_slice", count, timer.elapsed))
+    return results
+
+
+@benchmark("cold_key")
+async def cold_key_creation(scale: float):
+    count = max(1000, int(100000 * scale))
+    store = redux.Store([CounterReducer])
+    action = redux.Action("INCREASE")
+    with Timer() as timer:
+        for i in range(count):
+            await store.dispatch(f"bench:counter:{i}", action)
+    return rate("dispatch.cold_key", count, timer.elapsed)
+
+
+@benchmark("fan_out")
+async def fan_out(scale: float):
+    results = []
+    for listener_count in (1, 10, 100):
+        count = max(100, int(20000 * scale))
+        store = redux.Store([CounterReducer])
+        listeners = [CountListener() for _ in range(listener_count)]
+        for listener in listeners:
+            await store.subscribe("bench:counter:1", listener)
+        action = redux.Action("INCREASE")
+        with Timer() as timer:
+            for _ in range(count):
+                await store.dispatch("bench:counter:1", action)
+        assert all(listener.count >= count for listener in listeners)
+        results.append(rate(f"dispatch.fan_out_{listener_count}", count, timer.elapsed, listeners=listener_count))
+    return results
+
+
+@benchmark("idle_recycle")
+async def idle_recycle(scale: float):
+    count = max(1000, int(1000000 * scale))
+    store = redux.Store([IdleReducer], cleaner_period=0.05)
+    action = redux.Action("INCREASE")
+    with Timer() as create_timer:
+        for i in range(count):
+            await store.dispatch(f"bench:idle:{i}", action)
+    await asyncio.sleep(IdleReducer.recycle_option.timeout)
+    with Timer() as recycle_timer:
+        while len(store._reducer_set):
+            await asyncio.sleep(0.01)
+    return [
+        rate("idle.create", count, create_timer.elapsed),
+        rate("idle.recycle", count, recycle_timer.elapsed),
+    ]
+
+
+def score(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+async def inline_score(action: redux.Action, state=None):
+    if action == "SCORE":
+        state = score(action.arguments["n"])
+    return state
+
+
+@redux.cpu_bound
+def offload_score(action: redux.Action, state=None):
+    if action == "SCORE":
+        state = score(action.arguments["n"])
+    return state
+
+
+@redux.behavior("bench:inline:", redux.NeverRecycleOption())
+class InlineScoreReducer(redux.Reducer):
+    def __init__(self):
+        super(InlineScoreReducer, self).__init__({"score": inline_score})
+
+
+@redux.behavior("bench:offload:", redux.NeverRecycleOption())
+class OffloadScoreReducer(redux.Reducer):
+    def __init__(self):
+        super(OffloadScoreReducer, self).__init__({"score": offload_score})
+
+
+@benchmark("loop_lag")
+async def loop_lag(scale: float):
+    """
+    计算密集的slice在事件循环上执行和交给进程池执行时, 一个1ms周期的心跳任务观察到的延迟
+    """
+    count = max(20, int(400 * scale))
+    results = []
+    for prefix, reducer_type in (("inline", InlineScoreReducer), ("offload", OffloadScoreReducer)):
+        store = redux.Store([reducer_type])
+        await store.dispatch(f"bench:{prefix}:0", redux.Action("SCORE", n=1))
+        samples = []
+        running = True
+
+        async def heartbeat():
+            loop = asyncio.get_event_loop()
+            while running:
+                start = loop.time()
+                await asyncio.sleep(0.001)
+                samples.append(max(0.0, loop.time() - start - 0.001))
+
+        task = asyncio.ensure_future(heartbeat())
+        with Timer() as timer:
+            await asyncio.gather(*[
+                store.dispatch(f"bench:{prefix}:{i % 8}", redux.Action("SCORE", n=200000))
+                for i in range(count)
+            ])
+        running = False
+        await task
+        store.shutdown_process_pool()
+        results.extend(latency(f"loop_lag.{prefix}", samples))
+        results.append(rate(f"loop_lag.{prefix}.throughput", count, timer.elapsed))
+    return results
+
+
+@redux.behavior("bench:columnar:", redux.NeverRecycleOption())
+class CounterColumns(redux.ColumnarReducer):
+    fields = {"counter": "i8"}
+    initial_capacity = 65536
+
+    @redux.vectorized("INCREASE")
+    def increase(columns, rows, arguments):
+        columns["counter"][rows] += 1
+
+
+@benchmark("columnar")
+async def columnar_fan_in(scale: float):
+    """
+    同一轮事件循环中发往大量不同key的action, 普通reducer和列式reducer的吞吐
+    """
+    try:
+        import numpy
+    except ImportError:
+        return []
+    count = max(1000, int(100000 * scale))
+    results = []
+    for name, reducer_type in (("reducer", CounterReducer), ("columnar", CounterColumns)):
+        store = redux.Store([reducer_type])
+        action = redux.Action("INCREASE")
+        keys = [f"{reducer_type.key_prefix}{i}" for i in range(count)]
+        tracemalloc.start()
+        await asyncio.gather(*[store.dispatch(key, action) for key in keys])
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        with Timer() as timer:
+            await asyncio.gather(*[store.dispatch(key, action) for key in keys])
+        results.append(rate(f"dispatch.many_keys_{name}", count, timer.elapsed))
+        results.append(Result(f"memory.{name}_per_key", retained / count, "B", False, count=count))
+        family = store.find_family_by_key(keys[0])
+        if family is not None:
+            results.append(Result(f"memory.{name}_family_per_key", family.memory_size() / count, "B", False, count=count))
+    return results
+
+
+async def yielding_counter(action: redux.Action, state=None):
+    if action == "INCREASE":
+        await asyncio.sleep(0)
+        state = (state or 0) + 1
+    return state
+
+
+@redux.behavior("bench:lane:", redux.NeverRecycleOption())
+class LaneReducer(redux.Reducer):
+    def __init__(self):
+        super(LaneReducer, self).__init__({"counter": yielding_counter})
+
+
+@benchmark("priority")
+async def priority_lanes(scale: float):
+    """
+    一个key上积压大量bulk action时, 穿插进来的交互action从dispatch到完成的延迟
+    """
+    backlog = max(200, int(20000 * scale))
+    results = []
+    for name, priority in (("same_lane", redux.PRIORITY_BULK), ("control_lane", redux.PRIORITY_CONTROL)):
+        store = redux.Store([LaneReducer])
+        bulk = []
+        for _ in range(backlog):
+            action = redux.Action("INCREASE")
+            action.priority = redux.PRIORITY_BULK
+            bulk.append(asyncio.ensure_future(store.dispatch("bench:lane:1", action)))
+        await asyncio.sleep(0)
+        samples = []
+
+        async def interactive():
+            action = redux.Action("INCREASE")
+            action.priority = priority
+            with Timer() as timer:
+                await store.dispatch("bench:lane:1", action)
+            samples.append(timer.elapsed)
+
+        probes = []
+        for _ in range(max(20, backlog // 100)):
+            probes.append(asyncio.ensure_future(interactive()))
+            await asyncio.sleep(0.001)
+        await asyncio.gather(*bulk, *probes)
+        results.extend(latency(f"priority.{name}", samples, backlog=backlog))
+    return results
+
+
+@benchmark("fairness")
+async def hot_key_fairness(scale: float):
+    """
+    热点key积压时, 冷key上一个action从投递到处理完成的延迟: 每个action一个任务 vs store.post的mailbox调度
+    """
+    backlog = max(1000, int(100000 * scale))
+    results = []
+    for name in ("ensure_future", "post"):
+        store = redux.Store([CounterReducer], mailbox_size=None)
+        action = redux.Action("INCREASE")
+        await store.dispatch("bench:counter:cold", action)
+        for _ in range(backlog):
+            if name == "post":
+                store.post("bench:counter:hot", action)
+            else:
+                asyncio.ensure_future(store.dispatch("bench:counter:hot", action))
+        samples = []
+        for _ in range(20):
+            before = store["bench:counter:cold"]["counter"]
+            with Timer() as timer:
+                if name == "post":
+                    store.post("bench:counter:cold", action)
+                else:
+                    asyncio.ensure_future(store.dispatch("bench:counter:cold", action))
+                while store["bench:counter:cold"]["counter"] == before:
+                    await asyncio.sleep(0)
+            samples.append(timer.elapsed)
+        while store["bench:counter:hot"]["counter"] < backlog:
+            await asyncio.sleep(0.001)
+        results.extend(latency(f"fairness.{name}", samples, backlog=backlog))
+    return results
@@ -0,0 +1,123 @@
+from typing import *
+import asyncio
+import tracemalloc
+import pytest
+import redux
+from redux.columnar import ColumnarFamily
+
+numpy = pytest.importorskip("numpy")
+
+# 每个key在列和索引(rows, keys, 行号)里占用的字节数上限, 不含key字符串本身
+KEY_FOOTPRINT_BYTES = 128
+
+
+@redux.behavior("columnar:user:")
+class EquityColumns(redux.ColumnarReducer):
+    fields = {"equity": "f8", "trades": "i4"}
+    defaults = {"equity": 10.0}
+    initial_capacity = 4
+
+    @classmethod
+    def initialize(cls, key: str):
+        if key == "columnar:user:alice":
+            return {"equity": 100.0}
+        return None
+
+    @redux.vectorized("INCREASE_EQUITY")
+    def increase(columns, rows, arguments):
+        columns["equity"][rows] += arguments["change"]
+        columns["trades"][rows] += 1
+
+
+@redux.behavior("columnar:broken:")
+class BrokenColumns(redux.ColumnarReducer):
+    fields = {"equity": "f8"}
+
+    @redux.vectorized("INCREASE_EQUITY")
+    def increase(columns, rows, arguments):
+        columns["equity"][rows] += arguments["change"]
+
+    @redux.vectorized("BREAK")
+    def broken(columns, rows, arguments):
+        columns["equity"][rows] = -1
+        raise ValueError("broken handler")
+
+
+class EquityListener(redux.Listener):
+    def __init__(self):
+        super(EquityListener, self).__init__()
+        self.calls = []
+
+    async def on_changed(self, changed_key: List[str], state: Dict[str, Any]):
+        self.calls.append((sorted(changed_key), state))
+
+
+async def columnar():
+    store = redux.Store([EquityColumns])
+    listener = EquityListener()
+    await store.subscribe("columnar:user:alice", listener)
+    await asyncio.gather(*[
+        store.dispatch("columnar:user:{}".format(i), redux.Action("INCREASE_EQUITY", change=i))
+        for i in range(10)
+    ])
+    assert "columnar:user:3" in store
+    assert store["columnar:user:3"] == dict(equity=13.0, trades=1)
+    await asyncio.gather(
+        store.dispatch("columnar:user:alice", redux.Action("INCREASE_EQUITY", change=-10)),
+        store.dispatch("columnar:user:alice", redux.Action("INCREASE_EQUITY", change=-20)),
+    )
+    assert store["columnar:user:alice"] == dict(equity=70.0, trades=2)
+    assert listener.calls == [
+        (["equity", "trades"], dict(equity=100.0, trades=0)),
+        (["equity", "trades"], dict(equity=70.0, trades=2)),
+    ]
+    assert await store.dispatch("columnar:user:bob", redux.Action("INCREASE_EQUITY", soft=True, change=1))
+    assert "columnar:user:bob" not in store
+    assert not store._reducer_set
+    family = store.find_family_by_key("columnar:user:1")
+    assert len(family) == 11
+    assert family.row_size() == 12
+    store.pop_reducer_by_key("columnar:user:1")
+    assert "columnar:user:1" not in store
+    await store.dispatch("columnar:user:new", redux.Action("INCREASE_EQUITY", change=1))
+    assert family.rows["columnar:user:new"] == 2
+    assert store["columnar:user:new"] == dict(equity=11.0, trades=1)
+
+
+async def failed_segment():
+    store = redux.Store([BrokenColumns])
+    listener = EquityListener()
+    await store.subscribe("columnar:broken:a", listener)
+    results = await asyncio.gather(
+        store.dispatch("columnar:broken:a", redux.Action("INCREASE_EQUITY", change=1)),
+        store.dispatch("columnar:broken:b", redux.Action("INCREASE_EQUITY", change=2, note="extra")),
+        store.dispatch("columnar:broken:c", redux.Action("INCREASE_EQUITY")),
+        store.dispatch("columnar:broken:b", redux.Action("BREAK")),
+        store.dispatch("columnar:broken:c", redux.Action("INCREASE_EQUITY", change=3)),
+    )
+    assert results == [True, True, False, False, True]
+    assert store["columnar:broken:a"] == dict(equity=1.0)
+    assert store["columnar:broken:b"] == dict(equity=2.0)
+    assert store["columnar:broken:c"] == dict(equity=3.0)
+    assert listener.calls[-1] == (["equity"], dict(equity=1.0))
+
+
+def test_failed_segment():
+    asyncio.get_event_loop().run_until_complete(failed_segment())
+
+
+def test_columnar():
+    asyncio.get_event_loop().run_until_complete(columnar())
+
+
+def test_key_footprint():
+    family = ColumnarFamily(None, EquityColumns)
+    keys = ["columnar:user:{}".format(i) for i in range(20000)]
+    tracemalloc.start()
+    for key in keys:
+        family.create(key)
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert retained / len(keys) < KEY_FOOTPRINT_BYTES
+    assert family.memory_size() / len(keys) < KEY_FOOTPRINT_BYTES
+    assert abs(family.memory_size() - retained) < retained * 0.1
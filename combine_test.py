@@ -1,6 +1,7 @@
 import asyncio
 import pytest
 import redux
+from redux.timer import TimerQueue
 
 
 timeout_future = asyncio.Future()
@@ -20,6 +21,32 @@ class CombineReducer(redux.Reducer):
             print(action)
 
 
+@redux.behavior("combine:many:", redux.NeverRecycleOption())
+class ManyCombineReducer(redux.Reducer):
+    finished = 0
+    failed = 0
+
+    async def action_received(self, action: redux.Action):
+        if action == "START":
+            for i in range(action.arguments["count"]):
+                self.combine_message([f"A{i}", "B"], redux.Action("FINISH"), redux.Action("ERROR"), 0.1)
+        elif action == "FINISH":
+            ManyCombineReducer.finished += 1
+        elif action == "ERROR":
+            ManyCombineReducer.failed += 1
+
+
+@redux.behavior("combine:recycled:", redux.NeverRecycleOption())
+class RecycledCombineReducer(redux.Reducer):
+    failed = 0
+
+    async def action_received(self, action: redux.Action):
+        if action == "START":
+            self.combine_message(["A"], redux.Action("FINISH"), redux.Action("ERROR"), 0.05)
+        elif action == "ERROR":
+            RecycledCombineReducer.failed += 1
+
+
 @pytest.fixture(scope="session", autouse=True)
 def setup_environment():
     redux.RemoteManager().RECONNECT_TIMEOUT = 0.1
@@ -37,9 +64,64 @@ async def work():
     assert combine_future.done()
 
 
+async def many():
+    store = redux.Store([ManyCombineReducer])
+    await store.dispatch("combine:many:1", redux.Action("START", count=1000))
+    reducer = (await store.get_or_create_cell("combine:many:1")).unwrap()
+    for i in range(0, 1000, 2):
+        await store.dispatch("combine:many:1", redux.Action(f"A{i}"))
+    for i in range(1000):
+        await store.dispatch("combine:many:1", redux.Action("B"))
+    await asyncio.sleep(0)
+    assert ManyCombineReducer.finished == 500
+    assert len(store.timer) == 500
+    await asyncio.sleep(0.15)
+    assert ManyCombineReducer.failed == 500
+    assert not reducer.combine_index
+    assert len(store.timer) == 0
+
+
+async def recycled():
+    store = redux.Store([RecycledCombineReducer])
+    await store.dispatch("combine:recycled:1", redux.Action("START"))
+    old = (await store.get_or_create_cell("combine:recycled:1")).unwrap()
+    store.pop_reducer_by_key("combine:recycled:1")
+    await asyncio.sleep(0.1)
+    assert RecycledCombineReducer.failed == 0
+    assert "combine:recycled:1" not in store
+    assert not old.enable
+
+
+async def broken_timer():
+    fired = []
+
+    def broken():
+        raise ValueError("broken callback")
+
+    timer = TimerQueue()
+    timer.call_later(0.01, broken)
+    timer.call_later(0.01, lambda: fired.append(1))
+    timer.call_later(0.03, lambda: fired.append(2))
+    await asyncio.sleep(0.05)
+    assert fired == [1, 2]
+    assert len(timer) == 0
+
+
 def test_combine():
     asyncio.get_event_loop().run_until_complete(work())
 
 
+def test_many_combine():
+    asyncio.get_event_loop().run_until_complete(many())
+
+
+def test_recycled_combine():
+    asyncio.get_event_loop().run_until_complete(recycled())
+
+
+def test_broken_timer():
+    asyncio.get_event_loop().run_until_complete(broken_timer())
+
+
 if __name__ == '__main__':
     test_combine()
@@ -0,0 +1,99 @@
+from typing import *
+import zlib
+import types
+import asyncio
+import pytest
+import redux
+from redux.medium.codec import negotiate, supported_codecs, decompress
+from redux.medium.remote import ConnectionDetail
+
+
+@redux.behavior("compress:", redux.NeverRecycleOption())
+class LargeStateReducer(redux.Reducer):
+    def __init__(self):
+        super(LargeStateReducer, self).__init__({"login_list": login_list})
+
+
+def login_list(state=None, action: redux.Action=None):
+    if action == "FILL":
+        state = [dict(user=f"user{index}", online=True) for index in range(action.arguments["count"])]
+    return state
+
+
+def test_negotiate():
+    assert "zlib" in supported_codecs()
+    assert negotiate(["snappy", "zlib"]) == "zlib"
+    assert negotiate(["snappy"]) is None
+    assert negotiate(None) is None
+
+
+def test_decompress_limit():
+    payload = zlib.compress(b"\0" * (16 * 1024 * 1024))
+    assert len(payload) < 32 * 1024
+    with pytest.raises(ValueError):
+        decompress("zlib", payload, 1024 * 1024)
+    assert decompress("zlib", zlib.compress(b"redux"), 5) == b"redux"
+    with pytest.raises(ValueError):
+        decompress("zlib", zlib.compress(b"redux" * 100)[:-4], 1024)
+
+
+async def reject_bomb():
+    store = redux.Store([LargeStateReducer])
+    manager = redux.RemoteManager()
+    detail = ConnectionDetail()
+    detail.socket = types.SimpleNamespace(max_size=1024)
+    message = dict(__t__="ACTION", __k__="compress:bomb", __r__=None, type="FILL", count=1, padding="x" * 4096)
+    binary = detail.dumps(message)
+    packed = dict(__t__="PACKED", __z__="zlib", __b__=zlib.compress(binary))
+    assert not await manager.on_packed(detail, packed, "bomb", store)
+    packed["__o__"] = 100
+    assert not await manager.on_packed(detail, packed, "bomb", store)
+    detail.socket.max_size = None
+    assert manager.decompress_limit(detail) == manager.DECOMPRESS_LIMIT
+    assert await manager.on_packed(detail, packed, "bomb", store)
+
+
+def test_reject_bomb():
+    asyncio.get_event_loop().run_until_complete(reject_bomb())
+
+
+def compressed_count(manager) -> int:
+    return manager.compression.stats().get("zlib", dict()).get("compressed", 0)
+
+
+async def pick_large_state():
+    store = redux.Store([LargeStateReducer])
+    manager = redux.RemoteManager()
+    server = (await manager.serve("127.0.0.1", 0, store)).unwrap()
+    url = "ws://127.0.0.1:{}".format(server.sockets[0].getsockname()[1])
+    manager.add_peer(url)
+    threshold = manager.COMPRESS_EXECUTOR_THRESHOLD
+    try:
+        medium = (await redux.RemoteMedium.connect(store, url)).unwrap()
+        await asyncio.sleep(0.05)
+        assert manager.peer_state(url)["codec"] == "zlib"
+        await store.dispatch("compress:small", redux.Action("FILL", count=3))
+        await store.dispatch("compress:large", redux.Action("FILL", count=5000))
+        before = compressed_count(manager)
+        state = (await medium.get_state("compress:src", "compress:small")).unwrap()
+        assert len(state["login_list"]) == 3
+        assert compressed_count(manager) == before
+        state = (await medium.get_state("compress:src", "compress:large")).unwrap()
+        assert state == store["compress:large"]
+        assert compressed_count(manager) == before + 1
+        manager.COMPRESS_EXECUTOR_THRESHOLD = 0
+        state = (await medium.get_state("compress:src", "compress:large")).unwrap()
+        assert len(state["login_list"]) == 5000
+        stats = manager.compression.stats()["zlib"]
+        assert stats["offloaded"] >= 1
+        assert stats["decompress_offloaded"] >= 1
+        assert stats["decompressed"] >= 2
+        assert stats["ratio"] < 0.5
+    finally:
+        manager.COMPRESS_EXECUTOR_THRESHOLD = threshold
+        manager.client_url.discard(url)
+        await manager.stop_serve(server)
+
+
+def test_pick_large_state():
+    asyncio.get_event_loop().run_until_complete(pick_large_state())
@@ -0,0 +1,224 @@
+from typing import *
+import time
+import asyncio
+import redux
+
+
+@redux.behavior("bounce:")
+class BounceReducer(redux.Reducer):
+    received = 0
+
+    async def action_received(self, action: redux.Action):
+        if action == "BOUNCE":
+            BounceReducer.received += 1
+            other = "bounce:b" if self.key == "bounce:a" else "bounce:a"
+            await self.send(redux.LocalMedium(self.store), other, redux.Action("BOUNCE"))
+
+
+@redux.behavior("flaky:")
+class FlakyReducer(redux.Reducer):
+    failures = 1
+    received = 0
+
+    async def action_received(self, action: redux.Action):
+        if FlakyReducer.failures:
+            FlakyReducer.failures -= 1
+            raise RuntimeError("temporary failure")
+        FlakyReducer.received += 1
+
+
+@redux.behavior("relay:")
+class RelayReducer(redux.Reducer):
+    outgoing = None
+    received = []
+
+    async def action_received(self, action: redux.Action):
+        if action == "RELAY":
+            await self.send(redux.LocalMedium(self.store), "relay:sink", RelayReducer.outgoing)
+        elif action == "PONG":
+            RelayReducer.received.append(action)
+
+
+async def hop_limit():
+    BounceReducer.received = 0
+    store = redux.Store([BounceReducer], max_hops=8)
+    await store.dispatch("bounce:a", redux.Action("BOUNCE"))
+    await asyncio.sleep(0.05)
+    assert BounceReducer.received == 9
+    assert store.stats()["dropped"] == dict(hop_limit=1)
+
+
+async def loop_detection():
+    BounceReducer.received = 0
+    store = redux.Store([BounceReducer], track_path=True)
+    await store.dispatch("bounce:a", redux.Action("BOUNCE"))
+    await asyncio.sleep(0.05)
+    assert BounceReducer.received == 2
+    assert store.stats()["dropped"] == dict(loop=1)
+
+
+async def repeated_path():
+    BounceReducer.received = 0
+    store = redux.Store([BounceReducer], max_hops=0, track_path=True)
+    action = redux.Action("BOUNCE")
+    assert await store.dispatch("bounce:a", action)
+    assert await store.dispatch("bounce:a", action)
+    assert action.path is None
+    await asyncio.sleep(0.05)
+    assert BounceReducer.received == 2
+    assert "loop" not in store.stats()["dropped"]
+
+
+async def resend_envelope():
+    RelayReducer.outgoing = redux.Action("PONG")
+    RelayReducer.received = []
+    store = redux.Store([RelayReducer], default_ttl=60, track_path=True, tracer=redux.Tracer())
+    request = redux.Action("RELAY")
+    assert await store.dispatch("relay:a", request)
+    assert await store.dispatch("relay:b", request)
+    await asyncio.sleep(0.05)
+    for action in (request, RelayReducer.outgoing):
+        assert action.trace is None
+        assert action.hops == 0
+        assert action.deadline is None
+        assert action.path is None
+    first, second = RelayReducer.received
+    assert first.hops == second.hops == 1
+    assert len(first.path) == len(second.path) == 2
+    assert first.trace.trace_id != second.trace.trace_id
+    assert "loop" not in store.stats()["dropped"]
+
+
+async def deadline():
+    BounceReducer.received = 0
+    store = redux.Store([BounceReducer])
+    action = redux.Action("BOUNCE")
+    action.set_ttl(-1)
+    assert not await store.dispatch("bounce:a", action)
+    assert BounceReducer.received == 0
+    assert "bounce:a" not in store
+    assert store.stats()["dropped"] == dict(deadline=1)
+
+
+async def dedupe():
+    BounceReducer.received = 0
+    store = redux.Store([BounceReducer], max_hops=0, dedupe_window=redux.DedupeWindow(capacity=10))
+    action = redux.Action("BOUNCE")
+    action.ensure_id()
+    assert await store.dispatch("bounce:a", action)
+    duplicate = redux.Action("BOUNCE")
+    duplicate.id = action.id
+    assert not await store.dispatch("bounce:a", duplicate)
+    assert await store.dispatch("bounce:b", duplicate)
+    assert BounceReducer.received == 2
+    stats = store.stats()
+    assert stats["dropped"]["duplicate"] == 1
+    assert stats["dedupe"]["entries"] == 2
+    assert stats["dedupe"]["bytes"] > 0
+
+
+async def dedupe_retry():
+    store = redux.Store([FlakyReducer], dedupe_window=redux.DedupeWindow(capacity=10))
+    action = redux.Action("WORK")
+    action.ensure_id()
+    assert not await store.dispatch("flaky:1", action)
+    assert ("flaky:1", action.id) not in store.dedupe_window
+    assert await store.dispatch("flaky:1", action)
+    assert not await store.dispatch("flaky:1", action)
+    assert FlakyReducer.received == 1
+    assert store.stats()["dropped"] == dict(duplicate=1)
+
+
+def test_hop_limit():
+    asyncio.get_event_loop().run_until_complete(hop_limit())
+
+
+def test_loop_detection():
+    asyncio.get_event_loop().run_until_complete(loop_detection())
+
+
+def test_repeated_path():
+    asyncio.get_event_loop().run_until_complete(repeated_path())
+
+
+def test_resend_envelope():
+    asyncio.get_event_loop().run_until_complete(resend_envelope())
+
+
+def test_deadline():
+    asyncio.get_event_loop().run_until_complete(deadline())
+
+
+def test_dedupe():
+    asyncio.get_event_loop().run_until_complete(dedupe())
+
+
+def test_dedupe_retry():
+    asyncio.get_event_loop().run_until_complete(dedupe_retry())
+
+
+def test_dedupe_window_memory():
+    window = redux.DedupeWindow(capacity=100, ttl=3600)
+    for index in range(100):
+        window.seen(index)
+    full = window.memory_size()
+    for index in range(100, 10000):
+        assert not window.seen(index)
+    assert len(window) == 100
+    assert window._wheel_count <= 200
+    assert window.memory_size() < full * 2
+    window.discard(9999)
+    assert 9999 not in window and not window.seen(9999)
+    window.clear()
+    assert window.memory_size() < full
+
+
+def test_dedupe_window_bounds():
+    window = redux.DedupeWindow(capacity=2, ttl=0.05, resolution=0.01)
+    assert not window.seen("a")
+    assert not window.seen("b")
+    assert window.seen("a")
+    assert not window.seen("c")
+    assert "b" not in window
+    assert len(window) == 2
+    time.sleep(0.08)
+    assert not window.seen("d")
+    assert len(window) == 1
+
+
+def test_envelope_fields():
+    action = redux.Action("hello")
+    action.hops = 2
+    action.deadline = 1234.5
+    action.path = [1, 2]
+    action.ensure_id()
+    message = redux.LocalMedium.to_message("a", "b", action).unwrap()
+    _, received = redux.LocalMedium.from_message(None, message).unwrap()
+    assert received.hops == 3
+    assert received.deadline == 1234.5
+    assert received.path == [1, 2]
+    assert received.id == action.id
+    assert received.arguments == dict()
+
+
+def test_local_hop_matches_message():
+    payload = list(range(8))
+    action = redux.Action("hello", payload=payload, __hidden=1)
+    action.hops = 2
+    action.deadline = 1234.5
+    action.path = [1, 2]
+    action.priority = redux.PRIORITY_BULK
+    action.trace = redux.TraceContext("trace", "span")
+    action.ensure_id()
+    message = redux.LocalMedium.to_message("a", "b", action).unwrap()
+    _, expected = redux.LocalMedium.from_message(None, message).unwrap()
+    received = action.hop("a", None)
+    for field in ["type", "arguments", "source_key", "id", "reply_to", "hops", "deadline", "path", "priority"]:
+        assert getattr(received, field) == getattr(expected, field)
+    assert received.trace.to_list() == action.trace.to_list()
+    assert received.trace is not action.trace
+    assert received.trace.received_time is not None
+    received.arguments["payload"] = None
+    received.arguments["extra"] = 1
+    assert action.arguments == dict(payload=payload, __hidden=1)
+    assert received.arguments is not action.arguments
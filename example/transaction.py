@@ -21,6 +21,7 @@ ExecutorReducer 不一定要激活 GeneralReducer 使其存在(例如被转账
 以及可能不必要的开销, 比如系统会对没有登录过的 Bob 创建了用户对应的 GeneralReducer 和 InternalEntryReducer 节点,
 所以 ExecutorReducer 节点向 GeneralReducer 节点发送弱 Action, 不要求 GeneralReducer 节点存在并处理 Action,
 同理 GeneralReducer 节点也向 InternalEntryReducer 节点发送弱 Action
+TransactionNode 通过 pool_size 在同一个 key 下创建多个实例, 并按转出用户分区, 不同用户的转账可以并发处理
 
 这个示例的 Reducer 连接结构如下:
 
@@ -90,7 +91,7 @@ class UserService(redux.InternalEntryReducer):
                 await self.response(action, session.medium, session.source_key)
 
 
-@redux.behavior("node:transfer", redux.NeverRecycleOption())
+@redux.behavior("node:transfer", redux.NeverRecycleOption(), pool_size=4, partition="from")
 class TransactionNode(redux.ExecutorReducer):
     async def action_received(self, action: redux.Action):
         if action == "TRANSFER":
@@ -0,0 +1,109 @@
+from typing import *
+import time
+import asyncio
+import msgpack
+import websockets
+import redux
+
+
+@redux.behavior("heartbeat:", redux.NeverRecycleOption())
+class HeartbeatReducer(redux.Reducer):
+    pass
+
+
+legacy_connections = []
+
+
+async def legacy_peer(websocket, path):
+    '''
+    不认识PING的旧版本节点, 只读取不回复
+    '''
+    legacy_connections.append(websocket)
+    async for _ in websocket:
+        pass
+
+
+async def silent_peer(websocket, path):
+    '''
+    回复第一个PING之后就失联的节点
+    '''
+    async for binary in websocket:
+        info = msgpack.loads(binary, encoding="utf8")
+        if info.get("__t__") == "PING":
+            await websocket.send(msgpack.dumps(dict(__t__="PONG", __n__=info["__n__"])))
+            break
+    await asyncio.sleep(5)
+
+
+async def rtt():
+    store = redux.Store([HeartbeatReducer])
+    manager = redux.RemoteManager()
+    server = (await manager.serve("127.0.0.1", 0, store)).unwrap()
+    url = "ws://127.0.0.1:{}".format(server.sockets[0].getsockname()[1])
+    manager.add_peer(url)
+    interval = manager.HEARTBEAT_INTERVAL
+    manager.HEARTBEAT_INTERVAL = 0.02
+    try:
+        await redux.RemoteMedium.connect(store, url)
+        assert manager.rtt(url) is None
+        await asyncio.sleep(0.1)
+        assert 0 < manager.rtt(url) < 0.05
+        assert manager.peer_state(url)["rtt"] == manager.rtt(url)
+        assert manager.peer_state(url)["connected"] == 1
+    finally:
+        manager.HEARTBEAT_INTERVAL = interval
+        manager.client_url.discard(url)
+        await manager.stop_serve(server)
+
+
+async def dead_peer():
+    store = redux.Store([HeartbeatReducer])
+    manager = redux.RemoteManager()
+    server = await websockets.serve(silent_peer, "127.0.0.1", 0)
+    url = "ws://127.0.0.1:{}".format(server.sockets[0].getsockname()[1])
+    manager.add_peer(url)
+    interval, timeout = manager.HEARTBEAT_INTERVAL, manager.PICK_TIMEOUT
+    manager.HEARTBEAT_INTERVAL = 0.02
+    manager.PICK_TIMEOUT = 5.0
+    try:
+        medium = (await redux.RemoteMedium.connect(store, url)).unwrap()
+        start = time.monotonic()
+        state_opt = await medium.get_state("heartbeat:1", "heartbeat:2")
+        assert isinstance(state_opt.error, ConnectionError)
+        assert time.monotonic() - start < 1.0
+    finally:
+        manager.HEARTBEAT_INTERVAL, manager.PICK_TIMEOUT = interval, timeout
+        manager.client_url.discard(url)
+        server.close()
+
+
+async def legacy():
+    store = redux.Store([HeartbeatReducer])
+    manager = redux.RemoteManager()
+    server = await websockets.serve(legacy_peer, "127.0.0.1", 0)
+    url = "ws://127.0.0.1:{}".format(server.sockets[0].getsockname()[1])
+    manager.add_peer(url)
+    interval = manager.HEARTBEAT_INTERVAL
+    manager.HEARTBEAT_INTERVAL = 0.02
+    try:
+        await redux.RemoteMedium.connect(store, url)
+        await asyncio.sleep(0.02 * manager.HEARTBEAT_MISSES * 4)
+        assert manager.peer_state(url)["connected"] == 1
+        assert len(legacy_connections) == 1 and legacy_connections[0].open
+        assert manager.rtt(url) is None
+    finally:
+        manager.HEARTBEAT_INTERVAL = interval
+        manager.client_url.discard(url)
+        server.close()
+
+
+def test_legacy_peer():
+    asyncio.get_event_loop().run_until_complete(legacy())
+
+
+def test_rtt():
+    asyncio.get_event_loop().run_until_complete(rtt())
+
+
+def test_dead_peer():
+    asyncio.get_event_loop().run_until_complete(dead_peer())
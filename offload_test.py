@@ -0,0 +1,52 @@
+from typing import *
+import os
+import asyncio
+import redux
+
+
+@redux.cpu_bound
+def risk(action: redux.Action, state=None):
+    if action == "SCORE":
+        state = dict(score=sum(i * i for i in range(action.arguments["n"])), pid=os.getpid())
+    return state
+
+
+async def total(action: redux.Action, state=None):
+    if action == "SCORE":
+        state = (state or 0) + action.arguments["n"]
+    return state
+
+
+@redux.behavior("offload:slice:")
+class SliceReducer(redux.Reducer):
+    def __init__(self):
+        super(SliceReducer, self).__init__({"risk": risk, "total": total})
+
+
+@redux.behavior("offload:reducer:")
+class CpuReducer(redux.Reducer):
+    cpu_bound = True
+
+    def __init__(self):
+        super(CpuReducer, self).__init__({"total": total})
+
+
+async def offload():
+    store = redux.Store([SliceReducer, CpuReducer], process_workers=2)
+    try:
+        for n in range(1, 6):
+            await store.dispatch("offload:slice:1", redux.Action("SCORE", n=n))
+        state = store["offload:slice:1"]
+        assert state["risk"]["score"] == 30
+        assert state["risk"]["pid"] != os.getpid()
+        assert state["total"] == 15
+        await asyncio.gather(*[store.dispatch("offload:reducer:1", redux.Action("SCORE", n=n)) for n in range(100)])
+        assert store["offload:reducer:1"]["total"] == 4950
+        reducer = (await store.get_or_create_cell("offload:reducer:1")).unwrap()
+        assert not await reducer.reduce(redux.Action("OTHER"))
+    finally:
+        store.shutdown_process_pool()
+
+
+def test_offload():
+    asyncio.get_event_loop().run_until_complete(offload())
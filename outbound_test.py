@@ -0,0 +1,161 @@
+from typing import *
+import asyncio
+import redux
+from redux.medium.outbound import OutboundBuffer
+
+
+@redux.behavior("outbound:", redux.NeverRecycleOption())
+class SequenceReducer(redux.Reducer):
+    received = []
+
+    def action_received(self, action: redux.Action):
+        SequenceReducer.received.append(action.arguments["n"])
+
+
+def test_outbound_buffer():
+    buffer = OutboundBuffer(max_count=3, max_bytes=10, max_age=10.0)
+    assert buffer.push(b"aaaa")
+    assert buffer.push(b"bbbb")
+    assert not buffer.push(b"cccc")
+    assert buffer.push(b"cc")
+    assert not buffer.push(b"d")
+    assert buffer.stats()["dropped"] == 2
+    items = buffer.drain()
+    assert items == [b"aaaa", b"bbbb", b"cc"]
+    assert not buffer
+    buffer.push(b"e")
+    buffer.requeue(items)
+    assert buffer.drain() == [b"aaaa", b"bbbb", b"cc", b"e"]
+    buffer.max_age = 0.0
+    buffer.push(b"f")
+    buffer.expire(buffer.oldest_age() + 1e9)
+    assert buffer.stats()["expired"] == 1
+
+
+def test_reconnect_delay():
+    manager = redux.RemoteManager()
+    delays = [manager.reconnect_delay(attempt) for attempt in range(1, 20)]
+    for attempt, delay in enumerate(delays, 1):
+        ceiling = min(manager.RECONNECT_MAX, manager.RECONNECT_TIMEOUT * 2 ** (attempt - 1))
+        assert ceiling / 2 <= delay <= ceiling
+    assert max(delays) <= manager.RECONNECT_MAX
+
+
+async def replay():
+    SequenceReducer.received = []
+    store = redux.Store([SequenceReducer])
+    manager = redux.RemoteManager()
+    server = (await manager.serve("127.0.0.1", 0, store)).unwrap()
+    port = server.sockets[0].getsockname()[1]
+    url = f"ws://127.0.0.1:{port}"
+    manager.add_peer(url)
+    try:
+        medium = (await redux.RemoteMedium.connect(store, url)).unwrap()
+        assert not (await medium.send("outbound:src", "outbound:1", redux.Action("SEQ", n=0))).is_error
+        server.close()
+        await server.wait_closed()
+        await asyncio.sleep(0.05)
+        assert manager.peer_state(url)["connected"] == 0
+        for n in range(1, 6):
+            assert not (await medium.send("outbound:src", "outbound:1", redux.Action("SEQ", n=n))).is_error
+        state = manager.peer_state(url)
+        assert state["outbound"]["count"] == 5
+        assert state["reconnect_attempts"] >= 1
+        server = (await manager.serve("127.0.0.1", port, store)).unwrap()
+        for _ in range(100):
+            if manager.peer_state(url)["connected"]:
+                break
+            await asyncio.sleep(0.05)
+        assert not (await medium.send("outbound:src", "outbound:1", redux.Action("SEQ", n=6))).is_error
+        await asyncio.sleep(0.05)
+        assert SequenceReducer.received == list(range(7))
+        state = manager.peer_state(url)
+        assert state["outbound"]["count"] == 0
+        assert state["reconnect_attempts"] == 0
+    finally:
+        manager.client_url.discard(url)
+        await manager.stop_serve(server)
+
+
+class BrokenSocket:
+    async def send(self, data):
+        raise ConnectionError()
+
+
+async def wait_connected(manager, url):
+    for _ in range(100):
+        if manager.peer_state(url)["connected"] == manager.peer_state(url)["connections"]:
+            return
+        await asyncio.sleep(0.05)
+
+
+async def send_during_flush():
+    SequenceReducer.received = []
+    store = redux.Store([SequenceReducer])
+    manager = redux.RemoteManager()
+    server = (await manager.serve("127.0.0.1", 0, store)).unwrap()
+    port = server.sockets[0].getsockname()[1]
+    url = f"ws://127.0.0.1:{port}"
+    manager.add_peer(url)
+    send_data = manager.send_data
+    flushing = asyncio.get_event_loop().create_future()
+
+    async def slow_send_data(websocket, data):
+        if b"BATCH" in data[:16] and not flushing.done():
+            flushing.set_result(True)
+            await asyncio.sleep(0.05)
+        return await send_data(websocket, data)
+    try:
+        medium = (await redux.RemoteMedium.connect(store, url)).unwrap()
+        server.close()
+        await server.wait_closed()
+        await asyncio.sleep(0.05)
+        assert not (await medium.send("outbound:src", "outbound:1", redux.Action("SEQ", n=0))).is_error
+        manager.send_data = slow_send_data
+        server = (await manager.serve("127.0.0.1", port, store)).unwrap()
+        await flushing
+        assert not (await medium.send("outbound:src", "outbound:1", redux.Action("SEQ", n=1))).is_error
+        await wait_connected(manager, url)
+        for n in range(2, 7):
+            assert not (await medium.send("outbound:src", "outbound:1", redux.Action("SEQ", n=n))).is_error
+        await asyncio.sleep(0.05)
+        assert SequenceReducer.received == list(range(7))
+        assert manager.peer_state(url)["outbound"]["count"] == 0
+    finally:
+        del manager.send_data
+        manager.client_url.discard(url)
+        await manager.stop_serve(server)
+
+
+async def broken_member():
+    SequenceReducer.received = []
+    store = redux.Store([SequenceReducer])
+    manager = redux.RemoteManager()
+    server = (await manager.serve("127.0.0.1", 0, store)).unwrap()
+    url = "ws://127.0.0.1:{}".format(server.sockets[0].getsockname()[1])
+    manager.add_peer(url, pool_size=2)
+    try:
+        medium = (await redux.RemoteMedium.connect(store, url)).unwrap()
+        detail = manager.client_pools[url].details[0]
+        socket, detail.socket = detail.socket, BrokenSocket()
+        for n in range(5):
+            assert not (await medium.send("outbound:src", "outbound:1", redux.Action("SEQ", n=n))).is_error
+        detail.socket = socket
+        await asyncio.sleep(0.05)
+        assert SequenceReducer.received == list(range(5))
+        assert manager.peer_state(url)["outbound"]["count"] == 0
+    finally:
+        manager.client_url.discard(url)
+        await manager.stop_serve(server)
+
+
+def test_send_during_flush():
+    asyncio.get_event_loop().run_until_complete(send_during_flush())
+
+
+def test_broken_member():
+    asyncio.get_event_loop().run_until_complete(broken_member())
+
+
+def test_replay():
+    asyncio.get_event_loop().run_until_complete(replay())
@@ -0,0 +1,104 @@
+from typing import *
+import asyncio
+import redux
+from redux.medium.remote import PeerPool, ConnectionDetail
+
+
+BLOB_SIZE = 128 * 1024
+
+
+@redux.behavior("peer:", redux.NeverRecycleOption())
+class PeerReducer(redux.Reducer):
+    received = []
+
+    def __init__(self):
+        super(PeerReducer, self).__init__({"blob": blob})
+
+    def action_received(self, action: redux.Action):
+        PeerReducer.received.append((self.key, action.type, action.arguments.get("n")))
+
+
+def blob(state=None, action: redux.Action=None):
+    if action == "BLOB":
+        state = action.arguments["data"]
+    return state
+
+
+def test_select():
+    details = []
+    for _ in range(3):
+        detail = ConnectionDetail()
+        detail.is_connected = True
+        details.append(detail)
+    pool = PeerPool("ws://peer", details)
+    pinned = {key: pool.select(key) for key in ["a", "b", "c", "d"]}
+    assert all(pool.select(key) is detail for key, detail in pinned.items())
+    assert all(detail is not details[2] for detail in pinned.values())
+    assert pool.select(bulk=True) is details[2]
+    details[0].is_connected = False
+    details[1].is_connected = False
+    assert pool.select("a") is details[2]
+    details[2].is_connected = False
+    assert pool.select(bulk=True) is None
+    assert pool.select("a") is None
+
+
+async def peer_pool():
+    PeerReducer.received = []
+    store = redux.Store([PeerReducer])
+    manager = redux.RemoteManager()
+    server = (await manager.serve("127.0.0.1", 0, store)).unwrap()
+    url = "ws://127.0.0.1:{}".format(server.sockets[0].getsockname()[1])
+    manager.add_peer(url, pool_size=3)
+    try:
+        results = await manager.warm_up(store, [url])
+        assert not results[url].is_error
+        pool = manager.client_pools[url]
+        assert len(pool) == 3
+        assert manager.client_connections[url] is pool.details[0]
+        medium = (await redux.RemoteMedium.connect(store, url)).unwrap()
+        keys = ["peer:{}".format(index) for index in range(4)]
+        for n in range(30):
+            for key in keys:
+                if n % 5 == 0:
+                    action = redux.Action("BLOB", n=n, data="x" * BLOB_SIZE)
+                else:
+                    action = redux.Action("SMALL", n=n)
+                assert not (await medium.send("peer:src", key, action)).is_error
+        await asyncio.sleep(0.2)
+        for key in keys:
+            assert [n for received_key, _, n in PeerReducer.received if received_key == key] == list(range(30))
+        state_opt = await medium.get_state("peer:src", "peer:0")
+        assert len(state_opt.unwrap()["blob"]) == BLOB_SIZE
+    finally:
+        manager.client_url.discard(url)
+        await manager.stop_serve(server)
+
+
+async def failed_connect():
+    store = redux.Store([PeerReducer])
+    manager = redux.RemoteManager()
+    url = "ws://127.0.0.1:1/failing"
+    manager.add_peer(url)
+
+    async def broken_connect_pool(url, store):
+        await asyncio.sleep(0.01)
+        raise RuntimeError("broken")
+    manager._connect_pool = broken_connect_pool
+    try:
+        results = await asyncio.wait_for(
+            asyncio.gather(manager.client(url, store), manager.client(url, store), return_exceptions=True), 1.0,
+        )
+        assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+        assert url not in manager._connecting
+    finally:
+        del manager._connect_pool
+        manager.client_url.discard(url)
+
+
+def test_peer_pool():
+    asyncio.get_event_loop().run_until_complete(peer_pool())
+
+
+def test_failed_connect():
+    asyncio.get_event_loop().run_until_complete(failed_connect())
@@ -0,0 +1,89 @@
+from typing import *
+import asyncio
+import redux
+
+
+@redux.behavior("pool:least:", redux.NeverRecycleOption(), pool_size=4)
+class LeastLoadedExecutor(redux.ExecutorReducer):
+    running = 0
+    peak = 0
+
+    async def action_received(self, action: redux.Action):
+        if action == "WORK":
+            LeastLoadedExecutor.running += 1
+            LeastLoadedExecutor.peak = max(LeastLoadedExecutor.peak, LeastLoadedExecutor.running)
+            await asyncio.sleep(0.01)
+            LeastLoadedExecutor.running -= 1
+
+
+@redux.behavior("pool:partition:", redux.NeverRecycleOption(), pool_size=4, partition="user")
+class PartitionExecutor(redux.ExecutorReducer):
+    handled = []
+
+    async def action_received(self, action: redux.Action):
+        if action == "WORK":
+            await asyncio.sleep(0.001)
+            PartitionExecutor.handled.append((action.arguments["user"], id(self)))
+
+
+@redux.behavior("pool:combine:", redux.NeverRecycleOption(), pool_size=2, partition="slot")
+class CombineExecutor(redux.ExecutorReducer):
+    received = []
+
+    async def action_received(self, action: redux.Action):
+        CombineExecutor.received.append((action.type, id(self)))
+        if action == "START":
+            self.combine_message(["A", "B"], redux.Action("DONE", slot=0), redux.Action("FAIL", slot=0), timeout=0.5)
+
+
+async def pooled_combine():
+    CombineExecutor.received = []
+    store = redux.Store([CombineExecutor])
+    await store.dispatch("pool:combine:1", redux.Action("START", slot=1))
+    primary = (await store.get_or_create_cell("pool:combine:1")).unwrap()
+    assert CombineExecutor.received[0][1] == id(primary.pool.members[1])
+    assert primary.has_combine
+    await store.dispatch("pool:combine:1", redux.Action("A", slot=0))
+    await store.dispatch("pool:combine:1", redux.Action("B", slot=0))
+    await asyncio.sleep(0.05)
+    assert [action_type for action_type, _ in CombineExecutor.received] == ["START", "DONE"]
+
+
+async def least_loaded():
+    store = redux.Store([LeastLoadedExecutor])
+    await asyncio.gather(*[store.dispatch("pool:least:1", redux.Action("WORK")) for _ in range(8)])
+    assert LeastLoadedExecutor.peak == 4
+    reducer = (await store.get_or_create_cell("pool:least:1")).unwrap()
+    assert len(reducer.pool) == 4
+    assert reducer.pool.load == [0, 0, 0, 0]
+    assert len(store.find_reducer_list_by_type(LeastLoadedExecutor)) == 1
+
+
+async def partition():
+    store = redux.Store([PartitionExecutor])
+    users = ["alice", "bob", "carol"] * 4
+    await asyncio.gather(*[store.dispatch("pool:partition:1", redux.Action("WORK", user=user)) for user in users])
+    members = dict()
+    for user, member in PartitionExecutor.handled:
+        assert members.setdefault(user, member) == member
+    assert len(PartitionExecutor.handled) == 12
+
+
+def test_pooled_combine():
+    asyncio.get_event_loop().run_until_complete(pooled_combine())
+
+
+def test_least_loaded():
+    asyncio.get_event_loop().run_until_complete(least_loaded())
+
+
+def test_partition():
+    asyncio.get_event_loop().run_until_complete(partition())
+
+
+def test_pool_only_for_executor():
+    try:
+        redux.behavior("pool:bad:", pool_size=2)(redux.GeneralReducer)
+    except TypeError:
+        return
+    assert False
@@ -0,0 +1,117 @@
+from typing import *
+import asyncio
+import redux
+from redux.lock import CellLock, STARVATION_LIMIT
+from redux.mailbox import Mailbox
+
+
+async def record(lock: CellLock, priority: int, order: List[str], name: str):
+    await lock.acquire(priority)
+    order.append(name)
+    lock.release()
+
+
+async def lanes():
+    lock = CellLock()
+    order = []
+    await lock.acquire()
+    tasks = [
+        asyncio.ensure_future(record(lock, redux.PRIORITY_BULK, order, "bulk")),
+        asyncio.ensure_future(record(lock, redux.PRIORITY_NORMAL, order, "normal")),
+        asyncio.ensure_future(record(lock, redux.PRIORITY_CONTROL, order, "control")),
+    ]
+    await asyncio.sleep(0)
+    lock.release()
+    await asyncio.gather(*tasks)
+    assert order == ["control", "normal", "bulk"]
+    assert not lock.locked()
+
+
+async def starvation():
+    lock = CellLock()
+    order = []
+    await lock.acquire()
+    tasks = [asyncio.ensure_future(record(lock, redux.PRIORITY_BULK, order, "bulk"))]
+    tasks += [asyncio.ensure_future(record(lock, redux.PRIORITY_CONTROL, order, "control")) for _ in range(STARVATION_LIMIT * 2)]
+    await asyncio.sleep(0)
+    lock.release()
+    await asyncio.gather(*tasks)
+    assert order.index("bulk") == STARVATION_LIMIT
+
+
+async def three_lanes():
+    lock = CellLock()
+    order = []
+    await lock.acquire()
+    tasks = [asyncio.ensure_future(record(lock, redux.PRIORITY_CONTROL, order, "control")) for _ in range(100)]
+    tasks += [asyncio.ensure_future(record(lock, redux.PRIORITY_NORMAL, order, "normal")) for _ in range(5)]
+    tasks += [asyncio.ensure_future(record(lock, redux.PRIORITY_BULK, order, "bulk")) for _ in range(5)]
+    await asyncio.sleep(0)
+    lock.release()
+    await asyncio.gather(*tasks)
+    window = order[:(STARVATION_LIMIT + 2) * 2]
+    assert window.count("normal") >= 2 and window.count("bulk") >= 2
+    assert order.index("normal") < order.index("bulk")
+
+
+def test_mailbox_three_lanes():
+    mailbox = Mailbox()
+    for _ in range(100):
+        mailbox.append("control", redux.PRIORITY_CONTROL)
+    for _ in range(5):
+        mailbox.append("normal", redux.PRIORITY_NORMAL)
+        mailbox.append("bulk", redux.PRIORITY_BULK)
+    order = [mailbox.popleft() for _ in range(len(mailbox))]
+    window = order[:(STARVATION_LIMIT + 2) * 2]
+    assert window.count("normal") >= 2 and window.count("bulk") >= 2
+    assert order.count("normal") == 5 and order.count("bulk") == 5 and not mailbox
+
+
+async def slow(action: redux.Action, state=None):
+    if action == "WORK":
+        await asyncio.sleep(0)
+        state = (state or []) + [action.arguments["name"]]
+    return state
+
+
+@redux.behavior("priority:")
+class LaneReducer(redux.Reducer):
+    priority_dict = {"WORK": redux.PRIORITY_BULK}
+
+    def __init__(self):
+        super(LaneReducer, self).__init__({"done": slow})
+
+
+async def dispatch_lanes():
+    store = redux.Store([LaneReducer])
+    reducer = (await store.get_or_create_cell("priority:1", LaneReducer)).unwrap()
+    await reducer.locker.acquire()
+    tasks = [asyncio.ensure_future(store.dispatch("priority:1", redux.Action("WORK", name="bulk{}".format(i)))) for i in range(5)]
+    await asyncio.sleep(0)
+    urgent = redux.Action("WORK", name="urgent")
+    urgent.priority = redux.PRIORITY_CONTROL
+    tasks.append(asyncio.ensure_future(store.dispatch("priority:1", urgent)))
+    await asyncio.sleep(0)
+    reducer.locker.release()
+    await asyncio.gather(*tasks)
+    assert store["priority:1"]["done"] == ["urgent", "bulk0", "bulk1", "bulk2", "bulk3", "bulk4"]
+    message = redux.LocalMedium.to_message("a", "b", urgent).unwrap()
+    _, received = redux.LocalMedium.from_message(None, message).unwrap()
+    assert received.priority == redux.PRIORITY_CONTROL
+    assert redux.Action.no_op_command().priority == redux.PRIORITY_CONTROL
+
+
+def test_lanes():
+    asyncio.get_event_loop().run_until_complete(lanes())
+
+
+def test_starvation():
+    asyncio.get_event_loop().run_until_complete(starvation())
+
+
+def test_three_lanes():
+    asyncio.get_event_loop().run_until_complete(three_lanes())
+
+
+def test_dispatch_lanes():
+    asyncio.get_event_loop().run_until_complete(dispatch_lanes())
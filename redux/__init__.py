@@ -1,11 +1,17 @@
 from .error import *
 from .option import Option
-from .action import Action
+from .action import Action, PRIORITY_CONTROL, PRIORITY_NORMAL, PRIORITY_BULK
+from .trace import TraceContext, Tracer, FileSpanExporter
+from .dedupe import DedupeWindow
+from .admission import AdmissionController, TokenBucket
 from .medium import LocalMedium, RemoteManager, RemoteMedium, EntryMedium
-from .listener import Listener
+from .listener import Listener, PrefixListener
 from .recycle_option import IdleTimeoutRecycleOption, NeverRecycleOption, SubscribeRecycleOption
-from .reducer import Reducer
+from .reducer import Reducer, selector
+from .offload import cpu_bound
+from .columnar import ColumnarReducer, vectorized
 from .store import Store
+from .index import FieldIndex, SortedFieldIndex
 from .design import PublicEntryReducer, InternalEntryReducer, ExecutorReducer, GeneralReducer, reducer_behavior
 
 
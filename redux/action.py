@@ -1,14 +1,39 @@
 from typing import *
+import time
+import zlib
+import uuid
+from .trace import TraceContext
+
+
+PRIORITY_CONTROL = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BULK = 2
+
+
+def path_digest(key: str, action_type: str) -> int:
+    return zlib.crc32("{}\x00{}".format(key, action_type).encode("utf8"))
+
+
+def new_action_id() -> str:
+    return uuid.uuid4().hex
 
 
 class Action:
+    __slots__ = ("type", "arguments", "medium", "source_key", "id", "reply_to", "trace", "hops", "deadline", "path", "priority", )
+
     def __init__(self, type: str, **kwargs):
         self.type = type
-        self.arguments = kwargs or {}
+        self.arguments = kwargs
         self.medium = None
         self.source_key = None
+        self.id = None
+        self.reply_to = None
+        self.trace = None
+        self.hops = 0
+        self.deadline = None
+        self.path = None
+        self.priority = None
         assert isinstance(self.type, str)
-        assert isinstance(self.arguments, dict)
 
     def __eq__(self, other):
         if isinstance(other, str):
@@ -17,16 +42,89 @@ class Action:
             return super(Action, self).__eq__(other)
 
     def to_data(self, dumps):
-        action_dict = dict(type=self.type, **{k: v for k, v in self.arguments.items() if not k.startswith("__")})
-        return dumps(action_dict)
+        return dumps(self.to_dict())
 
     def to_dict(self):
-        return dict(type=self.type, **{k: v for k, v in self.arguments.items() if not k.startswith("__")})
+        action_dict = {"type": self.type}
+        for k, v in self.arguments.items():
+            if not k.startswith("__"):
+                action_dict[k] = v
+        return action_dict
 
     @property
     def soft(self):
         return self.arguments.get("soft")
 
+    def ensure_id(self) -> str:
+        if self.id is None:
+            self.id = new_action_id()
+        return self.id
+
+    def set_ttl(self, ttl: Union[int, float]):
+        self.deadline = time.time() + ttl
+
+    def follow(self, parent: 'Action') -> 'Action':
+        '''
+        继承parent的信封(trace, hops, deadline, path), 有需要继承的字段时返回副本, 自身不变,
+        同一个action可以在不同的上下文里重复发送
+        '''
+        if (self.trace is not None or parent.trace is None) and parent.hops <= self.hops \
+                and (self.deadline is not None or parent.deadline is None) \
+                and (self.path is not None or parent.path is None):
+            return self
+        action = self.copy()
+        if action.trace is None:
+            action.trace = parent.trace
+        if parent.hops > action.hops:
+            action.hops = parent.hops
+        if action.deadline is None:
+            action.deadline = parent.deadline
+        if action.path is None:
+            action.path = parent.path
+        return action
+
+    def hop(self, source_key, medium) -> 'Action':
+        '''
+        进程内转发用的副本, 等价于to_message后再from_message但不经过中间的dict:
+        信封字段逐个复制, hops加一, arguments只做一层浅拷贝(同样去掉__开头的参数),
+        接收方增删改参数不会影响发送方, 参数中的大对象本身不复制
+        '''
+        action = Action.__new__(Action)
+        action.type = self.type
+        action.arguments = {k: v for k, v in self.arguments.items() if not k.startswith("__")}
+        action.medium = medium
+        action.source_key = source_key
+        action.id = self.id
+        action.reply_to = self.reply_to
+        action.hops = self.hops + 1
+        action.deadline = self.deadline
+        action.path = self.path
+        action.priority = self.priority
+        trace = self.trace
+        if trace is not None:
+            trace = TraceContext(trace.trace_id, trace.span_id, bool(trace.sampled))
+            trace.received_time = time.time()
+        action.trace = trace
+        return action
+
+    def copy(self) -> 'Action':
+        '''
+        本次投递使用的浅拷贝, 信封字段可以单独修改, arguments与原action共享
+        '''
+        action = Action.__new__(Action)
+        action.type = self.type
+        action.arguments = self.arguments
+        action.medium = self.medium
+        action.source_key = self.source_key
+        action.id = self.id
+        action.reply_to = self.reply_to
+        action.trace = self.trace
+        action.hops = self.hops
+        action.deadline = self.deadline
+        action.path = self.path
+        action.priority = self.priority
+        return action
+
     @staticmethod
     def from_data(data, loads) -> 'Action':
         all_arguments = loads(data)
@@ -45,10 +143,12 @@ class Action:
 
     @staticmethod
     def no_op_command() -> 'Action':
-        return Action("__NO_OP")
+        action = Action("__NO_OP")
+        action.priority = PRIORITY_CONTROL
+        return action
 
     def __repr__(self):
         return "<Action: {}, {}>".format(self.type, self.arguments)
 
 
-__all__ = ["Action", ]
+__all__ = ["Action", "path_digest", "new_action_id", "PRIORITY_CONTROL", "PRIORITY_NORMAL", "PRIORITY_BULK", ]
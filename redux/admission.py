@@ -0,0 +1,188 @@
+from typing import *
+import time
+import asyncio
+from collections import OrderedDict
+
+POLICY_DROP = "drop"
+POLICY_DELAY = "delay"
+POLICY_DISCONNECT = "disconnect"
+
+
+class TokenBucket:
+    """
+    令牌桶, rate是每秒补充的令牌数, capacity是允许的突发量
+    """
+    __slots__ = ("rate", "capacity", "tokens", "updated", )
+
+    def __init__(self, rate: float, capacity: Optional[float]=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    def delay(self, now: float) -> float:
+        '''
+        还需要等待多久才能取到一个令牌, 0表示现在就可以
+        '''
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        if self.rate <= 0:
+            return float("inf")
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class BucketMap:
+    """
+    按名字创建的令牌桶, 超过容量时淘汰最久未使用的
+    """
+    __slots__ = ("rate", "capacity", "max_size", "_buckets", )
+
+    def __init__(self, rate: float, capacity: Optional[float]=None, max_size=100000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_size = max_size
+        self._buckets: Dict[Hashable, TokenBucket] = OrderedDict()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def get(self, name: Hashable) -> TokenBucket:
+        buckets = self._buckets
+        bucket = buckets.get(name)
+        if bucket is None:
+            bucket = buckets[name] = TokenBucket(self.rate, self.capacity)
+            if len(buckets) > self.max_size:
+                buckets.popitem(last=False)
+        else:
+            buckets.move_to_end(name)
+        return bucket
+
+    def discard(self, name: Hashable):
+        self._buckets.pop(name, None)
+
+
+class AdmissionController:
+    """
+    入口和medium边界上的准入控制, 分别按连接, 来源key和目标key前缀限速, 一个action需要同时满足所有相关的令牌桶.
+    超出限制时按policy处理: drop直接丢弃, delay等待令牌(超过max_delay仍然丢弃), disconnect丢弃并要求断开连接.
+    medium使用不等待的reserve, delay策略下预支令牌并返回需要延迟的时间, 由store按key推迟投递, 不阻塞接收循环
+
+        store = redux.Store(reducers, admission=redux.AdmissionController(
+            per_connection=(100, 200),
+            per_source=(50, 100),
+            per_prefix={"node:transfer": (1000, 1000)},
+            policy="delay",
+        ))
+    """
+    def __init__(
+            self,
+            per_connection: Optional[Tuple[float, float]]=None,
+            per_source: Optional[Tuple[float, float]]=None,
+            per_prefix: Optional[Dict[str, Tuple[float, float]]]=None,
+            policy: str=POLICY_DROP,
+            max_delay: float=1.0,
+    ):
+        if policy not in (POLICY_DROP, POLICY_DELAY, POLICY_DISCONNECT):
+            raise ValueError(policy)
+        self.policy = policy
+        self.max_delay = max_delay
+        self.connections = BucketMap(*per_connection) if per_connection else None
+        self.sources = BucketMap(*per_source) if per_source else None
+        self.prefixes: Dict[str, TokenBucket] = {
+            prefix: TokenBucket(*limit) for prefix, limit in (per_prefix or dict()).items()
+        }
+        self.counter = dict(admitted=0, dropped=0, delayed=0, disconnected=0)
+
+    def _buckets(self, connection, source_key: Optional[str], target_key: Optional[str]) -> List[TokenBucket]:
+        buckets = []
+        if connection is not None and self.connections is not None:
+            buckets.append(self.connections.get(connection))
+        if source_key is not None and self.sources is not None:
+            buckets.append(self.sources.get(source_key))
+        if target_key is not None:
+            for prefix, bucket in self.prefixes.items():
+                if target_key.startswith(prefix):
+                    buckets.append(bucket)
+        return buckets
+
+    def check(self, connection=None, source_key: Optional[str]=None, target_key: Optional[str]=None) -> float:
+        '''
+        返回需要等待的秒数, 0表示准入并且已经扣除令牌
+        '''
+        buckets = self._buckets(connection, source_key, target_key)
+        if not buckets:
+            return 0.0
+        now = time.monotonic()
+        delay = max(bucket.delay(now) for bucket in buckets)
+        if delay == 0:
+            for bucket in buckets:
+                bucket.take()
+        return delay
+
+    def reserve(self, connection=None, source_key: Optional[str]=None, target_key: Optional[str]=None) -> Optional[float]:
+        '''
+        不等待的准入判断, 返回0表示立即准入, None表示拒绝. delay策略下令牌不足时预支令牌(令牌数可以为负),
+        返回拿到令牌还需要的秒数, 之后的action要等预支的令牌补回来, 超过max_delay时拒绝
+        '''
+        buckets = self._buckets(connection, source_key, target_key)
+        if buckets:
+            now = time.monotonic()
+            delay = max(bucket.delay(now) for bucket in buckets)
+        else:
+            delay = 0.0
+        if delay and (self.policy != POLICY_DELAY or delay > self.max_delay):
+            if self.policy == POLICY_DISCONNECT:
+                self.counter["disconnected"] += 1
+            else:
+                self.counter["dropped"] += 1
+            return None
+        for bucket in buckets:
+            bucket.take()
+        if delay:
+            self.counter["delayed"] += 1
+        self.counter["admitted"] += 1
+        return delay
+
+    async def admit(self, connection=None, source_key: Optional[str]=None, target_key: Optional[str]=None) -> bool:
+        delay = self.check(connection, source_key, target_key)
+        if delay and self.policy == POLICY_DELAY:
+            waited = 0.0
+            while delay and waited + delay <= self.max_delay:
+                self.counter["delayed"] += 1
+                await asyncio.sleep(delay)
+                waited += delay
+                delay = self.check(connection, source_key, target_key)
+        if not delay:
+            self.counter["admitted"] += 1
+            return True
+        if self.policy == POLICY_DISCONNECT:
+            self.counter["disconnected"] += 1
+        else:
+            self.counter["dropped"] += 1
+        return False
+
+    @property
+    def should_disconnect(self) -> bool:
+        return self.policy == POLICY_DISCONNECT
+
+    def forget(self, connection):
+        if self.connections is not None:
+            self.connections.discard(connection)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counter)
+
+
+__all__ = [
+    "POLICY_DROP", "POLICY_DELAY", "POLICY_DISCONNECT", "TokenBucket", "BucketMap", "AdmissionController",
+]
@@ -0,0 +1,259 @@
+'''
+列式reducer: 同一类型的所有节点共享一组NumPy数组, 每个key只占用各列中的一行,
+发往这些key的action在同一轮事件循环中按类型分段, 交给向量化的处理函数一次性批量执行.
+Store.dispatch/subscribe/store[key]的用法不变, store[key]按需把一行数据转换成dict
+同一批中同一个key的多次变化合并成一次监听通知
+
+    @redux.behavior("user:equity:")
+    class EquityColumns(redux.ColumnarReducer):
+        fields = {"equity": "f8"}
+
+        @redux.vectorized("INCREASE_EQUITY")
+        def increase(columns, rows, arguments):
+            columns["equity"][rows] += arguments["change"]
+'''
+
+from typing import *
+import sys
+import asyncio
+from .action import Action
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def vectorized(action_type: str):
+    '''
+    声明ColumnarReducer上处理某种action的函数, 签名为 def handler(columns, rows, arguments),
+    columns是字段名到整列数组的dict, rows是本批涉及的行号(同一批中不会重复),
+    arguments是参数名到数组的dict, 和rows一一对应
+    '''
+    def wrap(func):
+        func.__redux_vectorized__ = action_type
+        return staticmethod(func)
+    return wrap
+
+
+class ColumnarReducer:
+    key_prefix = None
+    fields: Dict[str, str] = dict()
+    defaults: Dict[str, Any] = dict()
+    initial_capacity = 1024
+    handler_dict: Dict[str, Callable] = dict()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        handler_dict = dict()
+        for klass in reversed(cls.__mro__):
+            for value in vars(klass).values():
+                func = getattr(value, "__func__", None)
+                action_type = getattr(func, "__redux_vectorized__", None)
+                if action_type is not None:
+                    handler_dict[action_type] = func
+        cls.handler_dict = handler_dict
+
+    @classmethod
+    def initialize(cls, key: str) -> Optional[Dict[str, Any]]:
+        '''
+        新的一行创建时的初始值, 返回None时使用defaults
+        '''
+        return None
+
+
+_ROW_NUMBER_BYTES = sys.getsizeof(1 << 16)
+
+
+class ColumnarFamily:
+    """
+    一个store中某个ColumnarReducer类型的全部节点, 行号复用回收的空位, 容量不足时整体翻倍
+    """
+    def __init__(self, store, reducer_type: Type[ColumnarReducer]):
+        if numpy is None:
+            raise ImportError("ColumnarReducer requires numpy")
+        self.store = store
+        self.reducer_type = reducer_type
+        self.rows: Dict[str, int] = dict()
+        self.keys: List[Optional[str]] = []
+        self.free: List[int] = []
+        capacity = reducer_type.initial_capacity
+        self.columns: Dict[str, numpy.ndarray] = {
+            name: numpy.zeros(capacity, dtype=dtype) for name, dtype in reducer_type.fields.items()
+        }
+        self._pending: List[Tuple[int, Action]] = []
+        self._waiters: List[asyncio.Future] = []
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, key):
+        return key in self.rows
+
+    def _column_length(self) -> int:
+        for column in self.columns.values():
+            return len(column)
+        return 0
+
+    def row_size(self) -> int:
+        '''
+        每一行在各列中占用的字节数
+        '''
+        return sum(column.itemsize for column in self.columns.values())
+
+    def memory_size(self) -> int:
+        '''
+        各列加上key到行号的索引(rows字典, keys和free列表, 行号整数)占用的字节数, 不含key字符串本身
+        '''
+        size = sum(column.nbytes for column in self.columns.values())
+        size += sys.getsizeof(self.rows) + sys.getsizeof(self.keys) + sys.getsizeof(self.free)
+        return size + len(self.keys) * _ROW_NUMBER_BYTES
+
+    def create(self, key: str) -> int:
+        row = self.rows.get(key)
+        if row is not None:
+            return row
+        if self.free:
+            row = self.free.pop()
+            self.keys[row] = key
+        else:
+            row = len(self.keys)
+            if row >= self._column_length():
+                self._grow(max(1, row * 2))
+            self.keys.append(key)
+        self.rows[key] = row
+        values = self.reducer_type.initialize(key) or dict()
+        defaults = self.reducer_type.defaults
+        for name, column in self.columns.items():
+            column[row] = values.get(name, defaults.get(name, 0))
+        return row
+
+    def remove(self, key: str) -> bool:
+        row = self.rows.pop(key, None)
+        if row is None:
+            return False
+        self.keys[row] = None
+        self.free.append(row)
+        return True
+
+    def _grow(self, capacity: int):
+        for name, column in self.columns.items():
+            grown = numpy.zeros(capacity, dtype=column.dtype)
+            grown[:len(column)] = column
+            self.columns[name] = grown
+
+    def view(self, key: str) -> Optional[Dict[str, Any]]:
+        row = self.rows.get(key)
+        if row is None:
+            return None
+        return {name: column[row].item() for name, column in self.columns.items()}
+
+    async def dispatch(self, key: str, action: Action) -> bool:
+        row = self.rows.get(key)
+        if row is None:
+            if action.soft:
+                return True
+            row = self.create(key)
+        if action.type not in self.reducer_type.handler_dict:
+            return True
+        loop = asyncio.get_event_loop()
+        if not self._pending:
+            loop.call_soon(self._flush)
+        self._pending.append((row, action))
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        await waiter
+        return True
+
+    def _flush(self):
+        pending, self._pending = self._pending, []
+        waiters, self._waiters = self._waiters, []
+        changed = self._apply(pending, waiters)
+        if changed:
+            asyncio.ensure_future(self._notify(changed, waiters))
+        else:
+            self._wake(waiters)
+
+    @staticmethod
+    def _wake(waiters: List[asyncio.Future], error: Optional[Exception]=None):
+        for waiter in waiters:
+            if waiter.done():
+                continue
+            if error is None:
+                waiter.set_result(True)
+            else:
+                waiter.set_exception(error)
+
+    def _apply(self, pending: List[Tuple[int, Action]], waiters: List[asyncio.Future]) -> Dict[str, Dict[str, Any]]:
+        '''
+        按到达顺序切分成段, 每段只有一种action类型, 参数名完全相同且行号不重复, 保证同一个key上的action按顺序生效.
+        waiters和pending一一对应, 某一段出错时只有这一段的waiter收到异常, 其他段照常生效和通知
+        '''
+        changed: Dict[str, Dict[str, Any]] = dict()
+        start = 0
+        segment_type = None
+        segment_names = None
+        seen = set()
+        for index, (row, action) in enumerate(pending):
+            if action.type != segment_type or row in seen or action.arguments.keys() != segment_names:
+                if index > start:
+                    self._apply_segment(pending[start:index], waiters[start:index], changed)
+                start = index
+                segment_type = action.type
+                segment_names = action.arguments.keys()
+                seen = set()
+            seen.add(row)
+        if pending:
+            self._apply_segment(pending[start:], waiters[start:], changed)
+        return changed
+
+    def _apply_segment(
+            self, segment: List[Tuple[int, Action]], waiters: List[asyncio.Future], changed: Dict[str, Dict[str, Any]],
+    ):
+        '''
+        处理函数出错时把这一段涉及的行恢复成执行前的值, 这一段的action整体失败
+        '''
+        handler = self.reducer_type.handler_dict[segment[0][1].type]
+        columns = self.columns
+        store = self.store
+        rows = [row for row, _ in segment]
+        if store._observer_list or store._prefix_listeners:
+            watched = [row for row in rows if self._is_watched(self.keys[row])]
+        else:
+            watched = []
+        before = [{name: column[row].item() for name, column in columns.items()} for row in watched]
+        row_index = numpy.asarray(rows, dtype=numpy.intp)
+        saved = {name: column[row_index] for name, column in columns.items()}
+        try:
+            arguments = {
+                name: numpy.asarray([action.arguments[name] for _, action in segment])
+                for name in segment[0][1].arguments
+            }
+            handler(columns, row_index, arguments)
+        except Exception as e:
+            for name, column in columns.items():
+                column[row_index] = saved[name]
+            self._wake(waiters, e)
+            return
+        for row, old in zip(watched, before):
+            for name, column in columns.items():
+                value = column[row].item()
+                if value != old[name]:
+                    changed.setdefault(self.keys[row], dict())[name] = value
+
+    def _is_watched(self, key: str) -> bool:
+        store = self.store
+        if key in store._observer_list:
+            return True
+        return bool(store._prefix_listeners) and bool(store._prefix_listeners.match(key))
+
+    async def _notify(self, changed: Dict[str, Dict[str, Any]], waiters: List[asyncio.Future]):
+        try:
+            for key, changed_state in changed.items():
+                state = self.view(key)
+                if state is not None:
+                    await self.store._call_listeners(key, changed_state, state)
+        finally:
+            self._wake(waiters)
+
+
+__all__ = ["vectorized", "ColumnarReducer", "ColumnarFamily", ]
@@ -1,4 +1,7 @@
-from asyncio import Future, ensure_future, wait_for, TimeoutError
+from typing import *
+from asyncio import ensure_future
+from collections import Counter
+from .action import PRIORITY_CONTROL
 
 
 class CombineMessage:
@@ -8,25 +11,77 @@ class CombineMessage:
         self.error_message = None
         self.timeout = 1.0
         self.keep_origin = False
-        self.future = Future()
         self.node_key = None
         self.store = None
+        self.pending = Counter()
+        self.timer = None
+        self.done = False
 
     def active(self):
-        ensure_future(self._active())
-
-    async def _active(self):
-        try:
-            await wait_for(self.future, self.timeout)
-            await self.store.dispatch(self.node_key, self.combine_message)
-        except TimeoutError:
-            if self.node_key in self.store:
-                reducer_opt = await self.store.get_or_create_cell(self.node_key, None)
-                if reducer_opt.is_some:
-                    reducer = reducer_opt.unwrap()
-                    if self in reducer.combine_message_list:
-                        reducer.combine_message_list.remove(self)
-                await self.store.dispatch(self.node_key, self.error_message)
-
-
-__all__ = ["CombineMessage"]
+        self.pending = Counter(self.message_type_list)
+        self.timer = self.store.timer.call_later(self.timeout, self._timeout)
+
+    def finish(self):
+        self.done = True
+        self.store.timer.cancel(self.timer)
+        if self.combine_message.priority is None:
+            self.combine_message.priority = PRIORITY_CONTROL
+        ensure_future(self.store.dispatch(self.node_key, self.combine_message))
+
+    def _timeout(self):
+        if self.done:
+            return
+        self.done = True
+        if self.node_key not in self.store:
+            # reducer已经被回收, 不为了投递超时消息重新创建它
+            return
+        reducer = self.store._reducer_set.get(self.node_key)
+        if reducer is not None:
+            reducer.combine_index.remove(self)
+        if self.error_message.priority is None:
+            self.error_message.priority = PRIORITY_CONTROL
+        ensure_future(self.store.dispatch(self.node_key, self.error_message))
+
+
+class CombineIndex:
+    """
+    按action类型索引一个reducer上等待中的CombineMessage, 每个类型的桶按注册顺序排列,
+    匹配和移除都只和CombineMessage自身等待的类型数有关, 与等待中的CombineMessage总数无关
+    """
+    def __init__(self):
+        self._index: Dict[str, Dict[CombineMessage, None]] = dict()
+
+    def __bool__(self):
+        return bool(self._index)
+
+    def add(self, combine_message: CombineMessage):
+        for action_type in combine_message.pending:
+            self._index.setdefault(action_type, dict())[combine_message] = None
+
+    def remove(self, combine_message: CombineMessage):
+        for action_type in combine_message.pending:
+            bucket = self._index.get(action_type)
+            if bucket is None:
+                continue
+            bucket.pop(combine_message, None)
+            if not bucket:
+                del self._index[action_type]
+
+    def match(self, action_type: str) -> Optional[CombineMessage]:
+        bucket = self._index.get(action_type)
+        if not bucket:
+            return None
+        combine_message = next(iter(bucket))
+        pending = combine_message.pending
+        count = pending[action_type] - 1
+        if count:
+            pending[action_type] = count
+        else:
+            del pending[action_type]
+            del bucket[combine_message]
+            if not bucket:
+                del self._index[action_type]
+        return combine_message
+
+
+__all__ = ["CombineMessage", "CombineIndex", ]
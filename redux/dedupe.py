@@ -0,0 +1,102 @@
+from typing import *
+import sys
+import time
+import struct
+from collections import OrderedDict, deque
+
+
+_BUCKET_BYTES = sys.getsizeof((0, [])) + sys.getsizeof([])
+_POINTER_BYTES = struct.calcsize("P")
+
+
+class DedupeWindow:
+    """
+    按action id去重的有界窗口, OrderedDict按LRU限制条数, 按时间分桶的过期轮限制存活时间,
+    每次查询的均摊开销是O(1). 因容量淘汰或者discard移除的条目在过期轮中只做惰性删除,
+    过期轮中的条目超过容量两倍时整体压缩一次, 内存始终和capacity成正比
+    """
+    def __init__(self, capacity: int=100000, ttl: Union[int, float]=60.0, resolution: Union[int, float]=1.0):
+        if capacity <= 0 or ttl <= 0 or resolution <= 0:
+            raise ValueError
+        self.capacity = capacity
+        self.ttl = float(ttl)
+        self.resolution = float(resolution)
+        self._seen: Dict[Hashable, int] = OrderedDict()
+        self._wheel: Deque[Tuple[int, List[Hashable]]] = deque()
+        self._wheel_count = 0
+        self._item_bytes = 0
+
+    def __len__(self):
+        return len(self._seen)
+
+    def __contains__(self, item):
+        return item in self._seen
+
+    def seen(self, item: Hashable) -> bool:
+        now = time.time()
+        self._expire(now)
+        seen = self._seen
+        if item in seen:
+            seen.move_to_end(item)
+            return True
+        slot = int(now / self.resolution)
+        seen[item] = slot
+        self._item_bytes += sys.getsizeof(item)
+        wheel = self._wheel
+        if wheel and wheel[-1][0] == slot:
+            wheel[-1][1].append(item)
+        else:
+            wheel.append((slot, [item]))
+        self._wheel_count += 1
+        if len(seen) > self.capacity:
+            evicted, _ = seen.popitem(last=False)
+            self._item_bytes -= sys.getsizeof(evicted)
+        if self._wheel_count > self.capacity * 2:
+            self._compact()
+        return False
+
+    def discard(self, item: Hashable):
+        '''
+        撤销一次标记, 处理失败的action重试时不会被当成重复
+        '''
+        if self._seen.pop(item, None) is not None:
+            self._item_bytes -= sys.getsizeof(item)
+
+    def _compact(self):
+        seen = self._seen
+        wheel = deque()
+        for slot, items in self._wheel:
+            items = [item for item in items if seen.get(item) == slot]
+            if items:
+                wheel.append((slot, items))
+        self._wheel = wheel
+        self._wheel_count = sum(len(items) for _, items in wheel)
+
+    def _expire(self, now: float):
+        expire_slot = int((now - self.ttl) / self.resolution)
+        wheel = self._wheel
+        seen = self._seen
+        while wheel and wheel[0][0] < expire_slot:
+            slot, items = wheel.popleft()
+            self._wheel_count -= len(items)
+            for item in items:
+                if seen.get(item) == slot:
+                    del seen[item]
+                    self._item_bytes -= sys.getsizeof(item)
+
+    def memory_size(self) -> int:
+        '''
+        估算占用的字节数, 条目和过期轮的大小都是增量维护的, 调用开销和条目数无关
+        '''
+        size = sys.getsizeof(self._seen) + sys.getsizeof(self._wheel) + self._item_bytes
+        size += len(self._wheel) * _BUCKET_BYTES + self._wheel_count * _POINTER_BYTES
+        return size
+
+    def clear(self):
+        self._seen.clear()
+        self._wheel.clear()
+        self._wheel_count = 0
+        self._item_bytes = 0
+
+
+__all__ = ["DedupeWindow", ]
@@ -18,11 +18,15 @@ ensure_state
 
 from typing import *
 from .recycle_option import *
+from .action import PRIORITY_CONTROL
 from .medium import MediumBase
 from .reducer import Reducer
+from .columnar import ColumnarReducer
 
 
 class ReducerNode(Reducer):
+    __slots__ = ()
+
     def __init__(self, mapping=None):
         super(ReducerNode, self).__init__(mapping)
 
@@ -39,6 +43,8 @@ class ReducerNode(Reducer):
 
 
 class GeneralReducer(ReducerNode):
+    __slots__ = ("entry_key", )
+
     def __init__(self, mapping_dict=None, entry_key: Optional[str]=None):
         assert mapping_dict is None or isinstance(mapping_dict, dict)
         mapping_dict = mapping_dict or {}
@@ -47,6 +53,9 @@ class GeneralReducer(ReducerNode):
 
 
 class PublicEntryReducer(ReducerNode):
+    __slots__ = ("check_session", "entry_medium", )
+    default_priority = PRIORITY_CONTROL
+
     def __init__(self, mapping_dict=None, check_session=True):
         assert mapping_dict is None or isinstance(mapping_dict, dict)
         mapping_dict = mapping_dict or {}
@@ -60,6 +69,8 @@ class PublicEntryReducer(ReducerNode):
 
 
 class InternalEntryReducer(ReducerNode):
+    __slots__ = ("entry_mediums", )
+
     def __init__(self, mapping_dict=None):
         assert mapping_dict is None or isinstance(mapping_dict, dict)
         mapping_dict = mapping_dict or {}
@@ -68,6 +79,8 @@ class InternalEntryReducer(ReducerNode):
 
 
 class ExecutorReducer(ReducerNode):
+    __slots__ = ("entry_key", "realm", )
+
     def __init__(self, entry_key: Optional[str]=None, realm=None):
         super(ExecutorReducer, self).__init__(dict())
         self.entry_key = entry_key
@@ -78,10 +91,21 @@ def reducer_behavior(
         key_prefix,
         recycle_option: RecycleOption=NeverRecycleOption(),
         url_pattern=None,
+        pool_size: int=1,
+        partition: Union[str, Callable, None]=None,
 ):
+    '''
+    pool_size和partition只对ExecutorReducer有效, 同一个key下会创建pool_size个实例并发处理action,
+    partition可以是action参数名或者以action为参数的函数, 分区值相同的action由同一个实例按顺序处理
+    '''
     def wrap(cls):
-        if not issubclass(cls, Reducer):
+        if not issubclass(cls, (Reducer, ColumnarReducer)):
             raise TypeError
+        if pool_size != 1 or partition is not None:
+            if not issubclass(cls, ExecutorReducer) or pool_size < 1:
+                raise TypeError
+            setattr(cls, "pool_size", pool_size)
+            setattr(cls, "partition", partition)
         setattr(cls, "key_prefix", key_prefix)
         if recycle_option is not None:
             setattr(cls, "recycle_option", recycle_option)
@@ -15,4 +15,15 @@ class SameKeyError(Exception):
     pass
 
 
-__all__ = ["ReduxError", "NoneError", "SameKeyError"]
+class OverloadError(Exception):
+    pass
+
+
+class UpgradeError(Exception):
+    def __init__(self, upgraded: int, failed: dict):
+        super(UpgradeError, self).__init__(upgraded, failed)
+        self.upgraded = upgraded
+        self.failed = failed
+
+
+__all__ = ["ReduxError", "NoneError", "SameKeyError", "OverloadError", "UpgradeError"]
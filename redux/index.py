@@ -0,0 +1,124 @@
+from typing import *
+from itertools import takewhile
+from sortedcontainers import SortedList, SortedKeyList
+from .reducer import Reducer
+
+
+class KeyIndex:
+    """
+    存活reducer的类型索引和key前缀索引, 在reducer创建和回收时增量维护,
+    按类型查询只遍历该类型的reducer, 按前缀查询在有序key列表上二分定位
+    """
+    __slots__ = ("_types", "_keys", )
+
+    def __init__(self):
+        self._types: Dict[Type[Reducer], Dict[str, Reducer]] = dict()
+        self._keys = SortedList()
+
+    def add(self, reducer: Reducer):
+        self._types.setdefault(type(reducer), dict())[reducer.key] = reducer
+        self._keys.add(reducer.key)
+
+    def discard(self, reducer: Reducer):
+        bucket = self._types.get(type(reducer))
+        if bucket is None or bucket.pop(reducer.key, None) is None:
+            return
+        if not bucket:
+            del self._types[type(reducer)]
+        self._keys.discard(reducer.key)
+
+    def count(self, reducer_type: Type[Reducer]) -> int:
+        return len(self._types.get(reducer_type, ()))
+
+    def iter_type(self, reducer_type: Type[Reducer]) -> Iterator[Reducer]:
+        return iter(self._types.get(reducer_type, dict()).values())
+
+    def iter_prefix(self, prefix: str) -> Iterator[str]:
+        return takewhile(lambda key: key.startswith(prefix), self._keys.irange(minimum=prefix))
+
+
+class FieldIndex:
+    """
+    某个reducer类型上单个state字段的哈希索引, 字段值 -> {key: reducer},
+    由每次dispatch的changed_state增量更新, 值不可哈希时不进入索引
+    """
+    __slots__ = ("reducer_type", "field", "_values", "_buckets", )
+
+    def __init__(self, reducer_type: Type[Reducer], field: str):
+        self.reducer_type = reducer_type
+        self.field = field
+        self._values: Dict[str, Any] = dict()
+        self._buckets: Dict[Any, Dict[str, Reducer]] = dict()
+
+    def __len__(self):
+        return len(self._values)
+
+    def update(self, reducer: Reducer, value: Any):
+        self.discard(reducer)
+        try:
+            self._buckets.setdefault(value, dict())[reducer.key] = reducer
+        except TypeError:
+            return
+        self._values[reducer.key] = value
+
+    def discard(self, reducer: Reducer):
+        if reducer.key not in self._values:
+            return
+        value = self._values.pop(reducer.key)
+        bucket = self._buckets[value]
+        del bucket[reducer.key]
+        if not bucket:
+            del self._buckets[value]
+
+    def find(self, value: Any) -> Iterator[Reducer]:
+        try:
+            bucket = self._buckets.get(value)
+        except TypeError:
+            bucket = None
+        return iter(bucket.values()) if bucket else iter(())
+
+
+class SortedFieldIndex:
+    """
+    某个reducer类型上单个state字段的有序索引, 支持等值和范围查询,
+    值为None或者与已有值无法比较时不进入索引
+    """
+    __slots__ = ("reducer_type", "field", "_values", "_items", )
+
+    def __init__(self, reducer_type: Type[Reducer], field: str):
+        self.reducer_type = reducer_type
+        self.field = field
+        self._values: Dict[str, Tuple[Any, Reducer]] = dict()
+        self._items = SortedKeyList(key=lambda item: item[0])
+
+    def __len__(self):
+        return len(self._values)
+
+    def update(self, reducer: Reducer, value: Any):
+        self.discard(reducer)
+        if value is None:
+            return
+        item = (value, reducer.key, reducer)
+        try:
+            self._items.add(item)
+        except TypeError:
+            return
+        self._values[reducer.key] = item
+
+    def discard(self, reducer: Reducer):
+        item = self._values.pop(reducer.key, None)
+        if item is not None:
+            self._items.remove(item)
+
+    def find(self, value: Any) -> Iterator[Reducer]:
+        return self.find_range(value, value)
+
+    def find_range(self, low: Any=None, high: Any=None, inclusive: Tuple[bool, bool]=(True, True)) -> Iterator[Reducer]:
+        try:
+            items = self._items.irange_key(low, high, inclusive)
+        except TypeError:
+            return iter(())
+        return (reducer for _, _, reducer in items)
+
+
+__all__ = ["KeyIndex", "FieldIndex", "SortedFieldIndex", ]
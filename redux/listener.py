@@ -2,6 +2,8 @@ from typing import *
 
 
 class Listener:
+    __slots__ = ("key", "store", "is_binding", "unsubscribe", )
+
     def __init__(self):
         self.key = None
         self.store = None
@@ -12,17 +14,150 @@ class Listener:
         raise NotImplementedError
 
 
+class PrefixListener:
+    __slots__ = ("prefix", "store", "is_binding", )
+
+    def __init__(self):
+        self.prefix = None
+        self.store = None
+        self.is_binding = False
+
+    async def on_changed(self, key: str, changed_state: Dict[str, Any], state: Dict[str, Any]):
+        raise NotImplementedError
+
+
 class ListenerStateWrapper:
-    def __init__(self, listener: Listener, initialize_full_state=True):
+    __slots__ = ("is_synced", "listener", "fields", )
+
+    def __init__(self, listener: Listener, initialize_full_state=True, fields: Optional[Iterable[str]]=None):
         self.is_synced = not initialize_full_state
         self.listener = listener
+        self.fields = frozenset(fields) if fields is not None else None
 
     async def call_state_changed(self, changed_state, state):
+        fields = self.fields
+        if fields is not None:
+            state = {key: value for key, value in state.items() if key in fields}
+            changed_state = [key for key in changed_state if key in fields]
+            if self.is_synced and not changed_state:
+                return
         if self.is_synced:
-            await self.listener.on_changed(list(changed_state.keys()), state)
+            await self.listener.on_changed(list(changed_state), state)
         else:
             self.is_synced = True
             await self.listener.on_changed([key for key in state.keys() if not key.startswith("__")], state)
 
 
-__all__ = ["Listener", "ListenerStateWrapper", ]
+class ListenerIndex:
+    """
+    一个key上的全部订阅, 不过滤字段的订阅单独存放, 过滤字段的订阅按字段建立倒排索引,
+    每次变化只需要查看changed_state中出现的字段
+    """
+    __slots__ = ("_wrappers", "_all", "_by_field", )
+
+    def __init__(self):
+        self._wrappers: Dict[Listener, ListenerStateWrapper] = dict()
+        self._all: Dict[Listener, ListenerStateWrapper] = dict()
+        self._by_field: Dict[str, Dict[Listener, ListenerStateWrapper]] = dict()
+
+    def __len__(self):
+        return len(self._wrappers)
+
+    def __contains__(self, listener: Listener):
+        return listener in self._wrappers
+
+    def values(self):
+        return self._wrappers.values()
+
+    def setdefault(self, listener: Listener, wrapper: ListenerStateWrapper) -> ListenerStateWrapper:
+        if listener in self._wrappers:
+            return self._wrappers[listener]
+        self._wrappers[listener] = wrapper
+        if wrapper.fields is None:
+            self._all[listener] = wrapper
+        else:
+            for field in wrapper.fields:
+                self._by_field.setdefault(field, dict())[listener] = wrapper
+        return wrapper
+
+    def pop(self, listener: Listener) -> Optional[ListenerStateWrapper]:
+        wrapper = self._wrappers.pop(listener, None)
+        if wrapper is None:
+            return None
+        if wrapper.fields is None:
+            del self._all[listener]
+        else:
+            for field in wrapper.fields:
+                bucket = self._by_field[field]
+                del bucket[listener]
+                if not bucket:
+                    del self._by_field[field]
+        return wrapper
+
+    def match(self, changed_state: Dict[str, Any]) -> List[ListenerStateWrapper]:
+        matched = list(self._all.values())
+        by_field = self._by_field
+        if by_field:
+            seen = set()
+            for field in changed_state:
+                bucket = by_field.get(field)
+                if not bucket:
+                    continue
+                for listener, wrapper in bucket.items():
+                    if listener not in seen:
+                        seen.add(listener)
+                        matched.append(wrapper)
+        return matched
+
+
+class PrefixIndex:
+    """
+    前缀订阅的索引, 按前缀存放监听者, 同时记录出现过的前缀长度,
+    匹配一个key只需要按每种长度切一次key查表, 和前缀订阅的数量无关
+    """
+    __slots__ = ("_listeners", "_lengths", )
+
+    def __init__(self):
+        self._listeners: Dict[str, Dict[PrefixListener, None]] = dict()
+        self._lengths: Dict[int, int] = dict()
+
+    def __bool__(self):
+        return bool(self._listeners)
+
+    def add(self, prefix: str, listener: PrefixListener) -> bool:
+        bucket = self._listeners.get(prefix)
+        if bucket is None:
+            bucket = self._listeners[prefix] = dict()
+            self._lengths[len(prefix)] = self._lengths.get(len(prefix), 0) + 1
+        if listener in bucket:
+            return False
+        bucket[listener] = None
+        return True
+
+    def remove(self, prefix: str, listener: PrefixListener) -> bool:
+        bucket = self._listeners.get(prefix)
+        if bucket is None or listener not in bucket:
+            return False
+        del bucket[listener]
+        if not bucket:
+            del self._listeners[prefix]
+            count = self._lengths[len(prefix)] - 1
+            if count:
+                self._lengths[len(prefix)] = count
+            else:
+                del self._lengths[len(prefix)]
+        return True
+
+    def match(self, key: str) -> List[PrefixListener]:
+        matched = []
+        key_length = len(key)
+        for length in self._lengths:
+            if length > key_length:
+                continue
+            bucket = self._listeners.get(key[:length])
+            if bucket:
+                matched.extend(bucket)
+        return matched
+
+
+__all__ = ["Listener", "PrefixListener", "ListenerStateWrapper", "ListenerIndex", "PrefixIndex", ]
@@ -0,0 +1,90 @@
+from typing import *
+import asyncio
+from collections import deque
+from .action import PRIORITY_CONTROL, PRIORITY_NORMAL, PRIORITY_BULK
+
+LANE_COUNT = PRIORITY_BULK + 1
+STARVATION_LIMIT = 16
+
+
+class CellLock:
+    """
+    reducer使用的轻量锁, 没有竞争时只是一个标记, 等待队列在第一次出现竞争时才创建.
+    等待者按优先级分道(数字越小越优先), 释放时把锁交给最高优先级道的队首,
+    某一道连续被越过STARVATION_LIMIT次后轮到它一次, 每个非空的道都不会饿死
+    """
+    __slots__ = ("_locked", "_lanes", "_waiting", "_skipped", )
+
+    def __init__(self):
+        self._locked = False
+        self._lanes: Optional[List[Deque[asyncio.Future]]] = None
+        self._waiting = 0
+        self._skipped: Optional[List[int]] = None
+
+    def __repr__(self):
+        return "<CellLock: {}, waiting {}>".format("locked" if self._locked else "unlocked", self._waiting)
+
+    def locked(self) -> bool:
+        return self._locked
+
+    async def acquire(self, priority: int=PRIORITY_NORMAL) -> bool:
+        if not self._locked and not self._waiting:
+            self._locked = True
+            return True
+        if self._lanes is None:
+            self._lanes = [deque() for _ in range(LANE_COUNT)]
+            self._skipped = [0] * LANE_COUNT
+        lane = self._lanes[min(max(priority, PRIORITY_CONTROL), PRIORITY_BULK)]
+        waiter = asyncio.get_event_loop().create_future()
+        lane.append(waiter)
+        self._waiting += 1
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            elif waiter in lane:
+                lane.remove(waiter)
+                self._waiting -= 1
+            raise
+        return True
+
+    def release(self):
+        if not self._locked:
+            raise RuntimeError("Lock is not acquired.")
+        while self._waiting:
+            waiter = self._next_waiter()
+            self._waiting -= 1
+            if not waiter.done():
+                waiter.set_result(True)
+                return
+        self._locked = False
+
+    def _next_waiter(self) -> asyncio.Future:
+        return self._lanes[next_lane(self._lanes, self._skipped)].popleft()
+
+
+def next_lane(lanes: List[Deque], skipped: List[int]) -> int:
+    '''
+    选择下一个出队的道, skipped是每一道连续被越过的次数, 原地更新. 通常选择最高优先级的非空道,
+    其他非空道各自计数, 超过STARVATION_LIMIT的道中选择被越过最多的一个(相同时优先级高的优先),
+    所以每个非空道最多等待LANE_COUNT * STARVATION_LIMIT次出队就会轮到一次
+    '''
+    first = None
+    starved = None
+    for index, lane in enumerate(lanes):
+        if not lane:
+            skipped[index] = 0
+            continue
+        if first is None:
+            first = index
+            continue
+        skipped[index] += 1
+        if skipped[index] > STARVATION_LIMIT and (starved is None or skipped[index] > skipped[starved]):
+            starved = index
+    chosen = first if starved is None else starved
+    skipped[chosen] = 0
+    return chosen
+
+
+__all__ = ["CellLock", "next_lane", "LANE_COUNT", "STARVATION_LIMIT", ]
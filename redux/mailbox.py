@@ -0,0 +1,36 @@
+from typing import *
+from collections import deque
+from .action import Action, PRIORITY_CONTROL, PRIORITY_BULK
+from .lock import LANE_COUNT, next_lane
+
+
+class Mailbox:
+    """
+    一个key上等待drain任务处理的action, 和CellLock一样按优先级分道,
+    高优先级的action越过积压的低优先级action先被处理, 同一道内保持投递顺序
+    """
+    __slots__ = ("_lanes", "_size", "_skipped", )
+
+    def __init__(self):
+        self._lanes: List[Deque[Action]] = [deque() for _ in range(LANE_COUNT)]
+        self._size = 0
+        self._skipped = [0] * LANE_COUNT
+
+    def __len__(self):
+        return self._size
+
+    def __bool__(self):
+        return self._size > 0
+
+    def append(self, action: Action, priority: int):
+        self._lanes[min(max(priority, PRIORITY_CONTROL), PRIORITY_BULK)].append(action)
+        self._size += 1
+
+    def popleft(self) -> Action:
+        if not self._size:
+            raise IndexError("pop from an empty mailbox")
+        self._size -= 1
+        return self._lanes[next_lane(self._lanes, self._skipped)].popleft()
+
+
+__all__ = ["Mailbox", ]
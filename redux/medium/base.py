@@ -1,7 +1,9 @@
 from typing import *
+import time
 from ..typing import *
 from ..option import Option
 from ..action import Action
+from ..trace import TraceContext
 
 
 class MediumBase:
@@ -9,6 +11,19 @@ class MediumBase:
     def to_message(source_key: KEY, key: KEY, action: 'Action') -> Option:
         message_type = "ACTION"
         message = dict(__t__=message_type, __k__=key, __r__=source_key, **action.to_dict())
+        message["__h__"] = action.hops + 1
+        if action.id is not None:
+            message["__i__"] = action.id
+        if action.reply_to is not None:
+            message["__a__"] = action.reply_to
+        if action.trace is not None:
+            message["__c__"] = action.trace.to_list()
+        if action.deadline is not None:
+            message["__d__"] = action.deadline
+        if action.path is not None:
+            message["__p__"] = action.path
+        if action.priority is not None:
+            message["__l__"] = action.priority
         return Option(message)
 
     @staticmethod
@@ -18,6 +33,16 @@ class MediumBase:
         source_key = message.pop("__r__")
         action.source_key = source_key
         target_key = message.pop("__k__")
+        action.id = message.pop("__i__", None)
+        action.reply_to = message.pop("__a__", None)
+        action.hops = message.pop("__h__", 0)
+        action.deadline = message.pop("__d__", None)
+        action.path = message.pop("__p__", None)
+        action.priority = message.pop("__l__", None)
+        trace = message.pop("__c__", None)
+        if trace is not None:
+            action.trace = TraceContext.from_list(trace)
+            action.trace.received_time = time.time()
         return Option((target_key, action,))
 
     @staticmethod
@@ -51,7 +76,7 @@ class MediumBase:
     async def get_state(self, current_key: KEY, key: KEY, fields=None) -> Option:
         return Option(NotImplementedError())
 
-    async def subscribe(self, current_key: KEY, key: KEY, listener) -> Option:
+    async def subscribe(self, current_key: KEY, key: KEY, listener, fields=None) -> Option:
         return Option(NotImplementedError())
 
     @staticmethod
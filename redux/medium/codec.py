@@ -0,0 +1,115 @@
+from typing import *
+import zlib
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+
+CODECS: Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "zlib": (lambda binary: zlib.compress(binary, 1), zlib.decompress),
+}
+if lz4 is not None:
+    CODECS["lz4"] = (lz4.frame.compress, lz4.frame.decompress)
+
+PREFERENCE = ["lz4", "zlib"]
+
+
+def supported_codecs() -> List[str]:
+    return [name for name in PREFERENCE if name in CODECS]
+
+
+def negotiate(offered: Optional[List[str]]) -> Optional[str]:
+    '''
+    按对端给出的顺序选择第一个本地也支持的编码, 没有共同的编码时不压缩
+    '''
+    for name in offered or []:
+        if name in CODECS:
+            return name
+    return None
+
+
+def compress(codec: str, binary: bytes) -> bytes:
+    return CODECS[codec][0](binary)
+
+
+def _zlib_decompress(binary: bytes, max_length: int) -> bytes:
+    decompressor = zlib.decompressobj()
+    output = decompressor.decompress(binary, max_length + 1)
+    if len(output) > max_length:
+        raise ValueError("decompressed data exceeds {} bytes".format(max_length))
+    if not decompressor.eof:
+        raise ValueError("incomplete zlib stream")
+    return output
+
+
+def _lz4_decompress(binary: bytes, max_length: int) -> bytes:
+    decompressor = lz4.frame.LZ4FrameDecompressor()
+    output = decompressor.decompress(binary, max_length=max_length + 1)
+    if len(output) > max_length:
+        raise ValueError("decompressed data exceeds {} bytes".format(max_length))
+    if not decompressor.eof:
+        raise ValueError("incomplete lz4 frame")
+    return output
+
+
+LIMITED_DECOMPRESS: Dict[str, Callable[[bytes, int], bytes]] = {
+    "zlib": _zlib_decompress,
+}
+if lz4 is not None:
+    LIMITED_DECOMPRESS["lz4"] = _lz4_decompress
+
+
+def decompress(codec: str, binary: bytes, max_length: Optional[int]=None) -> bytes:
+    '''
+    max_length限制解压后的字节数, 超过时抛出ValueError而不是继续解压, 防止很小的压缩包解压出巨大的数据
+    '''
+    if max_length is None:
+        return CODECS[codec][1](binary)
+    return LIMITED_DECOMPRESS[codec](binary, max_length)
+
+
+class CompressionStats:
+    """
+    按编码统计压缩前后的字节数和耗时
+    """
+    __slots__ = ("_counter", )
+
+    def __init__(self):
+        self._counter: Dict[str, Dict[str, float]] = dict()
+
+    def _get(self, codec: str) -> Dict[str, float]:
+        counter = self._counter.get(codec)
+        if counter is None:
+            counter = self._counter[codec] = dict(
+                compressed=0, raw_bytes=0, compressed_bytes=0, compress_time=0.0,
+                decompressed=0, decompress_time=0.0, offloaded=0, decompress_offloaded=0,
+            )
+        return counter
+
+    def record_compress(self, codec: str, raw_size: int, compressed_size: int, elapsed: float, offloaded=False):
+        counter = self._get(codec)
+        counter["compressed"] += 1
+        counter["raw_bytes"] += raw_size
+        counter["compressed_bytes"] += compressed_size
+        counter["compress_time"] += elapsed
+        if offloaded:
+            counter["offloaded"] += 1
+
+    def record_decompress(self, codec: str, elapsed: float, offloaded=False):
+        counter = self._get(codec)
+        counter["decompressed"] += 1
+        counter["decompress_time"] += elapsed
+        if offloaded:
+            counter["decompress_offloaded"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        result = dict()
+        for codec, counter in self._counter.items():
+            counter = dict(counter)
+            counter["ratio"] = counter["compressed_bytes"] / counter["raw_bytes"] if counter["raw_bytes"] else None
+            result[codec] = counter
+        return result
+
+
+__all__ = ["CODECS", "supported_codecs", "negotiate", "compress", "decompress", "CompressionStats", ]
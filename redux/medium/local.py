@@ -10,6 +10,8 @@ from ..store import Store
 
 
 class LocalMediumListener(Listener):
+    __slots__ = ("reducer", "listener_reducer", "reducer_listener", )
+
     def __init__(self, reducer, listener_reducer, listener):
         super(LocalMediumListener, self).__init__()
         self.reducer = reducer
@@ -32,10 +34,13 @@ class LocalMedium(MediumBase):
     async def send(self, current_key: KEY, key: KEY, action: Action) -> Option:
         if current_key == key:
             return Option(SameKeyError())
-        message = LocalMedium.to_message(current_key, key, action).unwrap()
-        source = LocalMedium(self.store)
-        target_key, action = LocalMedium.from_message(source, message).unwrap()
-        asyncio.ensure_future(self.store.dispatch(target_key, action))
+        store = self.store
+        action = action.hop(current_key, self)
+        delay = store.admission_delay(key, action)
+        if delay is None:
+            return Option(OverloadError())
+        if not store.post(key, action, delay):
+            return Option(OverloadError())
         return Option.none()
 
     async def get_state(self, current_key: KEY, key: KEY, fields=None) -> Option:
@@ -48,7 +53,7 @@ class LocalMedium(MediumBase):
         else:
             return Option(state)
 
-    async def subscribe(self, current_key: KEY, key: KEY, listener: Listener) -> Option:
+    async def subscribe(self, current_key: KEY, key: KEY, listener: Listener, fields=None) -> Option:
         subscribe_key = ("Local", current_key)
         listener_key = ("Local", key)
         reducer_opt = await self.store.get_or_create_cell(key, None)
@@ -61,7 +66,7 @@ class LocalMedium(MediumBase):
         listener_reducer = listener_reducer_opt.unwrap()
         if subscribe_key in reducer.subscribe_set:
             return Option(KeyError())
-        listener_opt = await self.store.subscribe(key, LocalMediumListener(reducer, listener_reducer, listener))
+        listener_opt = await self.store.subscribe(key, LocalMediumListener(reducer, listener_reducer, listener), fields)
         if listener_opt.is_none:
             return Option(KeyError())
         reducer.subscribe_set.add(subscribe_key)
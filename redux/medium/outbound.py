@@ -0,0 +1,81 @@
+from typing import *
+import time
+from collections import deque
+
+
+class OutboundBuffer:
+    """
+    节点断线期间暂存发往它的消息, 按条数, 字节数和存放时间三者限制, 超出限制的新消息直接拒绝,
+    超过max_age的旧消息在写入和取出时丢弃. 重连后按原顺序整批取出
+    """
+    __slots__ = ("max_count", "max_bytes", "max_age", "_items", "_bytes", "dropped", "expired", )
+
+    def __init__(self, max_count=1000, max_bytes=1024 * 1024, max_age=10.0):
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._items: Deque[Tuple[float, bytes]] = deque()
+        self._bytes = 0
+        self.dropped = 0
+        self.expired = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __bool__(self):
+        return bool(self._items)
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    def oldest_age(self, now: Optional[float]=None) -> float:
+        if not self._items:
+            return 0.0
+        return (now if now is not None else time.monotonic()) - self._items[0][0]
+
+    def expire(self, now: Optional[float]=None):
+        now = now if now is not None else time.monotonic()
+        items = self._items
+        while items and now - items[0][0] > self.max_age:
+            _, binary = items.popleft()
+            self._bytes -= len(binary)
+            self.expired += 1
+
+    def push(self, binary: bytes) -> bool:
+        now = time.monotonic()
+        self.expire(now)
+        if len(self._items) >= self.max_count or self._bytes + len(binary) > self.max_bytes:
+            self.dropped += 1
+            return False
+        self._items.append((now, binary))
+        self._bytes += len(binary)
+        return True
+
+    def drain(self) -> List[bytes]:
+        self.expire()
+        items = [binary for _, binary in self._items]
+        self._items.clear()
+        self._bytes = 0
+        return items
+
+    def requeue(self, items: List[bytes]):
+        '''
+        整批发送失败时放回队首, 保持原来的顺序
+        '''
+        now = time.monotonic()
+        for binary in reversed(items):
+            self._items.appendleft((now, binary))
+            self._bytes += len(binary)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(
+            count=len(self._items),
+            bytes=self._bytes,
+            age=self.oldest_age(),
+            dropped=self.dropped,
+            expired=self.expired,
+        )
+
+
+__all__ = ["OutboundBuffer", ]
@@ -1,11 +1,15 @@
 from typing import *
 import json
+import time
+import random
 import asyncio
 import msgpack
 import websockets
 import urllib.parse
 from collections import defaultdict
 from .base import MediumBase
+from .outbound import OutboundBuffer
+from .codec import CODECS, supported_codecs, negotiate, compress, decompress, CompressionStats
 from ..typing import *
 from ..error import *
 from ..option import Option
@@ -43,14 +47,33 @@ class ConnectionDetail:
         # client side
         self.is_client = False
         self.url = None
+        self.reconnect_attempts = 0
+        self.codec: Optional[str] = None
         self.subscribe_keys = []
         self.state_pick_dict: Dict[KEY, asyncio.Future] = dict()
         self.state_sub_dict: Dict[KEY, Dict[KEY, asyncio.Future]] = defaultdict(dict)
         self.state_sub_set: Dict[KEY, Set[KEY]] = defaultdict(set)
+        self.last_seen = 0.0
+        self.rtt: Optional[float] = None
+        # 对端回复过PONG才说明它支持心跳, 旧版本节点不回复PONG, 不能据此判断失联
+        self.heartbeat_acked = False
         # server side
         self.is_server = False
         self.listeners = []
 
+    RTT_SMOOTHING = 0.125
+
+    def record_rtt(self, sample: float):
+        if self.rtt is None:
+            self.rtt = sample
+        else:
+            self.rtt += (sample - self.rtt) * self.RTT_SMOOTHING
+
+    def fail_picks(self):
+        for future in self.state_pick_dict.values():
+            if not future.done():
+                future.set_exception(ConnectionError())
+
     def __repr__(self):
         if self.is_server:
             return f"<ConnectionDetail: Server({self.socket})>"
@@ -60,7 +83,41 @@ class ConnectionDetail:
             return f"<ConnectionDetail: Unknown({self.socket})>"
 
 
+class PeerPool:
+    """
+    到同一个节点的一组客户端连接, action按目标key固定到bulk以外的一条连接上, 同一个key的action按发送顺序到达,
+    状态拉取走最后一条(bulk)连接, 大的PICKACK不会阻塞action. 首选的连接断开时按顺序换用下一条已连接的连接
+    """
+    __slots__ = ("url", "details", )
+
+    def __init__(self, url: KEY, details: List[ConnectionDetail]):
+        self.url = url
+        self.details = details
+
+    def __len__(self):
+        return len(self.details)
+
+    @property
+    def bulk(self) -> ConnectionDetail:
+        return self.details[-1]
+
+    def select(self, key: Optional[KEY]=None, bulk=False) -> Optional[ConnectionDetail]:
+        details = self.details
+        count = len(details)
+        if bulk or count == 1:
+            start = count - 1
+        else:
+            start = hash(key) % (count - 1)
+        for offset in range(count):
+            detail = details[(start + offset) % count]
+            if detail.is_connected:
+                return detail
+        return None
+
+
 class EntryListener(Listener):
+    __slots__ = ("manager", "socket", )
+
     def __init__(self, manager: 'RemoteManager', socket):
         super(EntryListener, self).__init__()
         self.manager = manager
@@ -73,13 +130,45 @@ class EntryListener(Listener):
 @singleton
 class RemoteManager:
     RECONNECT_TIMEOUT = 1.0
+    RECONNECT_MAX = 30.0
+    OUTBOUND_LIMITS = dict(max_count=1000, max_bytes=1024 * 1024, max_age=10.0)
+    HEARTBEAT_INTERVAL: Optional[float] = 5.0
+    HEARTBEAT_MISSES = 3
+    PICK_TIMEOUT = 0.1
+    COMPRESS_THRESHOLD = 16 * 1024
+    COMPRESS_EXECUTOR_THRESHOLD = 1024 * 1024
+    DECOMPRESS_LIMIT = 2 ** 20
+    POOL_SIZE = 1
 
     def __init__(self):
         self.client_connections: Dict[KEY, ConnectionDetail] = dict()
         self.server_connections: Dict[KEY, ConnectionDetail] = dict()
+        self.client_pools: Dict[KEY, PeerPool] = dict()
+        self.pool_size: Dict[KEY, int] = dict()
+        self._connecting: Dict[KEY, asyncio.Future] = dict()
+        self.outbound: Dict[KEY, OutboundBuffer] = dict()
+        self._flushing: Set[KEY] = set()
+        self.compression = CompressionStats()
         self.client_url = set()
         self.entry_reducer = set()
 
+    def add_peer(self, url: KEY, pool_size: Optional[int]=None):
+        '''
+        登记可以连接的节点, pool_size是到这个节点的连接数, 不指定时使用POOL_SIZE.
+        连接数大于1时最后一条连接专门用于状态拉取
+        '''
+        self.client_url.add(url)
+        if pool_size is not None:
+            self.pool_size[url] = max(1, pool_size)
+
+    async def warm_up(self, store: Store, url_list: Optional[Iterable[KEY]]=None) -> Dict[KEY, Option]:
+        '''
+        启动时预先建立到各节点的连接池, 避免第一批action承担建连的延迟
+        '''
+        url_list = list(self.client_url if url_list is None else url_list)
+        results = await asyncio.gather(*[self.client(url, store) for url in url_list])
+        return dict(zip(url_list, results))
+
     async def serve(self, host, port, store: Store, **kwargs) -> Option:
         try:
             coro = lambda websocket, path: self.on_new_connection(websocket, path, store)
@@ -113,19 +202,141 @@ class RemoteManager:
             return Option(KeyError())
         if url in self.client_connections:
             return Option(self.client_connections[url])
-        socket_opt = await self.connect(url)
-        if socket_opt.is_error:
-            return socket_opt
-        websocket = socket_opt.unwrap()
-        detail = ConnectionDetail()
-        detail.is_connected = True
-        detail.socket = websocket
-        detail.is_client = True
-        detail.url = url
+        if url in self._connecting:
+            return await asyncio.shield(self._connecting[url])
+        future = self._connecting[url] = asyncio.get_event_loop().create_future()
+        try:
+            result = await self._connect_pool(url, store)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._connecting[url]
+
+    async def _connect_pool(self, url, store) -> Option:
+        pool_size = self.pool_size.get(url, self.POOL_SIZE)
+        socket_opts = await asyncio.gather(*[self.connect(url) for _ in range(pool_size)])
+        for socket_opt in socket_opts:
+            if socket_opt.is_error:
+                for opened in socket_opts:
+                    if not opened.is_error:
+                        await opened.unwrap().close()
+                return socket_opt
+        details = []
+        for socket_opt in socket_opts:
+            detail = ConnectionDetail()
+            detail.is_connected = True
+            detail.socket = socket_opt.unwrap()
+            detail.is_client = True
+            detail.url = url
+            details.append(detail)
         self.client_url.add(url)
-        self.client_connections[url] = detail
-        asyncio.ensure_future(self.on_client_connected(detail, store))
-        return Option(detail)
+        self.client_pools[url] = PeerPool(url, details)
+        self.client_connections[url] = details[0]
+        for detail in details:
+            asyncio.ensure_future(self.on_client_connected(detail, store))
+        return Option(details[0])
+
+    def select_connection(self, url: KEY, key: Optional[KEY]=None, bulk=False) -> Optional[ConnectionDetail]:
+        pool = self.client_pools.get(url)
+        if pool is not None:
+            return pool.select(key, bulk)
+        return self.server_connections.get(url)
+
+    async def send_pooled(self, url: KEY, websocket, binary: bytes, key: Optional[KEY]=None) -> Option:
+        '''
+        发往客户端连接池的消息在节点断线或者还有积压时进入outbound缓冲, 重连后按顺序补发
+        '''
+        pool = self.client_pools.get(url)
+        if pool is not None and (url in self._flushing or self.outbound.get(url)):
+            buffer_opt = self.buffer_outbound(url, binary)
+            detail = pool.select(bulk=True)
+            if detail is not None and url not in self._flushing:
+                await self.flush_outbound(url, detail)
+            return buffer_opt
+        detail = self.select_connection(url, key)
+        if detail is None or not detail.is_connected:
+            if pool is not None:
+                return self.buffer_outbound(url, binary)
+            return await self.send_data(websocket, binary)
+        send_opt = await self.send_data(detail.socket, binary)
+        if send_opt.is_error and pool is not None:
+            for other in pool.details:
+                if other is detail or not other.is_connected:
+                    continue
+                send_opt = await self.send_data(other.socket, binary)
+                if not send_opt.is_error:
+                    return send_opt
+            return self.buffer_outbound(url, binary)
+        return send_opt
+
+    def buffer_outbound(self, url: KEY, binary: bytes) -> Option:
+        if url not in self.client_url:
+            return Option(ConnectionError())
+        buffer = self.outbound.get(url)
+        if buffer is None:
+            buffer = self.outbound[url] = OutboundBuffer(**self.OUTBOUND_LIMITS)
+        if not buffer.push(binary):
+            return Option(OverloadError())
+        return Option.none()
+
+    async def flush_outbound(self, url: KEY, detail: ConnectionDetail) -> Option:
+        '''
+        把缓冲整批补发出去, 补发期间新的消息继续进入缓冲, 一直发送到缓冲为空, 保证顺序
+        '''
+        buffer = self.outbound.get(url)
+        if not buffer or url in self._flushing:
+            return Option.none()
+        self._flushing.add(url)
+        try:
+            while buffer:
+                items = buffer.drain()
+                if not items:
+                    break
+                binary = msgpack.dumps(dict(__t__="BATCH", __b__=items), use_bin_type=True)
+                send_opt = await self.send_data(detail.socket, binary)
+                if send_opt.is_error:
+                    buffer.requeue(items)
+                    return send_opt
+            return Option.none()
+        finally:
+            self._flushing.discard(url)
+
+    def peer_state(self, url: KEY) -> Optional[Dict[str, Any]]:
+        '''
+        节点的连接和outbound缓冲状态, 调用方可以据此决定是否改走其他路径
+        '''
+        pool = self.client_pools.get(url)
+        if pool is None:
+            return None
+        buffer = self.outbound.get(url) or OutboundBuffer(**self.OUTBOUND_LIMITS)
+        return dict(
+            connections=len(pool),
+            connected=sum(1 for detail in pool.details if detail.is_connected),
+            reconnect_attempts=max(detail.reconnect_attempts for detail in pool.details),
+            rtt=self.rtt(url),
+            codec=pool.details[0].codec,
+            outbound=buffer.stats(),
+        )
+
+    def rtt(self, url: KEY) -> Optional[float]:
+        '''
+        到节点的平滑往返时间(秒), 取连接池中已连接且有采样的连接的最小值, 还没有采样时为None
+        '''
+        pool = self.client_pools.get(url)
+        details = pool.details if pool is not None else [self.server_connections.get(url)]
+        samples = [detail.rtt for detail in details if detail is not None and detail.is_connected and detail.rtt is not None]
+        return min(samples) if samples else None
+
+    def reconnect_delay(self, attempt: int) -> float:
+        '''
+        指数退避加抖动, 取上限的一半再加上随机的另一半, 避免节点重启后所有客户端在同一时刻重连
+        '''
+        ceiling = min(self.RECONNECT_MAX, self.RECONNECT_TIMEOUT * 2 ** max(0, attempt - 1))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
 
     async def on_new_entry(self, websocket, path, store: Store, reducer_list: List[Type]):
         unsubscribe = None
@@ -161,8 +372,15 @@ class RemoteManager:
                 break
             action = Action.from_data(binary_opt.unwrap(), json.loads)
             action.medium = medium
-            asyncio.ensure_future(store.dispatch(key, action))
+            delay = store.admission_delay(key, action, websocket)
+            if delay is None:
+                if store.admission.should_disconnect:
+                    break
+                continue
+            store.post(key, action, delay)
         unsubscribe()
+        if store.admission is not None:
+            store.admission.forget(websocket)
 
     async def on_new_connection(self, websocket, path, store: Store):
         detail = ConnectionDetail()
@@ -171,98 +389,19 @@ class RemoteManager:
         detail.is_server = True
         connection_name = "@ws://{}:{}".format(*websocket.remote_address)
         self.server_connections[connection_name] = detail
-        while True:
-            read_data = self.read_data
-            data_opt = await read_data(websocket)
-            if data_opt.is_error:
-                break
-            binary = data_opt.unwrap()
-            try:
-                info = detail.loads(binary)
-            except Exception as e:
-                break
-            if type(info) is not dict or "__t__" not in info:
-                break
-            message_type = info.pop("__t__")
-            if "__k__" not in info:
-                break
-            if message_type == "ACTION":
-                target_key, action = MediumBase.from_message(RemoteMedium(connection_name, websocket), info).unwrap()
-                asyncio.ensure_future(store.dispatch(target_key, action))
-            elif message_type == "SUBSCRIBE":
-                pass
-            elif message_type == "UNSUBSCRIBE":
-                pass
-            elif message_type == "STATE":
-                pass
-            elif message_type == "PICKACK":
-                message_opt = MediumBase.from_pick_ack_message(info)
-                target_key, state = message_opt.unwrap()
-                if target_key in detail.state_pick_dict:
-                    if state is None:
-                        detail.state_pick_dict[target_key].set_result(NoneError())
-                    else:
-                        detail.state_pick_dict[target_key].set_result(state)
-            elif message_type == "PICK":
-                source_key, target_key, fields = MediumBase.from_pick_message(info).unwrap()
-                state = store[target_key]
-                state = MediumBase.state_filter(state, fields)
-                message = MediumBase.to_pick_ack_message(source_key, state).unwrap()
-                binary = detail.dumps(message)
-                send_opt = await self.send_data(websocket, binary)
-                if send_opt.is_error:
-                    break
+        await self.receive(detail, connection_name, store)
         detail.is_connected = False
         del self.server_connections[connection_name]
+        if store.admission is not None:
+            store.admission.forget(connection_name)
         try:
             await websocket.close()
         finally:
             pass
 
     async def on_client_connected(self, detail: ConnectionDetail, store: Store):
-        while True:
-            read_data = self.read_data
-            data_opt = await read_data(detail.socket)
-            if data_opt.is_error:
-                if type(data_opt.error) is asyncio.CancelledError:
-                    return
-                else:
-                    break
-            binary = data_opt.unwrap()
-            try:
-                info = detail.loads(binary)
-            except Exception as e:
-                break
-            if not isinstance(info, dict) or "__t__" not in info:
-                break
-            message_type = info.pop("__t__")
-            if "__k__" not in info:
-                break
-            if message_type == "ACTION":
-                message_opt = MediumBase.from_message(RemoteMedium(detail.url, detail.socket), info)
-                target_key, action = message_opt.unwrap()
-                asyncio.ensure_future(store.dispatch(target_key, action))
-            elif message_type == "UNSUBSCRIBE":
-                pass
-            elif message_type == "STATE":
-                pass
-            elif message_type == "PICKACK":
-                message_opt = MediumBase.from_pick_ack_message(info)
-                target_key, state = message_opt.unwrap()
-                if target_key in detail.state_pick_dict:
-                    if state is None:
-                        detail.state_pick_dict[target_key].set_result(NoneError())
-                    else:
-                        detail.state_pick_dict[target_key].set_result(state)
-            elif message_type == "PICK":
-                source_key, target_key, fields = MediumBase.from_pick_message(info).unwrap()
-                state = store[target_key]
-                state = MediumBase.state_filter(state, fields)
-                message = MediumBase.to_pick_ack_message(source_key, state).unwrap()
-                binary = detail.dumps(message)
-                send_opt = await self.send_data(detail.socket, binary)
-                if send_opt.is_error:
-                    break
+        if await self.receive(detail, detail.url, store):
+            return
         detail.is_connected = False
         try:
             await detail.socket.close()
@@ -270,6 +409,179 @@ class RemoteManager:
             pass
         await self.client_to_offline(detail, store)
 
+    async def receive(self, detail: ConnectionDetail, connection_name: KEY, store: Store) -> bool:
+        '''
+        服务端和客户端连接共用的接收循环, 连接断开后失败掉所有等待中的状态拉取, 返回True表示接收任务被取消
+        '''
+        heartbeat = None
+        detail.heartbeat_acked = False
+        if self.HEARTBEAT_INTERVAL:
+            heartbeat = asyncio.ensure_future(self.heartbeat(detail))
+        if detail.is_client:
+            detail.codec = None
+            binary = detail.dumps(dict(__t__="HELLO", __k__=None, __z__=supported_codecs()))
+            await self.send_data(detail.socket, binary)
+        try:
+            while True:
+                data_opt = await self.read_data(detail.socket)
+                if data_opt.is_error:
+                    return type(data_opt.error) is asyncio.CancelledError
+                detail.last_seen = time.monotonic()
+                try:
+                    info = detail.loads(data_opt.unwrap())
+                except Exception as e:
+                    return False
+                if not isinstance(info, dict) or "__t__" not in info:
+                    return False
+                if not await self.on_message(detail, connection_name, info, store):
+                    return False
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+            detail.fail_picks()
+
+    async def on_message(self, detail: ConnectionDetail, connection_name: KEY, info: Dict, store: Store) -> bool:
+        '''
+        处理一条消息, 返回False表示需要断开连接
+        '''
+        message_type = info.pop("__t__")
+        if message_type == "PING":
+            binary = detail.dumps(dict(__t__="PONG", __n__=info.get("__n__")))
+            return not (await self.send_data(detail.socket, binary)).is_error
+        if message_type == "PONG":
+            detail.heartbeat_acked = True
+            detail.record_rtt(time.monotonic() - info.get("__n__", 0))
+            return True
+        if message_type == "BATCH":
+            return await self.on_batch(detail, info, connection_name, store)
+        if message_type == "PACKED":
+            return await self.on_packed(detail, info, connection_name, store)
+        if message_type == "HELLO":
+            if detail.is_client:
+                detail.codec = negotiate([info.get("__z__")])
+                return True
+            detail.codec = negotiate(info.get("__z__"))
+            binary = detail.dumps(dict(__t__="HELLO", __k__=None, __z__=detail.codec))
+            return not (await self.send_data(detail.socket, binary)).is_error
+        if "__k__" not in info:
+            return False
+        if message_type == "ACTION":
+            return await self.on_action(detail, info, connection_name, store)
+        elif message_type == "PICKACK":
+            target_key, state = MediumBase.from_pick_ack_message(info).unwrap()
+            future = detail.state_pick_dict.get(target_key)
+            if future is not None and not future.done():
+                future.set_result(NoneError() if state is None else state)
+        elif message_type == "PICK":
+            source_key, target_key, fields = MediumBase.from_pick_message(info).unwrap()
+            state = store[target_key]
+            state = MediumBase.state_filter(state, fields)
+            message = MediumBase.to_pick_ack_message(source_key, state).unwrap()
+            binary = await self.pack(detail, detail.dumps(message))
+            send_opt = await self.send_data(detail.socket, binary)
+            if send_opt.is_error:
+                return False
+        return True
+
+    async def pack(self, detail: ConnectionDetail, binary: bytes) -> bytes:
+        '''
+        连接协商出编码后, 超过COMPRESS_THRESHOLD的消息压缩后包装成PACKED发送,
+        超过COMPRESS_EXECUTOR_THRESHOLD时在线程池中压缩, 不阻塞事件循环, 压缩后没有变小时仍然发送原文
+        '''
+        codec = detail.codec
+        if codec is None or len(binary) < self.COMPRESS_THRESHOLD:
+            return binary
+        start = time.perf_counter()
+        offloaded = len(binary) >= self.COMPRESS_EXECUTOR_THRESHOLD
+        if offloaded:
+            compressed = await asyncio.get_event_loop().run_in_executor(None, compress, codec, binary)
+        else:
+            compressed = compress(codec, binary)
+        self.compression.record_compress(codec, len(binary), len(compressed), time.perf_counter() - start, offloaded)
+        if len(compressed) >= len(binary):
+            return binary
+        return msgpack.dumps(
+            dict(__t__="PACKED", __k__=None, __z__=codec, __o__=len(binary), __b__=compressed), use_bin_type=True,
+        )
+
+    def decompress_limit(self, detail: ConnectionDetail) -> int:
+        '''
+        解压后的大小不能超过连接本身允许的单条消息大小, 连接不限制时使用websockets的默认值
+        '''
+        return getattr(detail.socket, "max_size", None) or self.DECOMPRESS_LIMIT
+
+    async def on_packed(self, detail: ConnectionDetail, info: Dict, connection_name: KEY, store: Store) -> bool:
+        '''
+        解压输出按decompress_limit截断, 超出的视为非法消息; 发送方声明的原始大小(__o__)
+        超过COMPRESS_EXECUTOR_THRESHOLD时在线程池中解压
+        '''
+        codec = info.get("__z__")
+        if codec not in CODECS:
+            return False
+        limit = self.decompress_limit(detail)
+        size = info.get("__o__")
+        if isinstance(size, int) and size > limit:
+            return False
+        offloaded = isinstance(size, int) and size >= self.COMPRESS_EXECUTOR_THRESHOLD
+        start = time.perf_counter()
+        try:
+            if offloaded:
+                binary = await asyncio.get_event_loop().run_in_executor(
+                    None, decompress, codec, info.get("__b__"), limit,
+                )
+            else:
+                binary = decompress(codec, info.get("__b__"), limit)
+            info = detail.loads(binary)
+        except Exception as e:
+            return False
+        self.compression.record_decompress(codec, time.perf_counter() - start, offloaded)
+        if not isinstance(info, dict) or info.get("__t__") in (None, "PACKED"):
+            return False
+        return await self.on_message(detail, connection_name, info, store)
+
+    async def on_action(self, detail: ConnectionDetail, info: Dict, connection_name: KEY, store: Store) -> bool:
+        target_key, action = MediumBase.from_message(RemoteMedium(connection_name, detail.socket), info).unwrap()
+        delay = store.admission_delay(target_key, action, connection_name)
+        if delay is None:
+            return not store.admission.should_disconnect
+        store.post(target_key, action, delay)
+        return True
+
+    async def on_batch(self, detail: ConnectionDetail, info: Dict, connection_name: KEY, store: Store) -> bool:
+        '''
+        客户端重连后补发的一批action, 按原顺序投递
+        '''
+        for binary in info.get("__b__") or []:
+            try:
+                message = detail.loads(binary)
+            except Exception as e:
+                return False
+            if not isinstance(message, dict) or message.pop("__t__", None) != "ACTION" or "__k__" not in message:
+                continue
+            if not await self.on_action(detail, message, connection_name, store):
+                return False
+        return True
+
+    async def heartbeat(self, detail: ConnectionDetail):
+        '''
+        每HEARTBEAT_INTERVAL发送一次PING, 连续HEARTBEAT_MISSES个间隔没有收到任何数据时认为对端已经失联,
+        直接中断底层连接, 不等待半开的TCP连接超时. 对端至少回复过一次PONG之后才启用失联判断,
+        不会回复PONG的旧版本节点只发送PING, 空闲时不会被断开
+        '''
+        interval = self.HEARTBEAT_INTERVAL
+        detail.last_seen = time.monotonic()
+        while detail.is_connected:
+            await asyncio.sleep(interval)
+            if detail.heartbeat_acked and time.monotonic() - detail.last_seen > interval * self.HEARTBEAT_MISSES:
+                detail.is_connected = False
+                detail.fail_picks()
+                transport = getattr(detail.socket, "transport", None)
+                if transport is not None:
+                    transport.abort()
+                return
+            binary = detail.dumps(dict(__t__="PING", __k__=None, __n__=time.monotonic()))
+            await self.send_data(detail.socket, binary)
+
     async def client_to_offline(self, detail: ConnectionDetail, store: Store):
         detail.subscribe_keys.clear()
         asyncio.ensure_future(self.on_client_offline(detail, store))
@@ -279,18 +591,16 @@ class RemoteManager:
         while True:
             if url not in self.client_url:
                 break
-            wait_coro = asyncio.sleep(self.RECONNECT_TIMEOUT, Option(TimeoutError()))
-            work_coro = self.connect(url, self.RECONNECT_TIMEOUT)
-            fs = [wait_coro, work_coro]
-            done, pending = await asyncio.wait(fs, return_when=asyncio.FIRST_COMPLETED)
-            socket_opt = done.pop().result()
+            socket_opt = await self.connect(url, self.RECONNECT_TIMEOUT)
             if not socket_opt.is_error:
+                detail.reconnect_attempts = 0
+                detail.socket = socket_opt.unwrap()
+                await self.flush_outbound(url, detail)
                 detail.is_connected = True
-                websocket = socket_opt.unwrap()
-                detail.socket = websocket
                 asyncio.ensure_future(self.on_client_connected(detail, store))
                 break
-            await asyncio.wait(fs, return_when=asyncio.ALL_COMPLETED)
+            detail.reconnect_attempts += 1
+            await asyncio.sleep(self.reconnect_delay(detail.reconnect_attempts))
 
     async def connect(self, url, timeout=1.0):
         try:
@@ -334,25 +644,23 @@ class RemoteMedium(MediumBase):
     async def send(self, current_key: KEY, key: KEY, action: Action) -> Option:
         message = RemoteMedium.to_message(current_key, key, action).unwrap()
         binary = msgpack.dumps(message)
-        return await RemoteManager().send_data(self.websocket, binary)
+        return await RemoteManager().send_pooled(self.url, self.websocket, binary, key)
 
     async def get_state(self, current_key: KEY, key: KEY, fields=None):
         manager = RemoteManager()
-        if self.url in manager.client_connections:
-            detail = manager.client_connections[self.url]
-        elif self.url in manager.server_connections:
-            detail = manager.server_connections[self.url]
-        else:
+        detail = manager.select_connection(self.url, bulk=True)
+        if detail is None:
             return Option(NoneError())
+        websocket = detail.socket if detail.is_client else self.websocket
         message = MediumBase.to_pick_message(current_key, key, fields).unwrap()
         try:
             future = asyncio.Future()
             detail.state_pick_dict[current_key] = future
             binary = msgpack.dumps(message)
-            send_opt = await manager.send_data(self.websocket, binary)
+            send_opt = await manager.send_data(websocket, binary)
             if send_opt.is_error:
                 return send_opt
-            await asyncio.wait_for(future, 0.1)
+            await asyncio.wait_for(future, manager.PICK_TIMEOUT)
             result = future.result()
             return Option(result)
         except Exception as e:
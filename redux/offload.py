@@ -0,0 +1,43 @@
+from typing import *
+import asyncio
+import msgpack
+from .action import Action
+
+
+def cpu_bound(func):
+    '''
+    标记一个slice为计算密集型, reduce时会把(state slice, action)用msgpack编码后交给store的进程池执行,
+    slice需要是模块级函数(可以被pickle), state和action参数需要能被msgpack序列化
+    '''
+    func.__redux_cpu_bound__ = True
+    return func
+
+
+def is_cpu_bound(func) -> bool:
+    return getattr(func, "__redux_cpu_bound__", False)
+
+
+_worker_loop = None
+
+
+def run_slice(func, payload: bytes) -> bytes:
+    '''
+    在子进程中执行, 协程slice使用子进程自己的事件循环驱动
+    '''
+    global _worker_loop
+    sub_state, action_dict = msgpack.loads(payload, encoding="utf8")
+    result = func(state=sub_state, action=Action.from_dict(action_dict))
+    if asyncio.iscoroutine(result):
+        if _worker_loop is None:
+            _worker_loop = asyncio.new_event_loop()
+        result = _worker_loop.run_until_complete(result)
+    return msgpack.dumps(result)
+
+
+async def offload_slice(executor, func, sub_state, action: Action):
+    payload = msgpack.dumps([sub_state, action.to_dict()])
+    result = await asyncio.get_event_loop().run_in_executor(executor, run_slice, func, payload)
+    return msgpack.loads(result, encoding="utf8")
+
+
+__all__ = ["cpu_bound", "is_cpu_bound", "run_slice", "offload_slice", ]
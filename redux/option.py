@@ -5,6 +5,8 @@ _OT = TypeVar('_OT')
 
 
 class Option:
+    __slots__ = ("_v", )
+
     def __init__(self, v: _OT=None):
         self._v = v
 
@@ -33,7 +35,7 @@ class Option:
 
     @staticmethod
     def none() -> 'Option':
-        return Option()
+        return _NONE
 
     def __repr__(self):
         if self.is_error:
@@ -41,4 +43,7 @@ class Option:
         return "<Option: {}>".format(self._v)
 
 
+_NONE = Option()
+
+
 __all__ = ["Option"]
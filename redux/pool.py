@@ -0,0 +1,44 @@
+from typing import *
+from .action import Action
+
+
+class ReducerPool:
+    """
+    同一个key下的多个无状态reducer实例, 各自持有自己的锁, 所以互不相关的action可以并发执行.
+    指定partition时, 分区值相同的action总是落在同一个实例上(保持顺序), 否则选择进行中action最少的实例
+    """
+    __slots__ = ("members", "partition", "load", )
+
+    def __init__(self, members: list, partition: Union[str, Callable[[Action], Hashable], None]=None):
+        self.members = members
+        self.partition = partition
+        self.load = [0] * len(members)
+
+    def __len__(self):
+        return len(self.members)
+
+    def _partition_value(self, action: Action):
+        partition = self.partition
+        if partition is None:
+            return None
+        if callable(partition):
+            return partition(action)
+        return action.arguments.get(partition)
+
+    def select(self, action: Action) -> int:
+        value = self._partition_value(action)
+        if value is not None:
+            return hash(value) % len(self.members)
+        load = self.load
+        return load.index(min(load))
+
+    def acquire(self, action: Action):
+        index = self.select(action)
+        self.load[index] += 1
+        return index, self.members[index]
+
+    def release(self, index: int):
+        self.load[index] -= 1
+
+
+__all__ = ["ReducerPool", ]
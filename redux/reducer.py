@@ -1,26 +1,117 @@
 from typing import *
 from .typing import *
 import asyncio
+import weakref
+import functools
+from types import FunctionType, MappingProxyType, CoroutineType
+from collections import defaultdict
 from .error import *
 from .option import Option
-from .action import Action
+from .action import Action, PRIORITY_CONTROL, PRIORITY_NORMAL
 from .recycle_option import *
 from .medium import MediumBase
-from .combine_message import CombineMessage
+from .combine_message import CombineMessage, CombineIndex
+from .offload import is_cpu_bound, offload_slice
+from .lock import CellLock
 
 
-class ReducerDetail:
-    def __init__(self):
-        self.locker = asyncio.Lock()
-        self.last_idle_key = None
-        self.is_new = True
-        self.subscribe_set = set()
-        self.listener_dict = set()
+def selector(*inputs: str):
+    '''
+    声明一个派生字段, 字段名即方法名, 方法签名为 def name(self, state) -> value,
+    只有inputs中的slice出现在changed_state(或者被mark_changed标记)时才会重新计算
+    '''
+    def wrap(func):
+        func.__redux_selector_inputs__ = frozenset(inputs)
+        return func
+    return wrap
+
+
+SLICE_SYNC = 0
+SLICE_ASYNC = 1
+SLICE_OFFLOAD = 2
+_slice_kind_cache = weakref.WeakKeyDictionary()
+_EMPTY_STATE: Dict[KEY, Any] = dict()
+_EMPTY_MAPPING = MappingProxyType(dict())
+MAPPING_CACHE_SIZE = 64
+IDLE_REDUCER_BYTES = 512
+
+
+def slice_kind(func) -> int:
+    '''
+    判断slice是普通函数, 协程函数还是cpu_bound, 结果按函数对象缓存, 每个函数只判断一次.
+    functools.partial按被包装的函数判断; 返回协程的普通函数(比如lambda)无法事先识别,
+    按普通函数处理, 执行时发现返回值是协程再await
+    '''
+    try:
+        return _slice_kind_cache[func]
+    except (KeyError, TypeError):
+        pass
+    target = func
+    while isinstance(target, functools.partial):
+        target = target.func
+    if is_cpu_bound(func) or is_cpu_bound(target):
+        kind = SLICE_OFFLOAD
+    elif asyncio.iscoroutinefunction(target) or asyncio.iscoroutinefunction(getattr(target, "__call__", None)):
+        kind = SLICE_ASYNC
+    else:
+        kind = SLICE_SYNC
+    try:
+        _slice_kind_cache[func] = kind
+    except TypeError:
+        pass
+    return kind
 
 
 class Reducer:
+    '''
+    reducer的固定字段都放在slots中, 锁, 订阅集合, 监听者和CombineMessage索引在第一次使用时才创建,
+    由相同普通函数组成的mapping_dict, 其slice解析结果在同一类型的实例间共享, 未发生变化的state共享同一个空dict.
+    在64位CPython 3.7上, 一个没有额外字段, 已经处理过一次action的空闲reducer(包括store中的索引)
+    占用不超过IDLE_REDUCER_BYTES字节, 由alloc_test.py保证
+    '''
+    __slots__ = (
+        "_mapping_dict", "_slices", "_sync_slices", "_state", "_store", "key", "_node_id", "_locker",
+        "enable", "last_idle_key", "is_new", "current_action", "_marked_fields", "_subscribe_set",
+        "_listener_dict", "_combine_index", "pool", "successor", "__weakref__",
+    )
     key_prefix = r"noname:"
     recycle_option = NeverRecycleOption()
+    enable_call_action_received = False
+    enable_call_reduce_finish = False
+    enable_call_shutdown = False
+    async_action_received = True
+    async_reduce_finish = True
+    cpu_bound = False
+    pool_size = 1
+    partition = None
+    free_list_size = 0
+    default_priority = PRIORITY_NORMAL
+    schedule_weight = 1
+    priority_dict: Dict[str, int] = dict()
+    _mapping_cache: Dict[tuple, tuple] = dict()
+    selector_dict: Dict[str, Tuple[FrozenSet[str], Callable]] = dict()
+    selector_index: Dict[str, List[str]] = dict()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.enable_call_action_received = cls.action_received.__code__ is not Reducer.action_received.__code__
+        cls.enable_call_reduce_finish = cls.reduce_finish.__code__ is not Reducer.reduce_finish.__code__
+        cls.enable_call_shutdown = cls.shutdown.__code__ is not Reducer.shutdown.__code__
+        cls.async_action_received = asyncio.iscoroutinefunction(cls.action_received)
+        cls.async_reduce_finish = asyncio.iscoroutinefunction(cls.reduce_finish)
+        selector_dict = dict()
+        for klass in reversed(cls.__mro__):
+            for name, func in vars(klass).items():
+                inputs = getattr(func, "__redux_selector_inputs__", None)
+                if inputs is not None:
+                    selector_dict[name] = (inputs, func)
+        selector_index = defaultdict(list)
+        for name, (inputs, _) in selector_dict.items():
+            for field in inputs:
+                selector_index[field].append(name)
+        cls.selector_dict = selector_dict
+        cls.selector_index = dict(selector_index)
+        cls._mapping_cache = dict()
 
     def __repr__(self):
         return "<Reducer: {}>".format(self.key)
@@ -29,68 +120,239 @@ class Reducer:
         return hash(self.key)
 
     def __init__(self, mapping_dict: dict=None):
-        mapping_dict = mapping_dict or {}
-        self.mapping_dict = mapping_dict
-        self._state = {}
         self._store = None
+        self.reset()
+        self.mapping_dict = mapping_dict or _EMPTY_MAPPING
+
+    def reset(self):
+        '''
+        把实例恢复到刚创建时的样子, 开启free_list_size的类型在被回收后会调用它再放入store的free list,
+        子类有额外字段时需要覆盖并调用super
+        '''
+        self._state = _EMPTY_STATE
         self.key = None
-        self.node_id = None
-        self.locker = asyncio.Lock()
+        self._node_id = None
+        self._locker = None
         self.enable = False
         self.last_idle_key = None
         self.is_new = True
-        if self.action_received.__code__ is Reducer.action_received.__code__:
-            self.enable_call_action_received = False
-        else:
-            self.enable_call_action_received = True
-        if self.reduce_finish.__code__ is Reducer.reduce_finish.__code__:
-            self.enable_call_reduce_finish = False
-        else:
-            self.enable_call_reduce_finish = True
-        if self.shutdown.__code__ is Reducer.shutdown.__code__:
-            self.enable_call_shutdown = False
-        else:
-            self.enable_call_shutdown = True
-        self.subscribe_set = set()
-        self.listener_dict = dict()
-        self.combine_message_list = []
+        self.current_action = None
+        self._marked_fields = None
+        self._subscribe_set = None
+        self._listener_dict = None
+        self._combine_index = None
+        self.pool = None
+        self.successor = None
+
+    @property
+    def locker(self) -> CellLock:
+        if self._locker is None:
+            self._locker = CellLock()
+        return self._locker
+
+    @property
+    def subscribe_set(self) -> Set[str]:
+        if self._subscribe_set is None:
+            self._subscribe_set = set()
+        return self._subscribe_set
+
+    @property
+    def listener_dict(self) -> Dict[str, Callable]:
+        if self._listener_dict is None:
+            self._listener_dict = dict()
+        return self._listener_dict
+
+    @property
+    def combine_index(self) -> CombineIndex:
+        if self._combine_index is None:
+            self._combine_index = CombineIndex()
+        return self._combine_index
+
+    @property
+    def has_combine(self) -> bool:
+        return bool(self._combine_index)
+
+    @property
+    def has_listener(self) -> bool:
+        return bool(self._listener_dict)
+
+    @property
+    def node_id(self) -> Optional[str]:
+        if self._node_id is not None:
+            return self._node_id
+        key = self.key
+        if key is None or key == self.key_prefix:
+            return None
+        return key.replace(self.key_prefix, "", 1)
+
+    @node_id.setter
+    def node_id(self, v: Optional[str]):
+        self._node_id = v
+
+    @classmethod
+    def priority_of(cls, action: Action) -> int:
+        '''
+        action自带的优先级优先, 其次是类型上priority_dict按action类型的设置
+        '''
+        priority = action.priority
+        if priority is not None:
+            return priority
+        priority_dict = cls.priority_dict
+        if priority_dict:
+            return priority_dict.get(action.type, cls.default_priority)
+        return cls.default_priority
 
     async def initialize(self, key: KEY):
         self.key = key
-        if key == self.key_prefix:
-            self.node_id = None
-        else:
-            self.node_id = key.replace(self.key_prefix, "", 1)
+        self._node_id = None
         return True
 
     async def action_received(self, action: Action):
         raise NotImplementedError
 
+    @property
+    def mapping_dict(self) -> Dict[str, Callable]:
+        '''
+        slice在赋值时解析, 原地修改返回的dict不会生效, 需要重新赋值或者调用replace_reducer
+        '''
+        return self._mapping_dict
+
+    @mapping_dict.setter
+    def mapping_dict(self, v: Dict[str, Callable]):
+        '''
+        设置slice时预先判断每个slice的执行方式, 全部是普通函数时reduce不需要await任何slice
+        '''
+        cls = type(self)
+        cache_key = None
+        cached = None
+        if all(type(callback) is FunctionType for callback in v.values()):
+            cache_key = tuple(v.items())
+            cached = cls._mapping_cache.get(cache_key)
+        if cached is None:
+            items = [(key, callback) for key, callback in v.items() if not key.startswith("_")]
+            slices = tuple(
+                (key, callback, SLICE_OFFLOAD if cls.cpu_bound else slice_kind(callback), index)
+                for index, (key, callback) in enumerate(items)
+            )
+            cached = (slices, all(kind == SLICE_SYNC for _, _, kind, _ in slices))
+            if cache_key is not None and len(cls._mapping_cache) < MAPPING_CACHE_SIZE:
+                cls._mapping_cache[cache_key] = cached
+        self._mapping_dict = v
+        self._slices, self._sync_slices = cached
+
     async def reduce(self, action: Action) -> Dict[KEY, Any]:
         if self.enable_call_action_received:
-            await self.action_received(action)
+            if self.async_action_received:
+                await self.action_received(action)
+            else:
+                self.action_received(action)
+        state = self._state
+        if self._sync_slices:
+            changed_state = self._reduce_sync(state, action)
+            if type(changed_state) is CoroutineType:
+                changed_state = await changed_state
+        else:
+            changed_state = await self._reduce_async(state, action)
+        if self.selector_dict:
+            new_state = self._select(self._state, self._state is not state, changed_state)
+            if new_state is not None:
+                self._state = new_state
+        if self.enable_call_reduce_finish:
+            if self.async_reduce_finish:
+                await self.reduce_finish(action, changed_state)
+            else:
+                self.reduce_finish(action, changed_state)
+        return changed_state
+
+    def _reduce_sync(self, state: Dict[KEY, Any], action: Action) -> Dict[KEY, Any]:
+        '''
+        某个slice返回了协程时, 从这个slice开始交给_reduce_async继续, 返回它的协程由reduce await.
+        这里只按类型判断原生协程, asyncio.iscoroutine对普通返回值的判断开销比slice本身还大
+        '''
         changed_state = {}
-        state = self._state.copy()
-        for key, callback in self.mapping_dict.items():
-            if key.startswith("_"):
+        new_state = None
+        for key, callback, _, index in self._slices:
+            sub_state = state.get(key, None)
+            new_sub_state = callback(state=sub_state, action=action)
+            if type(new_sub_state) is CoroutineType:
+                return self._reduce_async(state, action, index, changed_state, new_state, new_sub_state)
+            if sub_state is not new_sub_state:
+                changed_state[key] = new_sub_state
+            elif key in state:
                 continue
+            if new_state is None:
+                new_state = state.copy()
+            new_state[key] = new_sub_state
+        if new_state is not None:
+            self._state = new_state
+        return changed_state
+
+    async def _reduce_async(
+            self, state: Dict[KEY, Any], action: Action, start=0,
+            changed_state: Optional[Dict[KEY, Any]]=None, new_state: Optional[Dict[KEY, Any]]=None, pending=None,
+    ) -> Dict[KEY, Any]:
+        if changed_state is None:
+            changed_state = {}
+        for key, callback, kind, _ in self._slices[start:]:
             sub_state = state.get(key, None)
-            new_sub_state = await callback(state=sub_state, action=action)
-            if id(sub_state) != id(new_sub_state):
+            if pending is not None:
+                new_sub_state, pending = await pending, None
+            elif kind == SLICE_SYNC:
+                new_sub_state = callback(state=sub_state, action=action)
+                if asyncio.iscoroutine(new_sub_state):
+                    new_sub_state = await new_sub_state
+            elif kind == SLICE_ASYNC:
+                new_sub_state = await callback(state=sub_state, action=action)
+            else:
+                new_sub_state = await offload_slice(self.store.process_pool, callback, sub_state, action)
+                if new_sub_state == sub_state:
+                    new_sub_state = sub_state
+            if sub_state is not new_sub_state:
                 changed_state[key] = new_sub_state
-            state[key] = new_sub_state
-        self._state = state
-        if self.enable_call_reduce_finish:
-            await self.reduce_finish(action, changed_state)
+            elif key in state:
+                continue
+            if new_state is None:
+                new_state = state.copy()
+            new_state[key] = new_sub_state
+        if new_state is not None:
+            self._state = new_state
         return changed_state
 
     async def reduce_finish(self, action: Action, changed_state: Dict[KEY, Any]):
         raise NotImplementedError
 
+    def mark_changed(self, *fields: str):
+        if self._marked_fields is None:
+            self._marked_fields = set()
+        self._marked_fields.update(fields)
+
+    def _select(self, state: Dict[KEY, Any], is_copy: bool, changed_state: Dict[KEY, Any]) -> Optional[Dict[KEY, Any]]:
+        selector_index = self.selector_index
+        names = {name for name in self.selector_dict if name not in state}
+        for field in changed_state:
+            names.update(selector_index.get(field, ()))
+        if self._marked_fields:
+            for field in self._marked_fields:
+                names.update(selector_index.get(field, ()))
+            self._marked_fields = None
+        for name in names:
+            _, func = self.selector_dict[name]
+            value = func(self, state)
+            if name in state and state[name] == value:
+                continue
+            if not is_copy:
+                state = state.copy()
+                is_copy = True
+            state[name] = value
+            changed_state[name] = value
+        return state if is_copy else None
+
     async def shutdown(self):
         return Option.none()
 
     def get_state(self):
+        if self._state is _EMPTY_STATE:
+            self._state = dict()
         return self._state
 
     async def get_remote_state(self, source: MediumBase, key: KEY, fields=None) -> Option:
@@ -105,8 +367,31 @@ class Reducer:
             return Option(NoneError())
         if not isinstance(medium, MediumBase):
             return Option(TypeError())
+        if self.current_action is not None:
+            action = action.follow(self.current_action)
         return await medium.send(self.key, key, action)
 
+    async def ask(self, medium: Optional[MediumBase], key, action: Action, timeout=1.0) -> Option:
+        if medium is None:
+            return Option(NoneError())
+        if not isinstance(medium, MediumBase):
+            return Option(TypeError())
+        action_id = action.ensure_id()
+        future = self.store.wait_reply(self.key, action_id)
+        try:
+            send_opt = await self.send(medium, key, action)
+            if send_opt is not None and send_opt.is_error:
+                return send_opt
+            return Option(await asyncio.wait_for(future, timeout))
+        except asyncio.TimeoutError as e:
+            return Option(e)
+        finally:
+            self.store.cancel_reply(self.key, action_id)
+
+    async def reply(self, action: Action, reply_action: Action) -> Option:
+        reply_action.reply_to = action.id
+        return await self.send(action.medium, action.source_key, reply_action)
+
     async def subscribe(self, medium: Optional[MediumBase], key: KEY) -> Option:
         pass
 
@@ -121,6 +406,9 @@ class Reducer:
         return self.mapping_dict
 
     def replace_reducer(self, v: Dict[str, Callable]):
+        '''
+        替换slice, 原地修改过mapping_dict后也通过它重新解析
+        '''
         self.mapping_dict = v
 
     @property
@@ -143,8 +431,10 @@ class Reducer:
         cb.keep_origin = keep_origin
         cb.node_key = self.key
         cb.store = self.store
-        self.combine_message_list.append(cb)
         cb.active()
+        # 池中的成员共享同一个key, store只在key对应的主reducer上匹配和超时处理CombineMessage
+        owner = self.store._reducer_set.get(self.key)
+        (owner if owner is not None else self).combine_index.add(cb)
 
 
-__all__ = ["Reducer", "ReducerDetail"]
+__all__ = ["Reducer", "selector", ]
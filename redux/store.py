@@ -1,49 +1,131 @@
 from typing import *
 import time
 import traceback
-from collections import defaultdict
+from collections import defaultdict, deque
 from sortedcontainers import SortedSet
 import asyncio
+from concurrent.futures import ProcessPoolExecutor
 from .error import *
 from .option import Option
-from .action import Action
+from .action import Action, path_digest, PRIORITY_NORMAL
+from .mailbox import Mailbox
 from .recycle_option import *
-from .listener import Listener, ListenerStateWrapper
+from .listener import Listener, PrefixListener, ListenerStateWrapper, ListenerIndex, PrefixIndex
 from .reducer import Reducer
 from .combine_message import CombineMessage
+from .trace import Tracer
+from .dedupe import DedupeWindow
+from .admission import AdmissionController
+from .timer import TimerQueue
+from .index import KeyIndex, FieldIndex, SortedFieldIndex
+from .pool import ReducerPool
+from .columnar import ColumnarReducer, ColumnarFamily
+
+
+_UPGRADE_SKIP_FIELDS = frozenset((
+    "_mapping_dict", "_slices", "_sync_slices", "_state", "_locker", "current_action", "pool", "successor",
+    "__weakref__", "__dict__",
+))
+
+
+def _instance_fields(reducer: Reducer) -> List[str]:
+    names = []
+    for klass in type(reducer).__mro__:
+        slots = vars(klass).get("__slots__", ())
+        names.extend((slots, ) if isinstance(slots, str) else slots)
+    names.extend(getattr(reducer, "__dict__", ()))
+    return [name for name in names if name not in _UPGRADE_SKIP_FIELDS and hasattr(reducer, name)]
 
 
 class Store:
     def __repr__(self):
         return f"<Store Size: {len(self._reducer_set)}>"
 
-    def __init__(self, reducer_list: List[Type[Reducer]]=None, init_full_state=True, cleaner_period=1.0):
+    def __init__(
+            self,
+            reducer_list: List[Type[Reducer]]=None,
+            init_full_state=True,
+            cleaner_period=1.0,
+            tracer: Optional[Tracer]=None,
+            max_hops: Optional[int]=32,
+            default_ttl: Optional[float]=None,
+            track_path=False,
+            dedupe_window: Optional[DedupeWindow]=None,
+            process_workers: Optional[int]=None,
+            quantum=32,
+            mailbox_size: Optional[int]=None,
+            max_pending: Optional[int]=None,
+            admission: Optional[AdmissionController]=None,
+    ):
         self._reducer_list = set(reducer_list or [])
         self._reducer_set = dict()
-        self._observer_list = defaultdict(dict)
+        self._families: Dict[Type[ColumnarReducer], ColumnarFamily] = dict()
+        for reducer_type in self._reducer_list:
+            if issubclass(reducer_type, ColumnarReducer):
+                self._families[reducer_type] = ColumnarFamily(self, reducer_type)
+        self._key_index = KeyIndex()
+        self._free_lists: Dict[Type[Reducer], List[Reducer]] = dict()
+        self._field_indexes: Dict[Type[Reducer], Dict[str, Union[FieldIndex, SortedFieldIndex]]] = dict()
+        self._observer_list: Dict[str, ListenerIndex] = defaultdict(ListenerIndex)
+        self._prefix_listeners = PrefixIndex()
         self._initialize_full_state = init_full_state
         self._idle_set = SortedSet()
         self._idle_cleaner = False
         self.cleaner_period = float(cleaner_period)
         self._initialize_lock = asyncio.Lock()
+        self.tracer = tracer
+        self.timer = TimerQueue()
+        self.max_hops = max_hops
+        self.default_ttl = default_ttl
+        self.track_path = track_path
+        self.dedupe_window = dedupe_window
+        self._drop_counter = defaultdict(int)
+        self._reply_futures: Dict[Tuple[str, str], asyncio.Future] = dict()
+        self.process_workers = process_workers
+        self._process_pool = None
+        self.quantum = quantum
+        self.mailbox_size = mailbox_size
+        self.max_pending = max_pending
+        self._mailboxes: Dict[str, Mailbox] = dict()
+        self._deferred: Dict[str, Deque[Tuple[float, Action]]] = dict()
+        self._pending_count = 0
+        self.admission = admission
 
     def __getitem__(self, item) -> Optional[Dict[str, Any]]:
         if type(item) is not str:
             raise TypeError
         reducer_cell = self._reducer_set.get(item, None)
         if reducer_cell is None:
+            if self._families:
+                family = self.find_family_by_key(item)
+                if family is not None:
+                    return family.view(item)
             return None
         return reducer_cell.get_state()
 
     def __contains__(self, item):
-        return item in self._reducer_set
+        if item in self._reducer_set:
+            return True
+        if self._families:
+            family = self.find_family_by_key(item)
+            return family is not None and item in family
+        return False
 
     def insert_reducer_type(self, reducer: Type[Reducer]):
         self._reducer_list.add(reducer)
+        if issubclass(reducer, ColumnarReducer) and reducer not in self._families:
+            self._families[reducer] = ColumnarFamily(self, reducer)
 
     def remove_reducer_type(self, reducer: Type[Reducer]):
         if reducer in self._reducer_list:
             self._reducer_list.remove(reducer)
+        self._families.pop(reducer, None)
+
+    def find_family_by_key(self, key: str) -> Optional[ColumnarFamily]:
+        for reducer_type, family in self._families.items():
+            if key.startswith(reducer_type.key_prefix):
+                return family
+        return None
 
     def find_reducer_type_by_prefix(self, key) -> Option:
         for reducer in self._reducer_list:
@@ -55,11 +137,78 @@ class Store:
         return Option.none()
 
     def find_reducer_list_by_type(self, reducer_type: Type) -> List[Reducer]:
-        result = []
-        for reducer in self._reducer_set.values():
-            if type(reducer) == reducer_type:
-                result.append(reducer)
-        return result
+        return list(self._key_index.iter_type(reducer_type))
+
+    def iter_reducers_by_type(self, reducer_type: Type) -> Iterator[Reducer]:
+        '''
+        迭代器在创建或回收reducer时失效, 遍历过程中需要dispatch的话先转换成list
+        '''
+        return self._key_index.iter_type(reducer_type)
+
+    def iter_reducers_by_prefix(self, prefix: str) -> Iterator[Reducer]:
+        reducer_set = self._reducer_set
+        return (reducer_set[key] for key in self._key_index.iter_prefix(prefix))
+
+    def create_index(self, reducer_type: Type[Reducer], field: str, sorted=False) -> Option:
+        indexes = self._field_indexes.setdefault(reducer_type, dict())
+        if field in indexes:
+            index = indexes[field]
+            if isinstance(index, SortedFieldIndex) != bool(sorted):
+                return Option(KeyError(field))
+            return Option(index)
+        index = SortedFieldIndex(reducer_type, field) if sorted else FieldIndex(reducer_type, field)
+        for reducer in self._key_index.iter_type(reducer_type):
+            index.update(reducer, reducer.get_state().get(field))
+        indexes[field] = index
+        return Option(index)
+
+    def drop_index(self, reducer_type: Type[Reducer], field: str):
+        indexes = self._field_indexes.get(reducer_type)
+        if indexes is None or field not in indexes:
+            return
+        del indexes[field]
+        if not indexes:
+            del self._field_indexes[reducer_type]
+
+    def find_by_field(self, reducer_type: Type[Reducer], field: str, value: Any) -> Iterator[Reducer]:
+        '''
+        没有为该字段建立索引时退化为遍历该类型的所有reducer
+        '''
+        index = self._field_indexes.get(reducer_type, {}).get(field)
+        if index is not None:
+            return index.find(value)
+        return (reducer for reducer in self._key_index.iter_type(reducer_type) if reducer.get_state().get(field) == value)
+
+    def find_by_range(
+            self,
+            reducer_type: Type[Reducer],
+            field: str,
+            low: Any=None,
+            high: Any=None,
+            inclusive: Tuple[bool, bool]=(True, True),
+    ) -> Iterator[Reducer]:
+        '''
+        low/high为None时表示该方向不设边界, 没有有序索引时退化为遍历该类型的所有reducer
+        '''
+        index = self._field_indexes.get(reducer_type, {}).get(field)
+        if isinstance(index, SortedFieldIndex):
+            return index.find_range(low, high, inclusive)
+
+        def in_range(value):
+            if value is None:
+                return False
+            if low is not None and (value < low if inclusive[0] else value <= low):
+                return False
+            if high is not None and (value > high if inclusive[1] else value >= high):
+                return False
+            return True
+
+        return (reducer for reducer in self._key_index.iter_type(reducer_type) if in_range(reducer.get_state().get(field)))
+
+    def _update_field_indexes(self, reducer: Reducer, changed_state: Dict[str, Any]):
+        for field, index in self._field_indexes[type(reducer)].items():
+            if field in changed_state:
+                index.update(reducer, changed_state[field])
 
     def set_idle_key(self, reducer: Reducer):
         if isinstance(reducer.recycle_option, IdleTimeoutRecycleOption):
@@ -82,14 +231,25 @@ class Store:
         if key not in self._reducer_set:
             if reducer_type is None:
                 return Option.none()
-            reducer: Reducer = reducer_type()
+            free_list = self._free_lists.get(reducer_type)
+            reducer: Reducer = free_list.pop() if free_list else reducer_type()
             try:
                 await self._initialize_lock.acquire()
                 reducer.store = self
                 if not await reducer.initialize(key):
                     return Option.none()
                 reducer.enable = True
+                if reducer_type.pool_size > 1:
+                    reducer.pool = await self._create_pool(key, reducer)
+                    if reducer.pool is None:
+                        return Option.none()
                 self._reducer_set[key] = reducer
+                self._key_index.add(reducer)
+                indexes = self._field_indexes.get(reducer_type)
+                if indexes:
+                    state = reducer.get_state()
+                    for field, index in indexes.items():
+                        index.update(reducer, state.get(field))
             except Exception as e:
                 return Option(ReduxError(e, traceback.format_exc()))
             finally:
@@ -98,17 +258,150 @@ class Store:
             reducer = self._reducer_set[key]
         return Option(reducer)
 
+    async def _create_pool(self, key, reducer: Reducer, initialize=True) -> Optional[ReducerPool]:
+        '''
+        initialize为False时(热升级)不调用成员的initialize, 成员直接沿用主reducer的key和node_id
+        '''
+        members = [reducer]
+        reducer_type = type(reducer)
+        for _ in range(reducer_type.pool_size - 1):
+            member = reducer_type()
+            member.store = self
+            if initialize:
+                if not await member.initialize(key):
+                    return None
+            else:
+                member.key = key
+                member._node_id = reducer._node_id
+            member.enable = True
+            members.append(member)
+        return ReducerPool(members, reducer_type.partition)
+
     def pop_reducer_by_key(self, key):
         if key not in self._reducer_set:
+            if self._families:
+                family = self.find_family_by_key(key)
+                if family is not None:
+                    family.remove(key)
             return
         reducer = self._reducer_set.pop(key)
         reducer.enable = False
-        if reducer.listener_dict:
+        self._key_index.discard(reducer)
+        indexes = self._field_indexes.get(type(reducer))
+        if indexes:
+            for index in indexes.values():
+                index.discard(reducer)
+        if reducer.has_listener:
             for listener in reducer.listener_dict.values():
                 listener()
             reducer.listener_dict.clear()
         if reducer.enable_call_shutdown:
-            asyncio.ensure_future(reducer.shutdown())
+            asyncio.ensure_future(self._shutdown(reducer))
+        elif reducer.free_list_size:
+            self._recycle(reducer)
+        if reducer.pool is not None:
+            self._shutdown_pool_members(reducer.pool)
+
+    @staticmethod
+    def _shutdown_pool_members(pool: ReducerPool):
+        for member in pool.members[1:]:
+            member.enable = False
+            if member.enable_call_shutdown:
+                asyncio.ensure_future(member.shutdown())
+
+    async def _shutdown(self, reducer: Reducer):
+        await reducer.shutdown()
+        if reducer.free_list_size:
+            self._recycle(reducer)
+
+    def _recycle(self, reducer: Reducer):
+        if reducer.pool is not None or reducer.current_action is not None:
+            return
+        free_list = self._free_lists.setdefault(type(reducer), [])
+        if len(free_list) < reducer.free_list_size:
+            reducer.reset()
+            free_list.append(reducer)
+
+    async def upgrade_reducer_type(
+            self,
+            old_type: Type[Reducer],
+            new_type: Type[Reducer],
+            migrate: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]]=None,
+            batch_size=100,
+    ) -> Option:
+        '''
+        热升级: 注册新版本的reducer类型, 然后把旧类型的存活实例分批替换成新类型的实例,
+        state, 订阅, 空闲回收时间和其余实例字段原样保留, 不会再调用initialize, migrate可以在迁移时转换state.
+        替换一个key时只持有这个key的锁, 排队在旧实例上的action会转交给新实例处理.
+        某个实例迁移失败时保留旧实例继续工作, 全部完成后返回UpgradeError, 其中记录成功数量和每个失败key的异常,
+        之后可以再次调用本方法重试剩下的旧实例
+        '''
+        if old_type.key_prefix != new_type.key_prefix:
+            return Option(TypeError())
+        self.insert_reducer_type(new_type)
+        self.remove_reducer_type(old_type)
+        upgraded = 0
+        failed: Dict[str, Exception] = dict()
+        pending = list(self._key_index.iter_type(old_type))
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            results = await asyncio.gather(*[self._upgrade_reducer(reducer, new_type, migrate) for reducer in batch])
+            for reducer, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    failed[reducer.key] = result
+                elif result:
+                    upgraded += 1
+            await asyncio.sleep(0)
+        if failed:
+            return Option(UpgradeError(upgraded, failed))
+        return Option(upgraded)
+
+    async def _upgrade_reducer(self, reducer: Reducer, new_type: Type[Reducer], migrate) -> Union[bool, Exception]:
+        '''
+        替换成功返回True, 实例已经不在store中返回False, migrate或者创建新实例失败时返回异常, 旧实例保持不变
+        '''
+        await reducer.locker.acquire()
+        try:
+            key = reducer.key
+            if not reducer.enable or self._reducer_set.get(key) is not reducer:
+                self._key_index.discard(reducer)
+                return False
+            try:
+                state = reducer.get_state()
+                if migrate is not None:
+                    state = migrate(dict(state))
+                    if asyncio.iscoroutine(state):
+                        state = await state
+                successor: Reducer = new_type()
+                for name in _instance_fields(reducer):
+                    try:
+                        setattr(successor, name, getattr(reducer, name))
+                    except AttributeError:
+                        continue
+                successor._state = state
+                successor.store = self
+                if new_type.pool_size > 1:
+                    successor.pool = await self._create_pool(key, successor, initialize=False)
+            except Exception as e:
+                return e
+            if reducer.pool is not None:
+                self._shutdown_pool_members(reducer.pool)
+            if reducer.last_idle_key in self._idle_set:
+                self._idle_set.remove(reducer.last_idle_key)
+                successor.last_idle_key = (reducer.last_idle_key[0], successor)
+                self._idle_set.add(successor.last_idle_key)
+            self._key_index.discard(reducer)
+            for index in self._field_indexes.get(type(reducer), {}).values():
+                index.discard(reducer)
+            self._reducer_set[key] = successor
+            self._key_index.add(successor)
+            for field, index in self._field_indexes.get(new_type, {}).items():
+                index.update(successor, state.get(field))
+            reducer.enable = False
+            reducer.successor = successor
+            return True
+        finally:
+            reducer.locker.release()
 
     def enable_create_reducer(self, reducer_type):
         return True #isinstance(reducer_type.recycle_option, UnsubscribeRecycleOption)
@@ -117,15 +410,102 @@ class Store:
         option = reducer_type.recycle_option
         return isinstance(option, IdleTimeoutRecycleOption) and option.timeout and not action.soft
 
+    @property
+    def process_pool(self) -> ProcessPoolExecutor:
+        '''
+        cpu_bound的slice使用的进程池, 第一次使用时才创建
+        '''
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(self.process_workers)
+        return self._process_pool
+
+    def shutdown_process_pool(self, wait=True):
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait)
+            self._process_pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(
+            reducers=len(self._reducer_set),
+            idle=len(self._idle_set),
+            dropped=dict(self._drop_counter),
+            dedupe=self._dedupe_stats(),
+            scheduler=dict(mailboxes=len(self._mailboxes), pending=self._pending_count),
+            admission=self.admission.stats() if self.admission is not None else None,
+        )
+
+    def _dedupe_stats(self) -> Optional[Dict[str, int]]:
+        window = self.dedupe_window
+        if window is None:
+            return None
+        return dict(entries=len(window), bytes=window.memory_size())
+
+    def _drop_reason(self, key: str, action: Action) -> Optional[str]:
+        if self.max_hops is not None and action.hops > self.max_hops:
+            return "hop_limit"
+        if action.deadline is not None and time.time() > action.deadline:
+            return "deadline"
+        if action.path is not None and path_digest(key, action.type) in action.path:
+            return "loop"
+        if action.id is not None and self.dedupe_window is not None:
+            if self.dedupe_window.seen((key, action.id)):
+                return "duplicate"
+        return None
+
+    def wait_reply(self, key: str, action_id: str) -> asyncio.Future:
+        future = asyncio.get_event_loop().create_future()
+        self._reply_futures[(key, action_id)] = future
+        return future
+
+    def cancel_reply(self, key: str, action_id: str):
+        self._reply_futures.pop((key, action_id), None)
+
+    def _resolve_reply(self, key: str, action: Action) -> bool:
+        future = self._reply_futures.pop((key, action.reply_to), None)
+        if future is None:
+            return False
+        if not future.done():
+            future.set_result(action)
+        return True
+
     async def dispatch(self, key: str, action: Action) -> bool:
+        '''
+        去重窗口在处理前就记下(key, id), 同时到达的重复消息也会被丢弃; 处理失败时撤销记录, 让重试可以通过.
+        补默认ttl和追加路径时投递的是action的副本, 不修改调用方的对象
+        '''
+        if key is None:
+            return False
+        drop_reason = self._drop_reason(key, action)
+        if drop_reason:
+            self._drop_counter[drop_reason] += 1
+            return False
+        stamp_ttl = self.default_ttl is not None and action.deadline is None and not action.hops
+        track_path = action.path is not None or self.track_path
+        if stamp_ttl or track_path:
+            action = action.copy()
+            if stamp_ttl:
+                action.set_ttl(self.default_ttl)
+            if track_path:
+                action.path = (action.path or []) + [path_digest(key, action.type)]
+        if action.id is None or self.dedupe_window is None:
+            return await self._deliver(key, action)
+        delivered = await self._deliver(key, action)
+        if not delivered:
+            self.dedupe_window.discard((key, action.id))
+        return delivered
+
+    async def _deliver(self, key: str, action: Action) -> bool:
         try:
-            if key is None:
-                return False
-            if key in self:
-                reducer = self._reducer_set[key]
-            elif action.soft:
+            if action.reply_to is not None and self._resolve_reply(key, action):
                 return True
+            if key in self._reducer_set:
+                reducer = self._reducer_set[key]
             else:
+                family = self.find_family_by_key(key) if self._families else None
+                if family is not None:
+                    return await family.dispatch(key, action)
+                if action.soft:
+                    return True
                 reducer_type_opt = self.find_reducer_type_by_prefix(key)
                 if reducer_type_opt.is_none:
                     return False
@@ -141,7 +521,14 @@ class Store:
                 self.remove_idle_key(reducer)
                 self.set_idle_key(reducer)
             if await self._combine_block(reducer, action):
-                await self._dispatch(reducer, action)
+                if reducer.pool is None:
+                    await self._dispatch(reducer, action)
+                else:
+                    index, member = reducer.pool.acquire(action)
+                    try:
+                        await self._dispatch(member, action)
+                    finally:
+                        reducer.pool.release(index)
             if reducer.is_new and isinstance(reducer.recycle_option, IdleTimeoutRecycleOption) and not reducer.recycle_option.timeout:
                 self.pop_reducer_by_key(key)
             reducer.is_new = False
@@ -150,55 +537,213 @@ class Store:
             return False
         return True
 
-    async def _combine_block(self, reducer, action):
-        action_type = action.type
-        for cb in list(reducer.combine_message_list):
-            combine_message: CombineMessage = cb
-            if action_type in combine_message.message_type_list:
-                combine_message.message_type_list.remove(action_type)
-                if not combine_message.message_type_list and not combine_message.future.done():
-                    reducer.combine_message_list.remove(combine_message)
-                    combine_message.future.set_result(True)
-                return combine_message.keep_origin
+    async def admit(self, key: str, action: Action, connection=None) -> bool:
+        '''
+        medium把外部或其他节点来的action投递给post之前先经过准入控制, 没有配置admission时总是通过
+        '''
+        admission = self.admission
+        if admission is None:
+            return True
+        return await admission.admit(connection, action.source_key, key)
+
+    def admission_delay(self, key: str, action: Action, connection=None) -> Optional[float]:
+        '''
+        不等待的准入控制, 返回值作为post的delay, None表示拒绝. 没有配置admission时总是0
+        '''
+        admission = self.admission
+        if admission is None:
+            return 0.0
+        return admission.reserve(connection, action.source_key, key)
+
+    def post(self, key: str, action: Action, delay: float=0.0) -> bool:
+        '''
+        不等待处理结果的投递, 发往同一个key的action进入它的mailbox, 由每个key唯一的drain任务按顺序处理.
+        drain任务每处理quantum * schedule_weight个action就让出一次事件循环, 热点key不会挤占其他key,
+        mailbox按reducer解析出的优先级分道, 高优先级(包括入口默认的CONTROL)越过低优先级的积压, 但同样受上限约束.
+        mailbox满或者全局积压超过max_pending时丢弃并计数. delay大于0时(admission的delay策略)action先在这个key上排队, 到期后再进入mailbox.
+        只有能解决等待中回复的action不进入mailbox, 以免和等待回复的reducer互相等待;
+        NO_OP和CombineMessage的结果不经过post, 直接dispatch
+        '''
+        if key is None:
+            return False
+        if self.max_pending is not None and self._pending_count >= self.max_pending:
+            self._drop_counter["overload"] += 1
+            return False
+        if delay > 0 or (self._deferred and key in self._deferred):
+            self._defer(key, action, delay)
+            return True
+        return self._enqueue(key, action)
+
+    def _defer(self, key: str, action: Action, delay: float):
+        '''
+        被延迟的action按key排队, 只推迟这个key, 不占用投递方的协程. 同一个key上后到的action排在它们后面, 保持顺序
+        '''
+        ready_at = asyncio.get_event_loop().time() + delay
+        deferred = self._deferred.get(key)
+        if deferred is None:
+            deferred = self._deferred[key] = deque()
+            self.timer.call_later(delay, lambda: self._release_deferred(key))
+        elif deferred[-1][0] > ready_at:
+            ready_at = deferred[-1][0]
+        deferred.append((ready_at, action))
+        self._pending_count += 1
+
+    def _release_deferred(self, key: str):
+        deferred = self._deferred[key]
+        now = asyncio.get_event_loop().time()
+        while deferred and deferred[0][0] <= now:
+            _, action = deferred.popleft()
+            self._pending_count -= 1
+            self._enqueue(key, action)
+        if deferred:
+            self.timer.call_later(deferred[0][0] - now, lambda: self._release_deferred(key))
+        else:
+            del self._deferred[key]
+
+    def _enqueue(self, key: str, action: Action) -> bool:
+        if action.reply_to is not None and (key, action.reply_to) in self._reply_futures:
+            asyncio.ensure_future(self.dispatch(key, action))
+            return True
+        priority = self._priority_of(key, action)
+        mailbox = self._mailboxes.get(key)
+        if mailbox is None:
+            mailbox = self._mailboxes[key] = Mailbox()
+            asyncio.ensure_future(self._drain(key, mailbox))
+        elif self.mailbox_size is not None and len(mailbox) >= self.mailbox_size:
+            self._drop_counter["mailbox_full"] += 1
+            return False
+        mailbox.append(action, priority)
+        self._pending_count += 1
         return True
 
+    def _priority_of(self, key: str, action: Action) -> int:
+        '''
+        和_dispatch加锁时使用的优先级一致, reducer还没有创建时按key前缀对应的类型解析
+        '''
+        if action.priority is not None:
+            return action.priority
+        reducer = self._reducer_set.get(key)
+        if reducer is not None:
+            return reducer.priority_of(action)
+        reducer_type_opt = self.find_reducer_type_by_prefix(key)
+        if reducer_type_opt.is_some:
+            priority_of = getattr(reducer_type_opt.unwrap(), "priority_of", None)
+            if priority_of is not None:
+                return priority_of(action)
+        return PRIORITY_NORMAL
+
+    def _schedule_weight(self, key: str) -> int:
+        reducer = self._reducer_set.get(key)
+        if reducer is not None:
+            return reducer.schedule_weight
+        reducer_type_opt = self.find_reducer_type_by_prefix(key)
+        if reducer_type_opt.is_some:
+            return getattr(reducer_type_opt.unwrap(), "schedule_weight", 1)
+        return 1
+
+    async def _drain(self, key: str, mailbox: Mailbox):
+        quantum = max(1, self.quantum * self._schedule_weight(key))
+        try:
+            while mailbox:
+                reducer = self._reducer_set.get(key)
+                if reducer is not None and reducer.pool is not None:
+                    batch = [mailbox.popleft() for _ in range(min(quantum, len(mailbox)))]
+                    self._pending_count -= len(batch)
+                    await asyncio.gather(*[self.dispatch(key, action) for action in batch])
+                else:
+                    for _ in range(quantum):
+                        if not mailbox:
+                            break
+                        action = mailbox.popleft()
+                        self._pending_count -= 1
+                        await self.dispatch(key, action)
+                await asyncio.sleep(0)
+        finally:
+            self._pending_count -= len(mailbox)
+            del self._mailboxes[key]
+
+    async def _combine_block(self, reducer, action):
+        if not reducer.has_combine:
+            return True
+        combine_message = reducer.combine_index.match(action.type)
+        if combine_message is None:
+            return True
+        if not combine_message.pending and not combine_message.done:
+            combine_message.finish()
+        return combine_message.keep_origin
+
     async def _dispatch(self, reducer: Reducer, action: Action):
+        key = reducer.key
+        tracer = self.tracer
+        hop = None
+        if tracer:
+            action, hop = tracer.begin(key, action)
         try:
-            key = reducer.key
-            await reducer.locker.acquire()
+            priority = reducer.priority_of(action)
+            await reducer.locker.acquire(priority)
+            while reducer.successor is not None:
+                reducer.locker.release()
+                reducer = reducer.successor
+                await reducer.locker.acquire(priority)
+            if hop:
+                lock_time = time.time()
+                tracer.record("lock", hop, key, action, hop.received_time, lock_time)
+            reducer.current_action = action
             changed_state = await reducer.reduce(action)
+            if hop:
+                tracer.record("reduce", hop, key, action, lock_time, time.time())
         except Exception as e:
             raise e
         finally:
+            reducer.current_action = None
             reducer.locker.release()
         if changed_state:
-            await self._call_listeners(key, changed_state, self[key])
+            if self._field_indexes and type(reducer) in self._field_indexes:
+                self._update_field_indexes(reducer, changed_state)
+            if hop:
+                listener_time = time.time()
+                await self._call_listeners(key, changed_state, self[key])
+                tracer.record("listener", hop, key, action, listener_time, time.time())
+            else:
+                await self._call_listeners(key, changed_state, self[key])
+        if hop:
+            tracer.finish(hop, key, action, time.time())
 
     async def _call_listeners(self, key: str, changed_state: Dict[str, Any], state: Dict[str, Any]):
-        listeners = self._observer_list.get(key, dict()).values()
-        for listener in list(listeners):
-            try:
-                await listener.call_state_changed(changed_state, state)
-            except Exception:
-                self.unsubscribe(key, listener.listener)
+        listeners = self._observer_list.get(key)
+        if listeners is not None:
+            for listener in listeners.match(changed_state):
+                try:
+                    await listener.call_state_changed(changed_state, state)
+                except Exception:
+                    self.unsubscribe(key, listener.listener)
+        if self._prefix_listeners:
+            for listener in self._prefix_listeners.match(key):
+                try:
+                    await listener.on_changed(key, changed_state, state)
+                except Exception:
+                    self.unsubscribe_prefix(listener.prefix, listener)
 
-    async def subscribe(self, key: str, listener: Listener) -> Option:
+    async def subscribe(self, key: str, listener: Listener, fields: Optional[Iterable[str]]=None) -> Option:
         reducer_type_opt = self.find_reducer_type_by_prefix(key)
         if reducer_type_opt.is_none:
             return Option.none()
         reducer_type = reducer_type_opt.unwrap()
-        listener_wrapper = ListenerStateWrapper(listener, self._initialize_full_state)
+        listener_wrapper = ListenerStateWrapper(listener, self._initialize_full_state, fields)
         self._observer_list[key].setdefault(listener, listener_wrapper)
         listener.is_binding = True
         listener.store = self
         listener.key = key
-        reducer_opt = await self.get_or_create_cell(key, reducer_type)
-        if not reducer_opt.is_some:
-            return Option.none()
-        reducer = reducer_opt.unwrap()
-        self.remove_idle_key(reducer)
-        await self._dispatch(reducer, Action.no_op_command())
-        reducer.is_new = False
+        if issubclass(reducer_type, ColumnarReducer):
+            self._families[reducer_type].create(key)
+        else:
+            reducer_opt = await self.get_or_create_cell(key, reducer_type)
+            if not reducer_opt.is_some:
+                return Option.none()
+            reducer = reducer_opt.unwrap()
+            self.remove_idle_key(reducer)
+            await self._dispatch(reducer, Action.no_op_command())
+            reducer.is_new = False
         state = self[key]
         if state:
             await listener_wrapper.call_state_changed(state, state)
@@ -209,20 +754,44 @@ class Store:
         return Option(unsubscribe)
 
     def unsubscribe(self, key: str, listener: Listener):
-        if listener not in self._observer_list[key]:
+        listeners = self._observer_list.get(key)
+        if listeners is None or listener not in listeners:
             return
-        del self._observer_list[key][listener]
+        listeners.pop(listener)
         listener.is_binding = False
         listener.store = None
         listener.key = None
-        if not len(self._observer_list[key]):
+        if not len(listeners):
             del self._observer_list[key]
+            if key not in self._reducer_set:
+                return
             option = self._reducer_set[key].recycle_option
             if isinstance(option, IdleTimeoutRecycleOption) and option.timeout:
                 self.set_idle_key(self._reducer_set[key])
             else:
                 self.pop_reducer_by_key(key)
 
+    def subscribe_prefix(self, prefix: str, listener: PrefixListener) -> Option:
+        if not isinstance(prefix, str):
+            return Option(TypeError())
+        if not self._prefix_listeners.add(prefix, listener):
+            return Option(KeyError())
+        listener.prefix = prefix
+        listener.store = self
+        listener.is_binding = True
+
+        def unsubscribe():
+            self.unsubscribe_prefix(prefix, listener)
+
+        return Option(unsubscribe)
+
+    def unsubscribe_prefix(self, prefix: str, listener: PrefixListener):
+        if not self._prefix_listeners.remove(prefix, listener):
+            return
+        listener.prefix = None
+        listener.store = None
+        listener.is_binding = False
+
     async def idle_cleaner(self):
         period = self.cleaner_period
         if not self._idle_set:
@@ -235,9 +804,10 @@ class Store:
             asyncio.get_event_loop().call_later(sleep_time, lambda: asyncio.ensure_future(self.idle_cleaner()))
             return
         while self._idle_set:
-            timestamp, reducer = self._idle_set.pop(0)
+            timestamp, reducer = self._idle_set[0]
             now_timestamp = time.time()
             if now_timestamp >= timestamp:
+                self._idle_set.pop(0)
                 self.pop_reducer_by_key(reducer.key)
             else:
                 break
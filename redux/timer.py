@@ -0,0 +1,87 @@
+from typing import *
+import heapq
+import asyncio
+import traceback
+import itertools
+
+
+class TimerEntry:
+    __slots__ = ("deadline", "sequence", "callback", "cancelled", )
+
+    def __init__(self, deadline: float, sequence: int, callback: Callable[[], Any]):
+        self.deadline = deadline
+        self.sequence = sequence
+        self.callback = callback
+        self.cancelled = False
+
+    def __lt__(self, other: 'TimerEntry'):
+        return (self.deadline, self.sequence) < (other.deadline, other.sequence)
+
+
+class TimerQueue:
+    """
+    多个超时共用的定时器, 小顶堆按截止时间排序, 事件循环上只挂一个最早到期的call_at,
+    取消只做标记(O(1)), 被取消的条目过多时再整体压缩
+    """
+    def __init__(self):
+        self._heap: List[TimerEntry] = []
+        self._sequence = itertools.count()
+        self._cancelled = 0
+        self._handle = None
+        self._handle_deadline = None
+
+    def __len__(self):
+        return len(self._heap) - self._cancelled
+
+    def call_later(self, delay: float, callback: Callable[[], Any]) -> TimerEntry:
+        loop = asyncio.get_event_loop()
+        entry = TimerEntry(loop.time() + delay, next(self._sequence), callback)
+        heapq.heappush(self._heap, entry)
+        if self._handle_deadline is None or entry.deadline < self._handle_deadline:
+            self._arm(loop)
+        return entry
+
+    def cancel(self, entry: TimerEntry):
+        if entry.cancelled:
+            return
+        entry.cancelled = True
+        self._cancelled += 1
+        if self._cancelled > 64 and self._cancelled * 2 > len(self._heap):
+            self._heap = [item for item in self._heap if not item.cancelled]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+
+    def _arm(self, loop):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+            self._handle_deadline = None
+        heap = self._heap
+        while heap and heap[0].cancelled:
+            heapq.heappop(heap)
+            self._cancelled -= 1
+        if heap:
+            self._handle_deadline = heap[0].deadline
+            self._handle = loop.call_at(self._handle_deadline, self._fire)
+
+    def _fire(self):
+        self._handle = None
+        self._handle_deadline = None
+        loop = asyncio.get_event_loop()
+        now = loop.time()
+        heap = self._heap
+        while heap and heap[0].deadline <= now:
+            entry = heapq.heappop(heap)
+            if entry.cancelled:
+                self._cancelled -= 1
+                continue
+            entry.cancelled = True
+            try:
+                entry.callback()
+            except Exception:
+                # 单个回调出错不能影响同一批到期的其他条目, 也不能让定时器停止
+                traceback.print_exc()
+        self._arm(loop)
+
+
+__all__ = ["TimerEntry", "TimerQueue", ]
@@ -0,0 +1,130 @@
+from typing import *
+import json
+import time
+import random
+
+
+def new_span_id() -> str:
+    return "%016x" % random.getrandbits(64)
+
+
+class TraceContext:
+    def __init__(self, trace_id: str, span_id: Optional[str]=None, sampled: bool=True, parent_id: Optional[str]=None):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.received_time = None
+
+    def child(self) -> 'TraceContext':
+        return TraceContext(self.trace_id, new_span_id(), self.sampled, self.span_id)
+
+    def to_list(self) -> List:
+        return [self.trace_id, self.span_id, self.sampled]
+
+    @staticmethod
+    def from_list(data: List) -> 'TraceContext':
+        trace_id, span_id, sampled = data
+        return TraceContext(trace_id, span_id, bool(sampled))
+
+    def __repr__(self):
+        return "<TraceContext: {}/{}>".format(self.trace_id, self.span_id)
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str, span_id: str, parent_id: Optional[str], key, action_type: str, start: float, end: float):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.key = key
+        self.action_type = action_type
+        self.start = start
+        self.end = end
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    def to_dict(self):
+        return dict(
+            name=self.name,
+            trace_id=self.trace_id,
+            span_id=self.span_id,
+            parent_id=self.parent_id,
+            key=self.key,
+            action=self.action_type,
+            start=self.start,
+            duration=self.duration,
+        )
+
+    def __repr__(self):
+        return "<Span: {} {} {:.6f}s>".format(self.name, self.key, self.duration)
+
+
+class FileSpanExporter:
+    """
+    把span以json lines的格式追加到本地文件, 攒够buffer_size条才写一次文件
+    """
+    def __init__(self, path: str, buffer_size: int=256):
+        self.path = path
+        self.buffer_size = buffer_size
+        self._buffer = []
+
+    def export(self, span: Span):
+        self._buffer.append(span)
+        if len(self._buffer) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        with open(self.path, "a", encoding="utf8") as f:
+            for span in self._buffer:
+                f.write(json.dumps(span.to_dict()))
+                f.write("\n")
+        self._buffer.clear()
+
+    def close(self):
+        self.flush()
+
+
+class Tracer:
+    """
+    每一跳(一次dispatch)产生一个hop span, 以及queue/lock/reduce/listener四个阶段的子span,
+    是否采样只在trace的入口决定一次, 然后跟随action的信封传递给后续的跳
+    """
+    def __init__(self, exporter=None, sample_rate: float=1.0):
+        self.exporter = exporter
+        self.sample_rate = float(sample_rate)
+
+    def begin(self, key, action) -> Tuple[Any, Optional[TraceContext]]:
+        '''
+        返回本跳使用的action副本(信封里换成本跳的trace)和采样时的hop span, 传入的action不变
+        '''
+        incoming = action.trace
+        if incoming is None:
+            incoming = TraceContext(new_span_id(), None, random.random() < self.sample_rate)
+        action = action.copy()
+        if not incoming.sampled:
+            action.trace = incoming
+            return action, None
+        hop = incoming.child()
+        hop.received_time = time.time()
+        if incoming.received_time is not None:
+            self.record("queue", hop, key, action, incoming.received_time, hop.received_time)
+        action.trace = hop
+        return action, hop
+
+    def record(self, name: str, hop: TraceContext, key, action, start: float, end: float):
+        if self.exporter is None:
+            return
+        self.exporter.export(Span(name, hop.trace_id, new_span_id(), hop.span_id, key, action.type, start, end))
+
+    def finish(self, hop: TraceContext, key, action, end: float):
+        if self.exporter is None:
+            return
+        self.exporter.export(Span("hop", hop.trace_id, hop.span_id, hop.parent_id, key, action.type, hop.received_time, end))
+
+
+__all__ = ["TraceContext", "Span", "Tracer", "FileSpanExporter", ]
@@ -1,5 +1,6 @@
 from typing import *
 import asyncio
+import functools
 import pytest
 import redux
 
@@ -225,6 +226,171 @@ async def idle():
     await asyncio.sleep(0.11)
 
 
+@redux.behavior("selector:")
+class SelectorReducer(redux.Reducer):
+    computed = 0
+
+    def __init__(self):
+        reducer = {
+            "name": name,
+            "age": age,
+        }
+        super(SelectorReducer, self).__init__(reducer)
+
+    async def action_received(self, action: redux.Action):
+        if action == "LOGIN":
+            self.get_state()["_sessions"] = self.get_state().get("_sessions", 0) + 1
+            self.mark_changed("_sessions")
+
+    @redux.selector("age", "_sessions")
+    def summary(self, state):
+        SelectorReducer.computed += 1
+        return "{}/{}".format(state.get("age"), state.get("_sessions", 0))
+
+
+async def selector():
+    SelectorReducer.computed = 0
+    store = redux.Store([SelectorReducer])
+    await store.dispatch("selector:1", redux.Action("NAME", name="peter"))
+    assert store["selector:1"]["summary"] == "None/0"
+    await store.dispatch("selector:1", redux.Action("NAME", name="bob"))
+    assert SelectorReducer.computed == 1
+    await store.dispatch("selector:1", redux.Action("AGE", age=3))
+    await store.dispatch("selector:1", redux.Action("LOGIN"))
+    assert SelectorReducer.computed == 3
+    state = await redux.LocalMedium(store).get_state("other", "selector:1", ["summary"])
+    assert state.unwrap() == dict(summary="3/1")
+
+
+class FieldListener(redux.Listener):
+    def __init__(self):
+        super(FieldListener, self).__init__()
+        self.calls = []
+
+    async def on_changed(self, changed_key: List[str], state: Dict[str, Any]):
+        self.calls.append((set(changed_key), state))
+
+
+async def field_subscribe():
+    store = redux.Store([ReducerStateProvider])
+    age_listener = FieldListener()
+    full_listener = FieldListener()
+    await store.subscribe("user:1", age_listener, fields=["age"])
+    await store.subscribe("user:1", full_listener)
+    await store.dispatch("user:1", redux.Action("NAME", name="peter"))
+    await store.dispatch("user:1", redux.Action("AGE", age=2))
+    assert age_listener.calls == [({"age"}, dict(age=1)), ({"age"}, dict(age=2))]
+    assert len(full_listener.calls) == 3
+
+
+class UserPrefixListener(redux.PrefixListener):
+    def __init__(self):
+        super(UserPrefixListener, self).__init__()
+        self.calls = []
+
+    async def on_changed(self, key: str, changed_state: Dict[str, Any], state: Dict[str, Any]):
+        self.calls.append((key, set(changed_state)))
+
+
+async def prefix_subscribe():
+    store = redux.Store([ReducerStateProvider])
+    listener = UserPrefixListener()
+    unsubscribe = store.subscribe_prefix("user:", listener).unwrap()
+    assert store.subscribe_prefix("user:", listener).is_error
+    assert "user:1" not in store
+    await store.dispatch("user:1", redux.Action("AGE", age=2))
+    await store.dispatch("user:2", redux.Action("NAME", name="peter"))
+    await store.dispatch("user:2", redux.Action("NAME", name="peter"))
+    assert listener.calls == [("user:1", {"age"}), ("user:2", {"name"})]
+    unsubscribe()
+    assert not listener.is_binding
+    await store.dispatch("user:3", redux.Action("AGE", age=3))
+    assert len(listener.calls) == 2
+
+
+async def secondary_index():
+    store = redux.Store([ReducerStateProvider])
+    for index in range(5):
+        await store.dispatch("user:{}".format(index), redux.Action("AGE", age=index))
+    age_index = store.create_index(ReducerStateProvider, "age", sorted=True).unwrap()
+    name_index = store.create_index(ReducerStateProvider, "name").unwrap()
+    assert len(age_index) == 5 and len(name_index) == 5
+    await store.dispatch("user:5", redux.Action("NAME", name="peter"))
+    await store.dispatch("user:0", redux.Action("NAME", name="peter"))
+    assert len(list(store.iter_reducers_by_type(ReducerStateProvider))) == 6
+    assert sorted(reducer.key for reducer in store.iter_reducers_by_prefix("user:")) == ["user:{}".format(i) for i in range(6)]
+    assert not list(store.iter_reducers_by_prefix("users"))
+    assert {reducer.key for reducer in store.find_by_field(ReducerStateProvider, "name", "peter")} == {"user:0", "user:5"}
+    assert [reducer.key for reducer in store.find_by_range(ReducerStateProvider, "age", 1, 3)] == ["user:1", "user:5", "user:2", "user:3"]
+    assert [reducer.key for reducer in store.find_by_range(ReducerStateProvider, "age", low=3, inclusive=(False, True))] == ["user:4"]
+    store.pop_reducer_by_key("user:5")
+    assert {reducer.key for reducer in store.find_by_field(ReducerStateProvider, "name", "peter")} == {"user:0"}
+    assert [reducer.key for reducer in store.find_by_field(ReducerStateProvider, "age", 1)] == ["user:1"]
+    store.drop_index(ReducerStateProvider, "age")
+    assert [reducer.key for reducer in store.find_by_range(ReducerStateProvider, "age", high=1)] == ["user:0", "user:1"]
+
+
+def sync_name(action: redux.Action, state=None):
+    if action.type == "NAME":
+        state = action.arguments["name"]
+    return state
+
+
+@redux.behavior("sync:")
+class SyncReducer(redux.Reducer):
+    def __init__(self):
+        super(SyncReducer, self).__init__({"name": sync_name})
+        self.received = []
+
+    def action_received(self, action: redux.Action):
+        self.received.append(action.type)
+
+
+async def sync_slice():
+    store = redux.Store([SyncReducer, ReducerStateProvider])
+    await store.dispatch("sync:1", redux.Action("NAME", name="peter"))
+    reducer = (await store.get_or_create_cell("sync:1")).unwrap()
+    assert reducer._sync_slices
+    assert not SyncReducer.async_action_received
+    assert reducer.received == ["NAME"]
+    assert store["sync:1"] == dict(name="peter")
+    reducer.replace_reducer({"name": sync_name, "age": age})
+    assert not reducer._sync_slices
+    await store.dispatch("sync:1", redux.Action("AGE", age=3))
+    assert store["sync:1"] == dict(name="peter", age=3)
+
+
+async def partial_name(prefix: str, action: redux.Action, state=None):
+    if action.type == "NAME":
+        state = prefix + action.arguments["name"]
+    return state
+
+
+@redux.behavior("wrapped:")
+class WrappedSliceReducer(redux.Reducer):
+    def __init__(self):
+        super(WrappedSliceReducer, self).__init__({
+            "name": functools.partial(partial_name, "mr "),
+            "age": lambda action, state=None: age(action, state),
+            "nick": sync_name,
+        })
+
+
+async def wrapped_slice():
+    store = redux.Store([WrappedSliceReducer])
+    await store.dispatch("wrapped:1", redux.Action("NAME", name="peter"))
+    reducer = (await store.get_or_create_cell("wrapped:1")).unwrap()
+    assert redux.reducer.slice_kind(reducer.mapping_dict["name"]) == redux.reducer.SLICE_ASYNC
+    assert reducer._sync_slices is False
+    await store.dispatch("wrapped:1", redux.Action("AGE", age=3))
+    assert store["wrapped:1"] == dict(name="mr peter", age=3, nick="peter")
+    reducer.replace_reducer({"nick": sync_name, "age": lambda action, state=None: age(action, state)})
+    assert reducer._sync_slices
+    await store.dispatch("wrapped:1", redux.Action("AGE", age=4))
+    await store.dispatch("wrapped:1", redux.Action("NAME", name="tom"))
+    assert store["wrapped:1"] == dict(name="mr peter", age=4, nick="tom")
+
+
 @pytest.fixture(scope="session", autouse=True)
 def setup_environment():
     redux.RemoteManager().RECONNECT_TIMEOUT = 0.1
@@ -250,6 +416,30 @@ def test_idle():
     asyncio.get_event_loop().run_until_complete(idle())
 
 
+def test_selector():
+    asyncio.get_event_loop().run_until_complete(selector())
+
+
+def test_field_subscribe():
+    asyncio.get_event_loop().run_until_complete(field_subscribe())
+
+
+def test_prefix_subscribe():
+    asyncio.get_event_loop().run_until_complete(prefix_subscribe())
+
+
+def test_wrapped_slice():
+    asyncio.get_event_loop().run_until_complete(wrapped_slice())
+
+
+def test_secondary_index():
+    asyncio.get_event_loop().run_until_complete(secondary_index())
+
+
+def test_sync_slice():
+    asyncio.get_event_loop().run_until_complete(sync_slice())
+
+
 def test_action():
     action = redux.Action("one")
     assert action == "one"
@@ -0,0 +1,131 @@
+from typing import *
+import asyncio
+import redux
+
+
+@redux.behavior("schedule:")
+class OrderReducer(redux.Reducer):
+    order = []
+
+    def action_received(self, action: redux.Action):
+        OrderReducer.order.append(self.key)
+
+
+@redux.behavior("heavy:")
+class HeavyReducer(OrderReducer):
+    schedule_weight = 4
+
+
+@redux.behavior("lane:")
+class LaneOrderReducer(redux.Reducer):
+    priority_dict = {"BACKLOG": redux.PRIORITY_BULK}
+    order = []
+
+    def action_received(self, action: redux.Action):
+        LaneOrderReducer.order.append(action.type)
+
+
+@redux.behavior("control:")
+class ControlDefaultReducer(LaneOrderReducer):
+    default_priority = redux.PRIORITY_CONTROL
+
+
+async def fairness():
+    OrderReducer.order = []
+    store = redux.Store([OrderReducer], quantum=8)
+    for _ in range(1000):
+        assert store.post("schedule:hot", redux.Action("HIT"))
+    assert store.post("schedule:cold", redux.Action("HIT"))
+    assert store.stats()["scheduler"] == dict(mailboxes=2, pending=1001)
+    while store.stats()["scheduler"]["pending"]:
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert OrderReducer.order.index("schedule:cold") <= 8
+    assert OrderReducer.order.count("schedule:hot") == 1000
+    assert store.stats()["scheduler"] == dict(mailboxes=0, pending=0)
+
+
+async def weighted():
+    OrderReducer.order = []
+    store = redux.Store([OrderReducer, HeavyReducer], quantum=2)
+    for _ in range(20):
+        store.post("heavy:1", redux.Action("HIT"))
+        store.post("schedule:1", redux.Action("HIT"))
+    while store.stats()["scheduler"]["mailboxes"]:
+        await asyncio.sleep(0)
+    assert OrderReducer.order[:10] == ["heavy:1"] * 8 + ["schedule:1"] * 2
+
+
+async def caps():
+    store = redux.Store([OrderReducer], mailbox_size=10, max_pending=15)
+    accepted = [store.post("schedule:a", redux.Action("HIT")) for _ in range(12)]
+    accepted += [store.post("schedule:b", redux.Action("HIT")) for _ in range(8)]
+    assert accepted.count(True) == 15
+    assert store.stats()["dropped"] == dict(mailbox_full=2, overload=3)
+    while store.stats()["scheduler"]["mailboxes"]:
+        await asyncio.sleep(0)
+
+
+async def mailbox_lanes():
+    LaneOrderReducer.order = []
+    store = redux.Store([LaneOrderReducer, ControlDefaultReducer], quantum=4)
+    for _ in range(100):
+        assert store.post("lane:1", redux.Action("BACKLOG"))
+    assert store.post("lane:1", redux.Action("NORMAL"))
+    assert store.stats()["scheduler"]["pending"] == 101
+    while store.stats()["scheduler"]["mailboxes"]:
+        await asyncio.sleep(0)
+    assert LaneOrderReducer.order.index("NORMAL") == 0
+    assert LaneOrderReducer.order.count("BACKLOG") == 100
+    LaneOrderReducer.order = []
+    for _ in range(20):
+        assert store.post("control:1", redux.Action("BACKLOG"))
+    assert store.post("control:1", redux.Action("ENTRY"))
+    assert store.stats()["scheduler"] == dict(mailboxes=1, pending=21)
+    while store.stats()["scheduler"]["mailboxes"]:
+        await asyncio.sleep(0)
+    assert LaneOrderReducer.order.index("ENTRY") == 0
+
+
+async def control_caps():
+    LaneOrderReducer.order = []
+    store = redux.Store([ControlDefaultReducer], mailbox_size=3, max_pending=4)
+    accepted = [store.post("control:{}".format(i % 2), redux.Action("ENTRY")) for i in range(8)]
+    assert accepted.count(True) == 4
+    assert store.stats()["dropped"] == dict(overload=4)
+    assert store.stats()["scheduler"]["pending"] == 4
+    while store.stats()["scheduler"]["mailboxes"]:
+        await asyncio.sleep(0)
+    assert LaneOrderReducer.order == ["ENTRY"] * 4
+
+
+async def unbounded_default():
+    store = redux.Store([OrderReducer])
+    assert all(store.post("schedule:flood", redux.Action("HIT")) for _ in range(20000))
+    assert not store.stats()["dropped"]
+    while store.stats()["scheduler"]["mailboxes"]:
+        await asyncio.sleep(0)
+
+
+def test_mailbox_lanes():
+    asyncio.get_event_loop().run_until_complete(mailbox_lanes())
+
+
+def test_control_caps():
+    asyncio.get_event_loop().run_until_complete(control_caps())
+
+
+def test_unbounded_default():
+    asyncio.get_event_loop().run_until_complete(unbounded_default())
+
+
+def test_fairness():
+    asyncio.get_event_loop().run_until_complete(fairness())
+
+
+def test_weighted():
+    asyncio.get_event_loop().run_until_complete(weighted())
+
+
+def test_caps():
+    asyncio.get_event_loop().run_until_complete(caps())
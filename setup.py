@@ -8,7 +8,7 @@ setup(
     description='',
     long_description='',
     url='https://github.com/xdusongwei/redux-python',
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmark', 'benchmark.*']),
     install_requires=['websockets', 'msgpack', 'pytest', 'sortedcontainers'],
     ext_modules=[],
     classifiers=[
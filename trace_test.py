@@ -0,0 +1,62 @@
+from typing import *
+import json
+import asyncio
+import redux
+
+
+@redux.behavior("trace:front:")
+class FrontReducer(redux.Reducer):
+    async def action_received(self, action: redux.Action):
+        if action == "PING":
+            await self.send(redux.LocalMedium(self.store), "trace:back:1", redux.Action("PONG"))
+
+
+@redux.behavior("trace:back:")
+class BackReducer(redux.Reducer):
+    async def action_received(self, action: redux.Action):
+        pass
+
+
+async def trace_hops(path):
+    exporter = redux.FileSpanExporter(str(path))
+    store = redux.Store([FrontReducer, BackReducer], tracer=redux.Tracer(exporter))
+    await store.dispatch("trace:front:1", redux.Action("PING"))
+    await asyncio.sleep(0.01)
+    exporter.close()
+    spans = [json.loads(line) for line in open(str(path), encoding="utf8")]
+    hops = {span["key"]: span for span in spans if span["name"] == "hop"}
+    assert set(hops.keys()) == {"trace:front:1", "trace:back:1"}
+    front, back = hops["trace:front:1"], hops["trace:back:1"]
+    assert front["trace_id"] == back["trace_id"]
+    assert back["parent_id"] == front["span_id"]
+    back_phases = {span["name"] for span in spans if span["parent_id"] == back["span_id"]}
+    assert back_phases == {"queue", "lock", "reduce"}
+
+
+async def trace_unsampled(path):
+    exporter = redux.FileSpanExporter(str(path))
+    store = redux.Store([FrontReducer, BackReducer], tracer=redux.Tracer(exporter, sample_rate=0))
+    await store.dispatch("trace:front:1", redux.Action("PING"))
+    await asyncio.sleep(0.01)
+    exporter.close()
+    assert not path.exists()
+
+
+def test_trace_hops(tmp_path):
+    asyncio.get_event_loop().run_until_complete(trace_hops(tmp_path / "spans.jsonl"))
+
+
+def test_trace_unsampled(tmp_path):
+    asyncio.get_event_loop().run_until_complete(trace_unsampled(tmp_path / "spans.jsonl"))
+
+
+def test_trace_envelope():
+    action = redux.Action("hello", time=1)
+    action.trace = redux.TraceContext("t", "s")
+    message = redux.LocalMedium.to_message("a", "b", action).unwrap()
+    target_key, received = redux.LocalMedium.from_message(None, message).unwrap()
+    assert target_key == "b"
+    assert received.arguments == dict(time=1)
+    assert received.trace.trace_id == "t"
+    assert received.trace.span_id == "s"
+    assert received.trace.received_time is not None
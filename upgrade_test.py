@@ -0,0 +1,165 @@
+from typing import *
+import asyncio
+import redux
+
+
+def count_v1(action: redux.Action, state=None):
+    if action == "INCREASE":
+        state = (state or 0) + 1
+    return state
+
+
+def count_v2(action: redux.Action, state=None):
+    if action == "INCREASE":
+        state = (state or 0) + 10
+    return state
+
+
+@redux.behavior("upgrade:", redux.IdleTimeoutRecycleOption(60))
+class CounterV1(redux.Reducer):
+    def __init__(self):
+        super(CounterV1, self).__init__({"count": count_v1})
+        self.initialized = 0
+
+    async def initialize(self, key):
+        await super(CounterV1, self).initialize(key)
+        self.initialized += 1
+        return True
+
+
+@redux.behavior("upgrade:", redux.IdleTimeoutRecycleOption(60))
+class CounterV2(redux.Reducer):
+    initialize_calls = 0
+
+    def __init__(self):
+        super(CounterV2, self).__init__({"total": count_v2})
+        self.initialized = 0
+
+    async def initialize(self, key):
+        await super(CounterV2, self).initialize(key)
+        CounterV2.initialize_calls += 1
+        self.initialized += 1
+        return True
+
+
+@redux.behavior("upgrade:pool:", redux.NeverRecycleOption(), pool_size=3)
+class PoolV1(redux.ExecutorReducer):
+    shutdown_count = 0
+
+    async def action_received(self, action: redux.Action):
+        pass
+
+    async def shutdown(self):
+        PoolV1.shutdown_count += 1
+
+
+@redux.behavior("upgrade:pool:", redux.NeverRecycleOption(), pool_size=2)
+class PoolV2(redux.ExecutorReducer):
+    initialize_calls = 0
+
+    async def initialize(self, key):
+        PoolV2.initialize_calls += 1
+        return await super(PoolV2, self).initialize(key)
+
+    async def action_received(self, action: redux.Action):
+        pass
+
+
+class CountListener(redux.Listener):
+    def __init__(self):
+        super(CountListener, self).__init__()
+        self.states = []
+
+    async def on_changed(self, changed_key: List[str], state: Dict[str, Any]):
+        self.states.append(dict(state))
+
+
+def rename(state: Dict[str, Any]) -> Dict[str, Any]:
+    state["total"] = state.pop("count")
+    return state
+
+
+async def upgrade():
+    CounterV2.initialize_calls = 0
+    store = redux.Store([CounterV1])
+    for i in range(5):
+        await store.dispatch("upgrade:{}".format(i), redux.Action("INCREASE"))
+    listener = CountListener()
+    await store.subscribe("upgrade:0", listener)
+    old = (await store.get_or_create_cell("upgrade:0")).unwrap()
+    await old.locker.acquire()
+    upgrading = asyncio.ensure_future(store.upgrade_reducer_type(CounterV1, CounterV2, migrate=rename, batch_size=2))
+    await asyncio.sleep(0.01)
+    queued = asyncio.ensure_future(store.dispatch("upgrade:0", redux.Action("INCREASE")))
+    await asyncio.sleep(0.01)
+    assert not upgrading.done()
+    idle_deadline = old.last_idle_key[0]
+    assert store["upgrade:1"] == dict(total=1)
+    old.locker.release()
+    assert (await upgrading).unwrap() == 5
+    assert await queued
+    new = (await store.get_or_create_cell("upgrade:0")).unwrap()
+    assert type(new) is CounterV2 and old.successor is new
+    assert new.initialized == 1 and new.node_id == "0"
+    assert CounterV2.initialize_calls == 0
+    assert new.last_idle_key[0] == idle_deadline and new.last_idle_key in store._idle_set
+    assert store["upgrade:0"] == dict(total=11)
+    assert listener.is_binding and listener.states[-1] == dict(total=11)
+    assert await store.dispatch("upgrade:9", redux.Action("INCREASE"))
+    assert store["upgrade:9"] == dict(total=10)
+    assert CounterV2.initialize_calls == 1
+    assert len(store.find_reducer_list_by_type(CounterV2)) == 6
+    assert not store.find_reducer_list_by_type(CounterV1)
+
+
+def broken_rename(state: Dict[str, Any]) -> Dict[str, Any]:
+    if state["count"] == 2:
+        raise ValueError("cannot migrate")
+    return rename(state)
+
+
+async def failed_upgrade():
+    store = redux.Store([CounterV1])
+    for i in range(4):
+        for _ in range(1 + i % 2):
+            await store.dispatch("upgrade:{}".format(i), redux.Action("INCREASE"))
+    result = await store.upgrade_reducer_type(CounterV1, CounterV2, migrate=broken_rename, batch_size=3)
+    error = result.error
+    assert isinstance(error, redux.UpgradeError)
+    assert error.upgraded == 2
+    assert sorted(error.failed) == ["upgrade:1", "upgrade:3"]
+    assert all(isinstance(e, ValueError) for e in error.failed.values())
+    assert store["upgrade:1"] == dict(count=2)
+    assert type((await store.get_or_create_cell("upgrade:1")).unwrap()) is CounterV1
+    assert await store.dispatch("upgrade:1", redux.Action("INCREASE"))
+    assert store["upgrade:1"] == dict(count=3)
+    assert (await store.upgrade_reducer_type(CounterV1, CounterV2, migrate=rename)).unwrap() == 2
+    assert store["upgrade:1"] == dict(total=3)
+    assert not store.find_reducer_list_by_type(CounterV1)
+
+
+async def pool_upgrade():
+    PoolV1.shutdown_count = 0
+    PoolV2.initialize_calls = 0
+    store = redux.Store([PoolV1])
+    await store.dispatch("upgrade:pool:1", redux.Action("WORK"))
+    assert (await store.upgrade_reducer_type(PoolV1, PoolV2)).unwrap() == 1
+    await asyncio.sleep(0)
+    new = (await store.get_or_create_cell("upgrade:pool:1")).unwrap()
+    assert type(new) is PoolV2 and len(new.pool) == 2
+    assert all(member.key == "upgrade:pool:1" and member.enable for member in new.pool.members)
+    assert PoolV2.initialize_calls == 0
+    assert PoolV1.shutdown_count == 2
+    assert await store.dispatch("upgrade:pool:1", redux.Action("WORK"))
+
+
+def test_failed_upgrade():
+    asyncio.get_event_loop().run_until_complete(failed_upgrade())
+
+
+def test_pool_upgrade():
+    asyncio.get_event_loop().run_until_complete(pool_upgrade())
+
+
+def test_upgrade():
+    asyncio.get_event_loop().run_until_complete(upgrade())